@@ -0,0 +1,319 @@
+"""End-to-end benchmarks of the query pipeline against a local stand-in upstream.
+
+Scenarios:
+    cold-fetch-http / cold-fetch-jsonrpc   uncached calls over loopback
+    in-memory-hit                          answered from an InMemoryCache
+    async-hit / async-miss                 awaited calls to an in-process handler,
+                                           measuring async dispatch overhead
+    redis-hit                              answered from Redis (skipped without a server)
+    validate-list-model                    pydantic validation of 1000 GitHub issues
+    fanout-sync / fanout-async             `--width` concurrent uncached calls
+    fanout-bridged                         fanout-sync through a shared BackgroundLoop
+    fanout-map-sync                        `Api.map_sync` with `--width` workers
+
+Every row reports throughput and per-call p50/p99 latency. With `--json`
+rows are emitted as JSON lines tagged with the git commit, so runs can be
+compared across commits.
+
+Usage:
+    python -m benchmarks.bench_api [--json] [--quick] [--latency SECONDS]
+        [--width N] [--redis HOST:PORT]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+from pydantic import BaseModel
+
+from pomdapi.api.http import BaseQueryConfig, HttpApi, RequestDefinition
+from pomdapi.api.jsonrpc import BaseQueryConfig as JSONRPCConfig, JSONRPCApi
+from pomdapi.cache.in_memory import InMemoryCache
+from pomdapi.core.api import Api
+from pomdapi.core.bridge import BackgroundLoop
+from pomdapi.testing import StandInServer
+
+from benchmarks.payloads import github_issue_list
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    score: float
+    tags: list[str]
+    description: str
+
+
+class User(BaseModel):
+    login: str
+    id: int
+
+
+class Label(BaseModel):
+    id: int
+    name: str
+    color: str
+
+
+class Issue(BaseModel):
+    id: int
+    number: int
+    title: str
+    user: User
+    labels: list[Label]
+    state: str
+    comments: int
+    body: Optional[str] = None
+
+
+def percentile(sorted_values: list[int], q: float) -> int:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(scenario: str, mode: str, latencies_ns: list[int], elapsed: float) -> dict[str, Any]:
+    latencies_ns.sort()
+    return {
+        "scenario": scenario,
+        "mode": mode,
+        "ops": len(latencies_ns),
+        "seconds": round(elapsed, 4),
+        "ops_per_s": round(len(latencies_ns) / elapsed, 1),
+        "p50_us": round(percentile(latencies_ns, 0.50) / 1000, 1),
+        "p99_us": round(percentile(latencies_ns, 0.99) / 1000, 1),
+    }
+
+
+def run_sync(scenario: str, ops: int, call: Callable[[int], Any]) -> dict[str, Any]:
+    latencies = []
+    started = time.perf_counter()
+    for i in range(ops):
+        t0 = time.perf_counter_ns()
+        call(i)
+        latencies.append(time.perf_counter_ns() - t0)
+    return summarize(scenario, "sync", latencies, time.perf_counter() - started)
+
+
+def run_async(scenario: str, ops: int, call: Callable[[int], Awaitable[Any]]) -> dict[str, Any]:
+    latencies = []
+
+    async def main() -> float:
+        started = time.perf_counter()
+        for i in range(ops):
+            t0 = time.perf_counter_ns()
+            await call(i)
+            latencies.append(time.perf_counter_ns() - t0)
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    return summarize(scenario, "async", latencies, elapsed)
+
+
+def run_fanout_sync(scenario: str, ops: int, width: int, call: Callable[[int], Any]) -> dict[str, Any]:
+    latencies: list[int] = []
+
+    def timed(i: int) -> None:
+        t0 = time.perf_counter_ns()
+        call(i)
+        latencies.append(time.perf_counter_ns() - t0)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(width) as pool:
+        list(pool.map(timed, range(ops)))
+    return summarize(scenario, "sync", latencies, time.perf_counter() - started)
+
+
+def run_map_sync(scenario: str, ops: int, width: int, api: Api, endpoint: str) -> dict[str, Any]:
+    latencies: list[int] = []
+    started = time.perf_counter()
+    t0 = time.perf_counter_ns()
+    for _ in api.map_sync(endpoint, ({"item_id": i} for i in range(ops)), workers=width, ordered=False):
+        t1 = time.perf_counter_ns()
+        latencies.append(t1 - t0)
+        t0 = t1
+    api.close()
+    # Per-call latency is not observable from outside the pool; rows report
+    # the interval between consecutive results instead.
+    return summarize(scenario, "sync", latencies, time.perf_counter() - started)
+
+
+def run_fanout_async(
+    scenario: str, ops: int, width: int, call: Callable[[int], Awaitable[Any]]
+) -> dict[str, Any]:
+    latencies: list[int] = []
+
+    async def timed(i: int) -> None:
+        t0 = time.perf_counter_ns()
+        await call(i)
+        latencies.append(time.perf_counter_ns() - t0)
+
+    async def main() -> float:
+        started = time.perf_counter()
+        for batch in range(0, ops, width):
+            await asyncio.gather(*(timed(i) for i in range(batch, min(batch + width, ops))))
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(main())
+    return summarize(scenario, "async", latencies, elapsed)
+
+
+def http_api(server: StandInServer, cache: Any = None, background_loop: Optional[BackgroundLoop] = None):
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=server.url), cache=cache)
+    api.background_loop = background_loop
+
+    @api.query("getItem", response_type=Item)
+    def get_item(item_id: int):
+        return RequestDefinition(method="GET", path=f"/items/{item_id}")
+
+    return get_item
+
+
+def jsonrpc_api(server: StandInServer):
+    api = JSONRPCApi.from_defaults(
+        base_query_config=JSONRPCConfig(base_url=f"{server.url}/rpc")
+    )
+
+    @api.query("echo", response_type=list[int])
+    def echo(value: int):
+        return [value]
+
+    return echo
+
+
+def redis_cache(address: str) -> Any:
+    try:
+        import redis
+
+        host, _, port = address.partition(":")
+        redis.Redis(host=host, port=int(port or 6379), socket_connect_timeout=0.5).ping()
+        from pomdapi.cache.redis import RedisCache
+
+        return RedisCache(host=host, port=int(port or 6379))
+    except Exception:
+        return None
+
+
+def run(ops: int, latency: float, width: int, redis_address: str) -> list[dict[str, Any]]:
+    results = []
+    with StandInServer(latency=latency) as server:
+        get_item = http_api(server)
+        results.append(
+            run_sync("cold-fetch-http", ops, lambda i: get_item(is_async=False, item_id=i))
+        )
+        echo = jsonrpc_api(server)
+        results.append(run_sync("cold-fetch-jsonrpc", ops, lambda i: echo(is_async=False, value=i)))
+
+        cached_item = http_api(server, cache=InMemoryCache())
+        cached_item(is_async=False, item_id=1)
+        results.append(
+            run_sync("in-memory-hit", ops * 20, lambda i: cached_item(is_async=False, item_id=1))
+        )
+
+        cache = redis_cache(redis_address)
+        if cache is not None:
+            redis_item = http_api(server, cache=cache)
+            redis_item(is_async=False, item_id=1)
+            results.append(
+                run_sync("redis-hit", ops * 5, lambda i: redis_item(is_async=False, item_id=1))
+            )
+
+        results.append(
+            run_fanout_sync(
+                "fanout-sync", ops, width, lambda i: get_item(is_async=False, item_id=i)
+            )
+        )
+        with BackgroundLoop() as loop:
+            bridged_item = http_api(server, background_loop=loop)
+            results.append(
+                run_fanout_sync(
+                    "fanout-bridged", ops, width, lambda i: bridged_item(is_async=False, item_id=i)
+                )
+            )
+        mapped = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=server.url))
+        mapped.query("getItem", response_type=Item)(
+            lambda item_id: RequestDefinition(method="GET", path=f"/items/{item_id}")
+        )
+        results.append(run_map_sync("fanout-map-sync", ops, width, mapped, "getItem"))
+        results.append(
+            run_fanout_async(
+                "fanout-async", ops, width, lambda i: get_item(is_async=True, item_id=i)
+            )
+        )
+
+    item = {"id": 1, "name": "item-1", "score": 0.5, "tags": ["alpha"], "description": ""}
+
+    async def afetch(config, request):
+        return item
+
+    in_process = Api(
+        base_query_config=None,
+        base_query_fn_handler=lambda config, request: item,
+        base_query_fn_handler_async=afetch,
+        cache=InMemoryCache(),
+    )
+
+    @in_process.query("getItem", response_type=Item)
+    def get_local_item(item_id: int):
+        return item_id
+
+    get_local_item(is_async=False, item_id=0)
+    results.append(
+        run_async("async-hit", ops * 20, lambda i: get_local_item(is_async=True, item_id=0))
+    )
+    results.append(
+        run_async("async-miss", ops * 20, lambda i: get_local_item(is_async=True, item_id=i + 1))
+    )
+
+    issues = github_issue_list(1000)
+    api = Api(base_query_config=None, base_query_fn_handler=lambda config, request: issues)
+
+    @api.query("listIssues", response_type=list[Issue])
+    def list_issues(page: int):
+        return page
+
+    results.append(
+        run_sync("validate-list-model", max(ops // 10, 5), lambda i: list_issues(is_async=False, page=i))
+    )
+    return results
+
+
+def environment() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version()}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", action="store_true", help="emit JSON lines")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in response delay in seconds")
+    parser.add_argument("--width", type=int, default=32, help="concurrent calls in fan-out scenarios")
+    parser.add_argument("--redis", default="127.0.0.1:6379", help="Redis server for redis-hit")
+    args = parser.parse_args(argv)
+
+    results = run(50 if args.quick else 500, args.latency, args.width, args.redis)
+    if args.json:
+        env = environment()
+        for row in results:
+            sys.stdout.write(json.dumps({**env, **row}) + "\n")
+        return
+
+    print(f"{'scenario':<22}{'mode':<7}{'ops':>7}{'ops/s':>11}{'p50 µs':>10}{'p99 µs':>10}")
+    for row in results:
+        print(
+            f"{row['scenario']:<22}{row['mode']:<7}{row['ops']:>7}{row['ops_per_s']:>11.1f}"
+            f"{row['p50_us']:>10.1f}{row['p99_us']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
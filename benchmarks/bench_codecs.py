@@ -0,0 +1,119 @@
+"""Measure the JSON-RPC envelope overhead per call for each JSON codec.
+
+Compares encoding a request and decoding a response the way the JSON-RPC
+api did through pydantic models (`legacy-pydantic`) with the codec-based
+envelope, once per installed codec.
+
+Usage:
+    python -m benchmarks.bench_codecs [--json]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Callable, Optional
+
+from pydantic import BaseModel
+
+from pomdapi.api.jsonrpc import JSONRPCError, JSONRPCId, decode_result, encode_request
+from pomdapi.core.codec import MsgspecCodec, OrjsonCodec, StdlibCodec, get_codec, set_codec
+
+from benchmarks.bench_serializers import measure
+from benchmarks.payloads import payloads
+
+
+PARAMS = ["0x1b4", True]
+
+
+# The envelope models the JSON-RPC api validated every call with before codecs.
+class JSONRPCRequest(BaseModel):
+    jsonrpc: str
+    method: str
+    params: Any
+    id: JSONRPCId
+
+
+class JSONRPCResponse(BaseModel):
+    jsonrpc: str
+    result: Optional[Any] = None
+    error: Optional[JSONRPCError] = None
+    id: JSONRPCId
+
+
+def legacy_envelope(response: bytes) -> tuple[Callable[[], Any], Callable[[], Any]]:
+    """Encode and decode as the JSON-RPC api did before codecs existed."""
+
+    def encode() -> bytes:
+        payload = JSONRPCRequest(
+            jsonrpc="2.0", id=1, method="eth_getBlockByNumber", params=PARAMS
+        ).model_dump()
+        # httpx's `json=` argument
+        return json.dumps(payload).encode("utf-8")
+
+    def decode() -> Any:
+        return JSONRPCResponse(**json.loads(response)).result
+
+    return encode, decode
+
+
+def codec_envelope(response: bytes) -> tuple[Callable[[], Any], Callable[[], Any]]:
+    return (
+        lambda: encode_request("eth_getBlockByNumber", PARAMS, 1),
+        lambda: decode_result(response),
+    )
+
+
+def run() -> list[dict[str, Any]]:
+    codecs = []
+    for factory in (StdlibCodec, OrjsonCodec, MsgspecCodec):
+        try:
+            codecs.append(factory())
+        except ImportError:
+            continue
+
+    results = []
+    previous = get_codec()
+    try:
+        for payload_name, payload in payloads().items():
+            response = json.dumps({"jsonrpc": "2.0", "id": 1, "result": payload}).encode()
+            variants = [("legacy-pydantic", None)] + [(codec.name, codec) for codec in codecs]
+            for name, codec in variants:
+                if codec is None:
+                    encode, decode = legacy_envelope(response)
+                else:
+                    set_codec(codec)
+                    encode, decode = codec_envelope(response)
+                results.append(
+                    {
+                        "payload": payload_name,
+                        "codec": name,
+                        "response_bytes": len(response),
+                        "encode_us": measure(encode) * 1e6,
+                        "decode_us": measure(decode) * 1e6,
+                    }
+                )
+    finally:
+        set_codec(previous)
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--json", action="store_true", help="emit JSON lines")
+    args = parser.parse_args(argv)
+
+    results = run()
+    if args.json:
+        for row in results:
+            sys.stdout.write(json.dumps(row) + "\n")
+        return
+
+    print(f"{'payload':<24}{'codec':<18}{'bytes':>10}{'encode µs':>12}{'decode µs':>12}")
+    for row in results:
+        print(
+            f"{row['payload']:<24}{row['codec']:<18}{row['response_bytes']:>10}"
+            f"{row['encode_us']:>12.1f}{row['decode_us']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
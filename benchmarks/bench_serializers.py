@@ -0,0 +1,107 @@
+"""Compare cache serializers on CPU time and stored size.
+
+Usage:
+    python -m benchmarks.bench_serializers [--json]
+
+Serializers whose optional dependency is missing are skipped.
+"""
+import argparse
+import json
+import sys
+import timeit
+from typing import Any, Callable
+
+from pomdapi.cache.serializers import (
+    FramedSerializer,
+    JsonSerializer,
+    MsgpackSerializer,
+    PickleSerializer,
+)
+
+from benchmarks.payloads import payloads
+
+
+def legacy_redis_roundtrip() -> tuple[Callable[[Any], bytes], Callable[[bytes], Any]]:
+    """The serializer `RedisBackend` used before serializers were pluggable."""
+
+    def dumps(value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+    def loads(data: bytes) -> Any:
+        text = data.decode("utf-8", errors="replace")
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
+
+    return dumps, loads
+
+
+def candidates() -> dict[str, tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    found = {"legacy-json": legacy_redis_roundtrip()}
+    factories: dict[str, Callable[[], Any]] = {
+        "json": JsonSerializer,
+        "msgpack": MsgpackSerializer,
+        "pickle5": PickleSerializer,
+    }
+    for name, factory in factories.items():
+        try:
+            serializer = factory()
+        except ImportError:
+            continue
+        for compression in (None, "zlib", "zstd", "lz4"):
+            try:
+                framed = FramedSerializer(serializer, compression=compression, threshold=1024)
+            except ImportError:
+                continue
+            label = name if compression is None else f"{name}+{compression}"
+            found[label] = (framed.dumps, framed.loads)
+    return found
+
+
+def measure(fn: Callable[[], Any]) -> float:
+    """Return the mean seconds per call of `fn`."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=5, number=number))
+    return best / number
+
+
+def run() -> list[dict[str, Any]]:
+    results = []
+    for payload_name, payload in payloads().items():
+        for name, (dumps, loads) in candidates().items():
+            encoded = dumps(payload)
+            results.append(
+                {
+                    "payload": payload_name,
+                    "serializer": name,
+                    "bytes": len(encoded),
+                    "dumps_us": measure(lambda: dumps(payload)) * 1e6,
+                    "loads_us": measure(lambda: loads(encoded)) * 1e6,
+                }
+            )
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--json", action="store_true", help="emit JSON lines")
+    args = parser.parse_args(argv)
+
+    results = run()
+    if args.json:
+        for row in results:
+            sys.stdout.write(json.dumps(row) + "\n")
+        return
+
+    print(f"{'payload':<24}{'serializer':<16}{'bytes':>10}{'dumps µs':>12}{'loads µs':>12}")
+    for row in results:
+        print(
+            f"{row['payload']:<24}{row['serializer']:<16}{row['bytes']:>10}"
+            f"{row['dumps_us']:>12.1f}{row['loads_us']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
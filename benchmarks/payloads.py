@@ -0,0 +1,93 @@
+"""Realistic payload generators shared by the benchmarks.
+
+Shapes follow the GitHub REST issues API and Ethereum JSON-RPC responses,
+generated deterministically so runs are comparable across commits.
+"""
+import random
+from typing import Any
+
+
+def github_user(rng: random.Random, login: str) -> dict[str, Any]:
+    user_id = rng.randint(1, 10_000_000)
+    return {
+        "login": login,
+        "id": user_id,
+        "node_id": f"MDQ6VXNlcj{user_id}",
+        "avatar_url": f"https://avatars.githubusercontent.com/u/{user_id}?v=4",
+        "url": f"https://api.github.com/users/{login}",
+        "html_url": f"https://github.com/{login}",
+        "type": "User",
+        "site_admin": False,
+    }
+
+
+def github_issue(rng: random.Random, number: int) -> dict[str, Any]:
+    login = f"user{rng.randint(1, 500)}"
+    words = ["cache", "request", "timeout", "regression", "async", "retry", "token"]
+    return {
+        "url": f"https://api.github.com/repos/octo/repo/issues/{number}",
+        "id": 1_000_000 + number,
+        "node_id": f"I_kwDOA{number:08d}",
+        "number": number,
+        "title": " ".join(rng.choices(words, k=6)),
+        "user": github_user(rng, login),
+        "labels": [
+            {"id": rng.randint(1, 10_000), "name": name, "color": "d73a4a", "default": False}
+            for name in rng.sample(["bug", "enhancement", "perf", "docs", "good first issue"], k=2)
+        ],
+        "state": rng.choice(["open", "closed"]),
+        "locked": False,
+        "assignees": [github_user(rng, f"user{rng.randint(1, 500)}")],
+        "comments": rng.randint(0, 40),
+        "created_at": "2024-01-02T03:04:05Z",
+        "updated_at": "2024-02-03T04:05:06Z",
+        "closed_at": None,
+        "body": " ".join(rng.choices(words, k=rng.randint(20, 200))),
+        "reactions": {"total_count": rng.randint(0, 10), "+1": 0, "-1": 0},
+    }
+
+
+def github_issue_list(count: int = 100, seed: int = 0) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    return [github_issue(rng, number) for number in range(1, count + 1)]
+
+
+def eth_block(tx_count: int = 150, seed: int = 0) -> dict[str, Any]:
+    rng = random.Random(seed)
+
+    def h(n: int = 32) -> str:
+        return "0x" + rng.randbytes(n).hex()
+
+    return {
+        "number": hex(19_000_000),
+        "hash": h(),
+        "parentHash": h(),
+        "miner": h(20),
+        "gasLimit": hex(30_000_000),
+        "gasUsed": hex(rng.randint(10_000_000, 30_000_000)),
+        "timestamp": hex(1_700_000_000),
+        "logsBloom": h(256),
+        "transactions": [
+            {
+                "hash": h(),
+                "from": h(20),
+                "to": h(20),
+                "value": hex(rng.randint(0, 10**20)),
+                "gas": hex(21_000),
+                "gasPrice": hex(rng.randint(10**9, 10**11)),
+                "input": h(rng.randint(0, 256)),
+                "nonce": hex(rng.randint(0, 1000)),
+            }
+            for _ in range(tx_count)
+        ],
+    }
+
+
+def payloads() -> dict[str, Any]:
+    """Return the named payloads used across benchmarks."""
+    return {
+        "github_issue": github_issue_list(1)[0],
+        "github_issue_list_100": github_issue_list(100),
+        "eth_gas_price": "0x3b9aca00",
+        "eth_block_150_tx": eth_block(150),
+    }
@@ -1,7 +1,7 @@
 import os
 from typing import Literal
 from pydantic import BaseModel
-from pomdapi.core.types import Tag
+from pomdapi.core.types import CacheUpdate, Entity, Tag
 from pomdapi.api.http import HttpApi, RequestDefinition, BaseQueryConfig
 from pomdapi.cache.in_memory import InMemoryCache
 
@@ -32,11 +32,19 @@ class Issue(BaseModel):
     # ... other fields returned by GitHub if you like
 
 
-@github_api.query("getRepoIssues", response_type=list[Issue])
+# Issue numbers are only unique within a repository, so entities are scoped by it.
+issue_entity = Entity("Issue", id_field="number", scope=lambda owner, repo, **_: f"{owner}/{repo}")
+
+
+@github_api.query("getRepoIssues", response_type=list[Issue], entity=issue_entity)
 def get_repo_issues(owner: str, repo: str, state: str = "open"):
     """
     Fetch issues for a given owner/repo.
     This query 'provides' a tag for the list of issues, typically 'Issue/LIST'.
+
+    Notes
+    -----
+        - Each issue in the list is cached once as the entity Tag(type="Issue", id="<owner>/<repo>/<number>")
     """
     return (
         RequestDefinition(
@@ -47,7 +55,7 @@ def get_repo_issues(owner: str, repo: str, state: str = "open"):
     )
 
 
-@github_api.query("getRepoIssue", response_type=Issue)
+@github_api.query("getRepoIssue", response_type=Issue, entity=issue_entity)
 def get_repo_issue(owner: str, repo: str, issue_number: int):
     """
     Fetch a single issue for a repository by its issue number.
@@ -55,8 +63,9 @@ def get_repo_issue(owner: str, repo: str, issue_number: int):
 
     Notes
     -----
-        - We attach a unique tag for each issue, e.g Tag(type="Issue", id="123")
+        - We attach a unique tag for each issue, e.g Tag(type="Issue", id="octocat/hello-world/123")
         - Whenever you mutate or invalidate that tag, this specific issue will be invalidated
+        - If `get_repo_issues` already fetched the issue, it is answered from the cache
 
     """
     return (
@@ -64,7 +73,7 @@ def get_repo_issue(owner: str, repo: str, issue_number: int):
             method="GET",
             path=f"/repos/{owner}/{repo}/issues/{issue_number}",
         ),
-        Tag(type="Issue", id=str(issue_number)),
+        Tag(type="Issue", id=f"{owner}/{repo}/{issue_number}"),
     )
 
 
@@ -77,23 +86,31 @@ class CreateIssueResponse(BaseModel):
     id: int
     number: int
 
-@github_api.mutation("createIssue", response_type=CreateIssueResponse)
+@github_api.mutation(
+    "createIssue",
+    response_type=CreateIssueResponse,
+    updates=[
+        CacheUpdate(
+            endpoint_name="getRepoIssues",
+            query_args=lambda owner, repo, issue_data: {"owner": owner, "repo": repo},
+            update=lambda issues, created, *args, **kwargs: [*issues, created],
+        )
+    ],
+)
 def create_issue(owner: str, repo: str, issue_data: CreateIssueRequest):
     """
     Create a new issue in the repo.
 
     Notes:
     -----
-        - on success, we invalidate the list of issues
+        - on success, the created issue is appended to the cached list of open issues,
+          so `get_repo_issues` does not need to refetch it
 
     """
-    return (
-        RequestDefinition(
-            method="POST",
-            path=f"/repos/{owner}/{repo}/issues",
-            body=issue_data.model_dump(exclude_none=True),
-        ),
-        Tag(type="Issue", id="LIST"),  # Invalidate the issues list
+    return RequestDefinition(
+        method="POST",
+        path=f"/repos/{owner}/{repo}/issues",
+        body=issue_data.model_dump(exclude_none=True),
     )
 
 
@@ -120,7 +137,7 @@ def update_issue(
             path=f"/repos/{owner}/{repo}/issues/{issue_number}",
             body=update_data.model_dump(exclude_none=True),
         ),
-        Tag(type="Issue", id=str(issue_number)),
+        Tag(type="Issue", id=f"{owner}/{repo}/{issue_number}"),
     )
 
 
@@ -140,7 +157,7 @@ def lock_issue(owner: str, repo: str, issue_number: int):
             path=f"/repos/{owner}/{repo}/issues/{issue_number}/lock",
         ),
         (
-            Tag(type="Issue", id=str(issue_number)),
+            Tag(type="Issue", id=f"{owner}/{repo}/{issue_number}"),
             Tag(type="Issue", id="LIST"),
         ),
     )
@@ -148,7 +165,7 @@ def lock_issue(owner: str, repo: str, issue_number: int):
 if __name__ == "__main__":
     print("""
      BEHIND THE SCENES
-     - Creating an issue invalidates the 'LIST' tag →  refetch when calling `get_repo_issues`.
+     - Creating an issue patches the cached list → no refetch when calling `get_repo_issues`.
      - Updating an issue invalidates the single-issue tag → refetch when calling `get_repo_issue`.
      - Locking/deleting an issue might invalidate both the single-issue tag and the 'LIST.'
     """)
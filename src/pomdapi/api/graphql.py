@@ -0,0 +1,365 @@
+import asyncio
+import hashlib
+import json
+import threading
+import weakref
+import httpx
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, Optional, Type, TypeVar
+
+from pomdapi.core.api import Api
+from pomdapi.core.caching import Cache
+from pomdapi.core.codec import get_codec
+from pomdapi.core.metrics import record_payload
+from pomdapi.core.tracing import httpx_extensions, phase
+from pomdapi.core.types import Entity, Tag
+
+
+ResponseType = TypeVar("ResponseType")
+
+
+@dataclass(frozen=True)
+class Operation:
+    """A GraphQL operation: the document and the variables to run it with.
+
+    Operations are cached per document hash and variables.
+
+    Attributes:
+        query: The GraphQL document.
+        variables: Values of the operation's variables.
+        operation_name: Name of the operation to run if the document holds several.
+
+    Example:
+        ```python
+        Operation(
+            query="query Repo($owner: String!, $name: String!) { repository(owner: $owner, name: $name) { id name } }",
+            variables={"owner": "octocat", "name": "hello-world"},
+        )
+        ```
+    """
+
+    query: str
+    variables: dict[str, Any] = field(default_factory=dict, hash=False)
+    operation_name: Optional[str] = None
+
+    @property
+    def sha256(self) -> str:
+        return _sha256(self.query)
+
+    def __str__(self) -> str:
+        variables = json.dumps(self.variables, sort_keys=True, separators=(",", ":"))
+        return f"{self.sha256}:{self.operation_name or ''}:{variables}"
+
+
+_hashes: dict[str, str] = {}
+
+
+def _sha256(query: str) -> str:
+    digest = _hashes.get(query)
+    if digest is None:
+        digest = _hashes[query] = hashlib.sha256(query.encode("utf-8")).hexdigest()
+    return digest
+
+
+@dataclass
+class BaseQueryConfig:
+    """Defines the base configuration for all GraphQL API requests.
+
+    Attributes:
+        url: The GraphQL endpoint.
+        prepare_headers: A callable that takes and returns a headers dictionary.
+        persisted_queries: Send automatic persisted queries: only the
+            document's sha256 hash is sent, and the full document only when
+            the server does not know the hash yet.
+        batch: Send concurrent async operations as one array request. The
+            server must support query batching. Only operations using the
+            same config are batched together.
+        batch_window: Seconds to wait for further operations before sending
+            a batch. With 0, operations issued in the same event loop
+            iteration are batched.
+        max_batch: Maximum number of operations per batch.
+
+    Example:
+        ```python
+        config = BaseQueryConfig(url="https://api.example.com/graphql", batch=True)
+        ```
+    """
+
+    url: str
+    prepare_headers: Callable[[dict[str, str]], dict[str, str]] = field(
+        default_factory=lambda: lambda header: header
+    )
+    persisted_queries: bool = True
+    batch: bool = False
+    batch_window: float = 0.0
+    max_batch: int = 20
+    # Set once the server answered that it does not support persisted queries.
+    _persisted_queries_supported: bool = field(default=True, repr=False)
+    # One batcher per event loop, so only operations sharing this config's
+    # headers, persisted query state and limits are batched together.
+    _batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncBatcher]" = field(
+        default_factory=weakref.WeakKeyDictionary, repr=False, compare=False
+    )
+
+
+class GraphQLError(Exception):
+    """Raised when a GraphQL response carries errors and no data."""
+
+    def __init__(self, errors: list[dict[str, Any]]):
+        super().__init__("; ".join(str(error.get("message")) for error in errors))
+        self.errors = errors
+
+
+def _error_codes(payload: dict[str, Any]) -> set[str]:
+    codes = set()
+    for error in payload.get("errors") or []:
+        codes.add(str(error.get("message")))
+        codes.add(str((error.get("extensions") or {}).get("code")))
+    return codes
+
+
+def _body(config: BaseQueryConfig, operation: Operation, full: bool) -> dict[str, Any]:
+    body: dict[str, Any] = {"variables": operation.variables}
+    if operation.operation_name is not None:
+        body["operationName"] = operation.operation_name
+    persisted = config.persisted_queries and config._persisted_queries_supported
+    if full or not persisted:
+        body["query"] = operation.query
+    if persisted:
+        body["extensions"] = {
+            "persistedQuery": {"version": 1, "sha256Hash": operation.sha256}
+        }
+    return body
+
+
+def _needs_document(config: BaseQueryConfig, payload: dict[str, Any]) -> bool:
+    """Whether a persisted query must be resent with its document."""
+    codes = _error_codes(payload)
+    if "PersistedQueryNotSupported" in codes or "PERSISTED_QUERY_NOT_SUPPORTED" in codes:
+        config._persisted_queries_supported = False
+        return True
+    return "PersistedQueryNotFound" in codes or "PERSISTED_QUERY_NOT_FOUND" in codes
+
+
+def _data(payload: dict[str, Any]) -> Any:
+    if payload.get("errors") and payload.get("data") is None:
+        raise GraphQLError(payload["errors"])
+    return payload.get("data")
+
+
+def _headers(config: BaseQueryConfig) -> dict[str, str]:
+    return config.prepare_headers({"Content-Type": "application/json"})
+
+
+# Clients are pooled per endpoint (and per event loop for async clients),
+# so consecutive operations reuse open connections.
+_clients: dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client(config: BaseQueryConfig) -> httpx.Client:
+    with _clients_lock:
+        client = _clients.get(config.url)
+        if client is None:
+            client = _clients[config.url] = httpx.Client()
+        return client
+
+
+def _async_client(config: BaseQueryConfig) -> httpx.AsyncClient:
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(config.url)
+    if client is None:
+        client = clients[config.url] = httpx.AsyncClient()
+    return client
+
+
+def _post(config: BaseQueryConfig, body: Any) -> Any:
+    response = _client(config).post(
+        config.url,
+        content=get_codec().dumps(body),
+        headers=_headers(config),
+        extensions=httpx_extensions(),
+    )
+    response.raise_for_status()
+    record_payload(len(response.content))
+    with phase("decode"):
+        return get_codec().loads(response.content)
+
+
+async def _apost(config: BaseQueryConfig, body: Any) -> Any:
+    response = await _async_client(config).post(
+        config.url,
+        content=get_codec().dumps(body),
+        headers=_headers(config),
+        extensions=httpx_extensions(is_async=True),
+    )
+    response.raise_for_status()
+    record_payload(len(response.content))
+    with phase("decode"):
+        return get_codec().loads(response.content)
+
+
+def base_query_fn(config: BaseQueryConfig, req: Operation) -> Any:
+    payload = _post(config, _body(config, req, full=False))
+    if _needs_document(config, payload):
+        payload = _post(config, _body(config, req, full=True))
+    return _data(payload)
+
+
+async def _arun_single(config: BaseQueryConfig, req: Operation) -> Any:
+    payload = await _apost(config, _body(config, req, full=False))
+    if _needs_document(config, payload):
+        payload = await _apost(config, _body(config, req, full=True))
+    return payload
+
+
+async def _arun_batch(config: BaseQueryConfig, operations: list[Operation]) -> list[Any]:
+    """Run operations as one array request, resending missed documents once."""
+    payloads = await _apost(config, [_body(config, op, full=False) for op in operations])
+    missed = [i for i, payload in enumerate(payloads) if _needs_document(config, payload)]
+    if missed:
+        retried = await _apost(
+            config, [_body(config, operations[i], full=True) for i in missed]
+        )
+        for i, payload in zip(missed, retried):
+            payloads[i] = payload
+    return payloads
+
+
+@dataclass(eq=False)
+class _AsyncBatcher:
+    """Coalesces async operations issued within one batch window."""
+
+    pending: list[tuple[Operation, asyncio.Future]] = field(default_factory=list)
+    scheduled: bool = False
+    # The event loop only keeps weak references to tasks, so running flushes
+    # are held here until they finish.
+    flushes: set[asyncio.Task] = field(default_factory=set)
+
+    def run(self, config: BaseQueryConfig, operation: Operation) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((operation, future))
+        if not self.scheduled:
+            self.scheduled = True
+            flush = loop.create_task(self._flush(config))
+            self.flushes.add(flush)
+            flush.add_done_callback(self.flushes.discard)
+        return future
+
+    async def _flush(self, config: BaseQueryConfig) -> None:
+        # Yielding once lets every operation issued in this iteration join.
+        await asyncio.sleep(config.batch_window)
+        self.scheduled = False
+        pending, self.pending = self.pending, []
+        await asyncio.gather(
+            *(
+                self._send(config, pending[i : i + config.max_batch])
+                for i in range(0, len(pending), config.max_batch)
+            )
+        )
+
+    async def _send(
+        self, config: BaseQueryConfig, batch: list[tuple[Operation, asyncio.Future]]
+    ) -> None:
+        try:
+            if len(batch) == 1:
+                payloads = [await _arun_single(config, batch[0][0])]
+            else:
+                payloads = await _arun_batch(config, [op for op, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, future), payload in zip(batch, payloads):
+            if future.done():
+                continue
+            try:
+                future.set_result(_data(payload))
+            except GraphQLError as error:
+                future.set_exception(error)
+
+
+async def abase_query_fn(config: BaseQueryConfig, req: Operation) -> Any:
+    if config.batch:
+        batcher = config._batchers.get(asyncio.get_running_loop())
+        if batcher is None:
+            batcher = config._batchers[asyncio.get_running_loop()] = _AsyncBatcher()
+        return await batcher.run(config, req)
+    return _data(await _arun_single(config, req))
+
+
+def _objects(value: Any) -> Iterator[dict[str, Any]]:
+    if isinstance(value, dict):
+        yield value
+        for item in value.values():
+            yield from _objects(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _objects(item)
+
+
+def typename_tags(data: Any) -> list[Tag]:
+    """Tag every object of a response selecting both `__typename` and `id`."""
+    return [
+        Tag(type=obj["__typename"], id=str(obj["id"]))
+        for obj in _objects(data)
+        if "__typename" in obj and obj.get("id") is not None
+    ]
+
+
+class GraphQLApi(Api[Operation, BaseQueryConfig, Any]):
+    """An api for GraphQL services.
+
+    Request functions return an `Operation`. Responses are cached per
+    operation and variables, and provide a `Tag(__typename, id)` for every
+    object they contain that selects `__typename` and `id`, so mutations
+    invalidating such a tag evict a cached operation that returned the
+    object. The tag index keeps one operation per tag, the one cached last:
+    when several cached operations return the same object, only that one is
+    evicted, and the others need tags of their own to be invalidated.
+
+    Example:
+        ```python
+        api = GraphQLApi.from_defaults(
+            base_query_config=BaseQueryConfig(url="https://api.example.com/graphql"),
+            cache=InMemoryCache(),
+        )
+
+        @api.query("getRepository", response_type=RepositoryData)
+        def get_repository(owner: str, name: str):
+            return Operation(query=REPOSITORY_QUERY, variables={"owner": owner, "name": name})
+        ```
+    """
+
+    @classmethod
+    def from_defaults(
+        cls,
+        base_query_config: BaseQueryConfig,
+        cache: Optional[Cache[Operation, Any]] = None,
+    ):
+        return cls(
+            base_query_config=base_query_config,
+            base_query_fn_handler=base_query_fn,
+            base_query_fn_handler_async=abase_query_fn,
+            cache=cache,
+        )
+
+    def query(
+        self,
+        name: str,
+        response_type: Type[ResponseType],
+        entity: Optional[Entity] = None,
+        response_tags: Optional[Callable[[Any], Iterable[str | Tag]]] = typename_tags,
+    ):
+        """Decorator to register a query operation; see `Api.query`.
+
+        Tags are extracted from `__typename`/`id` unless another
+        `response_tags` is given.
+        """
+        return super().query(name, response_type, entity, response_tags)
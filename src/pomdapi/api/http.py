@@ -1,10 +1,38 @@
+import asyncio
+import inspect
+import json
+import queue
+import re
+import threading
 import httpx
 import urllib.parse
+import weakref
 
-from dataclasses import dataclass, field
-from typing import Callable, Optional, Any, Literal
+from dataclasses import dataclass, field, replace
+from functools import partial, wraps
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterator,
+    Optional,
+    Any,
+    Literal,
+    ParamSpec,
+    Protocol,
+    Type,
+    TypeVar,
+)
+from pydantic import TypeAdapter
+from pomdapi.api.upstreams import UpstreamPool
 from pomdapi.core.api import Api
 from pomdapi.core.caching import Cache
+from pomdapi.core.codec import get_codec
+from pomdapi.core.fanout import sync_client
+from pomdapi.core.metrics import record_payload
+from pomdapi.core.tracing import httpx_extensions, phase
+from pomdapi.core.types import EndpointDefinition
 
 
 @dataclass
@@ -40,7 +68,8 @@ class BaseQueryConfig:
 
     Attributes:
         base_url: The base URL for all API requests. If provided, this will be
-                 prepended to all request paths.
+                 prepended to all request paths. An `UpstreamPool` spreads
+                 requests over several replicas instead.
         prepare_headers: A callable that takes and returns a headers dictionary.
                        Use this to add authentication, content-type, or other
                        headers to all requests.
@@ -56,49 +85,495 @@ class BaseQueryConfig:
         )
         ```
     """
-    base_url: str 
+    base_url: str | UpstreamPool
     prepare_headers: Callable[[dict[str, str]], dict[str, str]] = field(
         default_factory=lambda: lambda header: header
     )
 
 
 
-def base_query_fn(config: BaseQueryConfig, req: RequestDefinition) -> Any:
-    # Prepare the final URL. If it's relative, prepend base_url.
-    url = urllib.parse.urljoin(base=config.base_url, url=req.path)
+T = TypeVar("T")
+
+# Methods safe to send again to another node after a failure.
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def _on_upstream(config: BaseQueryConfig, req: RequestDefinition, fn: Callable[[str], T]) -> T:
+    """Run `fn(base_url)`, on a node of the pool if `base_url` is an `UpstreamPool`."""
+    if isinstance(config.base_url, UpstreamPool):
+        return config.base_url.call(
+            fn, idempotent=req.method.upper() in _IDEMPOTENT_METHODS
+        )
+    return fn(config.base_url)
+
+
+async def _aon_upstream(
+    config: BaseQueryConfig, req: RequestDefinition, fn: Callable[[str], Awaitable[T]]
+) -> T:
+    """Async counterpart of `_on_upstream`."""
+    if isinstance(config.base_url, UpstreamPool):
+        return await config.base_url.acall(
+            fn, idempotent=req.method.upper() in _IDEMPOTENT_METHODS
+        )
+    return await fn(config.base_url)
 
+
+def _build_request(
+    client: httpx.Client | httpx.AsyncClient,
+    config: BaseQueryConfig,
+    req: RequestDefinition,
+    base_url: str,
+) -> httpx.Request:
+    url = urllib.parse.urljoin(base=base_url, url=req.path)
     prepared_headers = (
         config.prepare_headers(req.headers) if config.prepare_headers else req.headers
     )
-
-    response = httpx.request(
+    extensions = httpx_extensions(inspect.iscoroutinefunction(client.send))
+    if req.body is None:
+        return client.build_request(
+            method=req.method, url=url, headers=prepared_headers, extensions=extensions
+        )
+    return client.build_request(
         method=req.method,
         url=url,
-        json=req.body,
-        headers=prepared_headers,
+        content=get_codec().dumps(req.body),
+        headers={"Content-Type": "application/json", **prepared_headers},
+        extensions=extensions,
+    )
+
+
+def _send(
+    client: httpx.Client,
+    config: BaseQueryConfig,
+    req: RequestDefinition,
+    base_url: str,
+    stream: bool = False,
+) -> httpx.Response:
+    """Send a request to `base_url`, raising for error statuses."""
+    response = client.send(_build_request(client, config, req, base_url), stream=stream)
+    if response.is_error:
+        response.close()
+    response.raise_for_status()
+    return response
+
+
+async def _asend(
+    client: httpx.AsyncClient,
+    config: BaseQueryConfig,
+    req: RequestDefinition,
+    base_url: str,
+    stream: bool = False,
+) -> httpx.Response:
+    """Async counterpart of `_send`."""
+    response = await client.send(
+        _build_request(client, config, req, base_url), stream=stream
     )
+    if response.is_error:
+        await response.aclose()
     response.raise_for_status()
-    return response.json()
+    return response
+
+
+def base_query_fn(config: BaseQueryConfig, req: RequestDefinition) -> Any:
+    return _on_upstream(config, req, partial(_request, config, req))
+
+
+def _request(config: BaseQueryConfig, req: RequestDefinition, base_url: str) -> Any:
+    with sync_client() as client:
+        response = _send(client, config, req, base_url)
+
+    record_payload(len(response.content))
+    with phase("decode"):
+        return get_codec().loads(response.content)
 
 
 async def abase_query_fn(config: BaseQueryConfig, req: RequestDefinition) -> Any:
-    url = urllib.parse.urljoin(base=config.base_url, url=req.path)
+    return await _aon_upstream(config, req, partial(_arequest, config, req))
+
+
+# Async clients are pooled per event loop, so consecutive requests on one
+# loop (such as an Api's background loop) reuse open connections.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient()
+    return client
+
+
+async def _arequest(config: BaseQueryConfig, req: RequestDefinition, base_url: str) -> Any:
+    response = await _asend(_async_client(), config, req, base_url)
+    record_payload(len(response.content))
+    with phase("decode"):
+        return get_codec().loads(response.content)
+
+
+def _dig(body: Any, path: Optional[str]) -> Any:
+    """Follow a dotted path such as `"data.items"` into a JSON body."""
+    if path is None:
+        return body
+    for part in path.split("."):
+        if not isinstance(body, dict):
+            return None
+        body = body.get(part)
+    return body
+
+
+class Pagination(Protocol):
+    """How a paginated endpoint splits its responses into items and pages."""
+
+    def items(self, body: Any) -> list[Any]:
+        """Return the items of one page."""
+        ...
+
+    def next_request(
+        self, request: RequestDefinition, response: httpx.Response, body: Any
+    ) -> Optional[RequestDefinition]:
+        """Return the request for the following page, or None on the last page."""
+        ...
+
+
+@dataclass
+class LinkPagination:
+    """Follows `Link: <...>; rel="next"` response headers, as GitHub does.
+
+    Attributes:
+        items_path: Dotted path to the item list in the body; None if the
+            body is the list itself.
+    """
+
+    items_path: Optional[str] = None
+
+    def items(self, body: Any) -> list[Any]:
+        return _dig(body, self.items_path) or []
+
+    def next_request(
+        self, request: RequestDefinition, response: httpx.Response, body: Any
+    ) -> Optional[RequestDefinition]:
+        url = response.links.get("next", {}).get("url")
+        if not url:
+            return None
+        return replace(request, path=str(response.url.join(url)))
+
+
+@dataclass
+class CursorPagination:
+    """Passes a cursor taken from each page as a query parameter of the next.
+
+    Attributes:
+        items_path: Dotted path to the item list in the body.
+        cursor_path: Dotted path to the next cursor in the body; pagination
+            stops when it is missing or empty.
+        cursor_param: Query parameter the cursor is sent as.
+    """
+
+    items_path: Optional[str] = "items"
+    cursor_path: str = "next_cursor"
+    cursor_param: str = "cursor"
+
+    def items(self, body: Any) -> list[Any]:
+        return _dig(body, self.items_path) or []
+
+    def next_request(
+        self, request: RequestDefinition, response: httpx.Response, body: Any
+    ) -> Optional[RequestDefinition]:
+        cursor = _dig(body, self.cursor_path)
+        if not cursor:
+            return None
+        parts = urllib.parse.urlsplit(request.path)
+        query = [
+            (key, value)
+            for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+            if key != self.cursor_param
+        ]
+        query.append((self.cursor_param, str(cursor)))
+        path = parts._replace(query=urllib.parse.urlencode(query)).geturl()
+        return replace(request, path=path)
+
+
+Item = TypeVar("Item")
+RequestParam = ParamSpec("RequestParam")
+
+# Marks the end of the pages handed from a producer to its consumer.
+_LAST_PAGE: list[Any] = []
 
-    prepared_headers = (
-        config.prepare_headers(req.headers) if config.prepare_headers else req.headers
-    )
 
-    async with httpx.AsyncClient() as client:
-        request = client.build_request(
-            method=req.method,
-            url=url,
-            json=req.body,
-            headers=prepared_headers,
+@dataclass
+class PaginatedQuery(Generic[Item]):
+    """Iterates over the validated items of every page of a paginated query.
+
+    Pages are fetched over one connection by a producer running ahead of the
+    consumer: while the current page is processed, up to `read_ahead` further
+    pages are fetched and buffered, and no more. Each page depends on its
+    predecessor (its `Link` header or cursor), so pages are fetched in order.
+    Iterate with `for` from synchronous code (the producer runs in a thread)
+    or `async for` on an event loop (the producer runs as a task). Leaving
+    the loop early stops the producer. Pages are not cached.
+
+    Example:
+        ```python
+        async for issue in get_all_issues(owner="octocat", repo="hello-world"):
+            print(issue.title)
+        ```
+    """
+
+    config: BaseQueryConfig
+    request: RequestDefinition
+    pagination: Pagination
+    adapter: TypeAdapter
+    read_ahead: int = 2
+
+    def __iter__(self) -> Iterator[Item]:
+        pages: queue.Queue[tuple[list[Any], Optional[BaseException]]] = queue.Queue(
+            maxsize=self.read_ahead
         )
-        response = await client.send(request)
+        stopped = threading.Event()
+
+        def put(page: tuple[list[Any], Optional[BaseException]]) -> bool:
+            while not stopped.is_set():
+                try:
+                    pages.put(page, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            try:
+                with httpx.Client() as client:
+                    request: Optional[RequestDefinition] = self.request
+                    while request is not None and not stopped.is_set():
+                        response = _on_upstream(
+                            self.config, request, partial(_send, client, self.config, request)
+                        )
+                        body = get_codec().loads(response.content)
+                        if not put((self.pagination.items(body), None)):
+                            return
+                        request = self.pagination.next_request(request, response, body)
+                put((_LAST_PAGE, None))
+            except Exception as error:
+                put(([], error))
+
+        threading.Thread(target=produce, name="pomdapi-pages", daemon=True).start()
+        try:
+            while True:
+                items, error = pages.get()
+                if error is not None:
+                    raise error
+                if items is _LAST_PAGE:
+                    return
+                for item in items:
+                    yield self.adapter.validate_python(item)
+        finally:
+            stopped.set()
+
+    async def _aiter(self) -> AsyncIterator[Item]:
+        pages: asyncio.Queue[tuple[list[Any], Optional[BaseException]]] = asyncio.Queue(
+            maxsize=self.read_ahead
+        )
+
+        async def produce() -> None:
+            try:
+                async with httpx.AsyncClient() as client:
+                    request: Optional[RequestDefinition] = self.request
+                    while request is not None:
+                        response = await _aon_upstream(
+                            self.config, request, partial(_asend, client, self.config, request)
+                        )
+                        body = get_codec().loads(response.content)
+                        await pages.put((self.pagination.items(body), None))
+                        request = self.pagination.next_request(request, response, body)
+                await pages.put((_LAST_PAGE, None))
+            except Exception as error:
+                await pages.put(([], error))
+
+        producer = asyncio.get_running_loop().create_task(produce())
+        try:
+            while True:
+                items, error = await pages.get()
+                if error is not None:
+                    raise error
+                if items is _LAST_PAGE:
+                    return
+                for item in items:
+                    yield self.adapter.validate_python(item)
+        finally:
+            producer.cancel()
+
+    def __aiter__(self) -> AsyncIterator[Item]:
+        return self._aiter()
+
+
+# Characters ending a bare scalar (number or literal) element.
+_SCALAR_END = re.compile(r"[\s,\]]")
+# Characters changing the scan state inside a string, and outside one.
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'["\[\]{}]')
+
+
+class _JSONArrayDecoder:
+    """Incrementally decodes the elements of a top-level JSON array.
+
+    Text is fed in chunks of any size; each call returns the elements that
+    were completed by it. The scan state of the current element (nesting
+    depth, whether inside a string) is kept between calls, so every
+    character is scanned once and every element decoded once, however it is
+    chunked. Only the current element is buffered, so memory use is bounded
+    by the largest element rather than by the whole body.
+    """
+
+    _whitespace = " \t\n\r"
+
+    def __init__(self) -> None:
+        self._decoder = json.JSONDecoder()
+        self._started = False
+        self._finished = False
+        # Text of the element being scanned, if any.
+        self._parts: Optional[list[str]] = None
+        self._scalar = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str, final: bool = False) -> list[Any]:
+        pos, items = 0, []
+        while pos < len(text) and not self._finished:
+            if self._parts is not None:
+                end = self._scan(text, pos)
+                if end is None:
+                    self._parts.append(text[pos:])
+                    break
+                self._parts.append(text[pos:end])
+                items.append(self._complete())
+                pos = end
+                continue
+            char = text[pos]
+            if char in self._whitespace or (self._started and char == ","):
+                pos += 1
+            elif not self._started:
+                if char != "[":
+                    raise ValueError("Streamed JSON body is not an array.")
+                self._started = True
+                pos += 1
+            elif char == "]":
+                self._finished = True
+            else:
+                self._parts = []
+                self._scalar = char not in '[{"'
+        if final and not self._finished:
+            raise ValueError("Streamed JSON array ended unexpectedly.")
+        return items
+
+    def _scan(self, text: str, pos: int) -> Optional[int]:
+        """Return the end of the current element in `text`, or None if it goes on."""
+        if self._scalar:
+            match = _SCALAR_END.search(text, pos)
+            return match.start() if match else None
+        while True:
+            if self._escaped:
+                if pos == len(text):
+                    return None
+                self._escaped = False
+                pos += 1
+            pattern = _STRING_SPECIAL if self._in_string else _STRUCTURAL
+            match = pattern.search(text, pos)
+            if match is None:
+                return None
+            pos, char = match.end(), match.group()
+            if char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = not self._in_string
+            elif char in "[{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+            if self._depth == 0 and not self._in_string:
+                return pos
+
+    def _complete(self) -> Any:
+        text = "".join(self._parts or ())
+        self._parts = None
+        self._depth = 0
+        return self._decoder.decode(text)
 
-    response.raise_for_status()
-    return response.json()
+
+@dataclass
+class StreamingQuery(Generic[Item]):
+    """Iterates over the validated elements of a streamed response body.
+
+    The body is read with httpx's streaming API and decoded as it arrives,
+    either as newline-delimited JSON (`"ndjson"`) or as the elements of a
+    top-level JSON array (`"json-array"`). Nothing is read ahead of the
+    consumer, so a slow consumer applies backpressure to the connection and
+    memory stays flat however large the body is.
+
+    Example:
+        ```python
+        async for row in export_rows(table="events"):
+            process(row)
+        ```
+    """
+
+    config: BaseQueryConfig
+    request: RequestDefinition
+    adapter: TypeAdapter
+    format: Literal["ndjson", "json-array"] = "ndjson"
+
+    def _decode_lines(self, lines: Iterator[str]) -> Iterator[Item]:
+        for line in lines:
+            if line.strip():
+                yield self.adapter.validate_json(line)
+
+    def __iter__(self) -> Iterator[Item]:
+        with httpx.Client() as client:
+            response = _on_upstream(
+                self.config,
+                self.request,
+                partial(_send, client, self.config, self.request, stream=True),
+            )
+            try:
+                if self.format == "ndjson":
+                    yield from self._decode_lines(response.iter_lines())
+                    return
+                decoder = _JSONArrayDecoder()
+                for chunk in response.iter_text():
+                    for item in decoder.feed(chunk):
+                        yield self.adapter.validate_python(item)
+                for item in decoder.feed("", final=True):
+                    yield self.adapter.validate_python(item)
+            finally:
+                response.close()
+
+    async def _aiter(self) -> AsyncIterator[Item]:
+        async with httpx.AsyncClient() as client:
+            response = await _aon_upstream(
+                self.config,
+                self.request,
+                partial(_asend, client, self.config, self.request, stream=True),
+            )
+            try:
+                if self.format == "ndjson":
+                    async for line in response.aiter_lines():
+                        if line.strip():
+                            yield self.adapter.validate_json(line)
+                    return
+                decoder = _JSONArrayDecoder()
+                async for chunk in response.aiter_text():
+                    for item in decoder.feed(chunk):
+                        yield self.adapter.validate_python(item)
+                for item in decoder.feed("", final=True):
+                    yield self.adapter.validate_python(item)
+            finally:
+                await response.aclose()
+
+    def __aiter__(self) -> AsyncIterator[Item]:
+        return self._aiter()
 
 
 class HttpApi(Api[RequestDefinition, BaseQueryConfig, Any]):
@@ -114,3 +589,111 @@ class HttpApi(Api[RequestDefinition, BaseQueryConfig, Any]):
             base_query_fn_handler_async=abase_query_fn,
             cache=cache,
         )
+
+    def paginated_query(
+        self,
+        name: str,
+        item_type: Type[Item],
+        pagination: Optional[Pagination] = None,
+        read_ahead: int = 2,
+    ) -> Callable[
+        [Callable[RequestParam, RequestDefinition]],
+        Callable[RequestParam, PaginatedQuery[Item]],
+    ]:
+        """Decorator to register a paginated query endpoint.
+
+        The decorated function returns the request for the first page; calling
+        the endpoint returns a `PaginatedQuery` iterating over the items of
+        all pages. Pages are followed through `Link: rel="next"` headers
+        unless another `pagination` (such as `CursorPagination`) is given.
+
+        Example:
+            ```python
+            @api.paginated_query("getAllIssues", item_type=Issue)
+            def get_all_issues(owner: str, repo: str):
+                return RequestDefinition(method="GET", path=f"/repos/{owner}/{repo}/issues?per_page=100")
+
+            for issue in get_all_issues(owner="octocat", repo="hello-world"):
+                ...
+            ```
+        """
+        if read_ahead < 1:
+            raise ValueError("read_ahead must be at least 1.")
+        strategy = pagination or LinkPagination()
+        adapter = TypeAdapter(item_type)
+
+        def decorator(
+            fn: Callable[RequestParam, RequestDefinition],
+        ) -> Callable[RequestParam, PaginatedQuery[Item]]:
+            self.endpoints[name] = EndpointDefinition(
+                request_fn=fn,
+                is_query_endpoint=True,
+                response_type=list[item_type],  # type: ignore[valid-type]
+                streamed=True,
+            )
+
+            @wraps(fn)
+            def wrapper(*args: RequestParam.args, **kwargs: RequestParam.kwargs) -> PaginatedQuery[Item]:
+                return PaginatedQuery(
+                    config=self.base_query_config,
+                    request=fn(*args, **kwargs),
+                    pagination=strategy,
+                    adapter=adapter,
+                    read_ahead=read_ahead,
+                )
+
+            return wrapper
+
+        return decorator
+
+    def streaming_query(
+        self,
+        name: str,
+        item_type: Type[Item],
+        format: Literal["ndjson", "json-array"] = "ndjson",
+    ) -> Callable[
+        [Callable[RequestParam, RequestDefinition]],
+        Callable[RequestParam, StreamingQuery[Item]],
+    ]:
+        """Decorator to register a streaming query endpoint.
+
+        Calling the endpoint returns a `StreamingQuery` yielding each element
+        of the response body as soon as it has been received and validated.
+        Streamed responses are not cached.
+
+        Example:
+            ```python
+            @api.streaming_query("exportEvents", item_type=Event, format="ndjson")
+            def export_events(since: str):
+                return RequestDefinition(method="GET", path=f"/events/export?since={since}")
+
+            async for event in export_events(since="2024-01-01"):
+                ...
+            ```
+        """
+        if format not in ("ndjson", "json-array"):
+            raise ValueError(f"Unsupported streaming format {format!r}.")
+        adapter = TypeAdapter(item_type)
+
+        def decorator(
+            fn: Callable[RequestParam, RequestDefinition],
+        ) -> Callable[RequestParam, StreamingQuery[Item]]:
+            self.endpoints[name] = EndpointDefinition(
+                request_fn=fn,
+                is_query_endpoint=True,
+                response_type=list[item_type],  # type: ignore[valid-type]
+                streamed=True,
+            )
+
+            @wraps(fn)
+            def wrapper(*args: RequestParam.args, **kwargs: RequestParam.kwargs) -> StreamingQuery[Item]:
+                return StreamingQuery(
+                    config=self.base_query_config,
+                    request=fn(*args, **kwargs),
+                    adapter=adapter,
+                    format=format,
+                )
+
+            return wrapper
+
+        return decorator
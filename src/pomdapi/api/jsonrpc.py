@@ -1,29 +1,41 @@
+import asyncio
+import itertools
+import random
+import weakref
 import httpx
-from typing import TypeAlias, Any, Optional
+from dataclasses import dataclass, field
+from typing import Annotated, AsyncIterator, Callable, TypeAlias, Any, Optional
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, HttpUrl, PlainValidator
 
+from pomdapi.api.upstreams import UpstreamPool
 from pomdapi.core.api import Api
 from pomdapi.core.caching import Cache
+from pomdapi.core.codec import get_codec
+from pomdapi.core.fanout import sync_client
+from pomdapi.core.metrics import record_payload
+from pomdapi.core.tracing import httpx_extensions, phase
 
 
 RequestDefinition: TypeAlias = dict[str, Any] | list[Any]
 
 
-class BaseQueryConfig(BaseModel):
-    """Defines the base configuration for all JSON RPC API requests."""
+def _validate_base_url(value: Any) -> str | UpstreamPool:
+    if not isinstance(value, (str, UpstreamPool)):
+        raise ValueError("base_url must be a URL or an UpstreamPool.")
+    return value
 
-    base_url: str
 
+class BaseQueryConfig(BaseModel):
+    """Defines the base configuration for all JSON RPC API requests.
 
-JSONRPCId: TypeAlias = Optional[str | int]
+    `base_url` is either one endpoint or an `UpstreamPool` of replicas.
+    """
 
+    base_url: Annotated[str | UpstreamPool, PlainValidator(_validate_base_url)]
 
-class JSONRPCRequest(BaseModel):
-    jsonrpc: str
-    method: str
-    params: Any
-    id: JSONRPCId
+
+JSONRPCId: TypeAlias = Optional[str | int]
 
 
 class JSONRPCError(BaseModel):
@@ -32,56 +44,400 @@ class JSONRPCError(BaseModel):
     data: Optional[Any] = None
 
 
-class JSONRPCResponse(BaseModel):
-    jsonrpc: str
-    result: Optional[Any] = None
-    error: Optional[JSONRPCError] = None
-    id: JSONRPCId
+class JSONRPCResponseError(Exception):
+    """Raised when a JSON-RPC server answers a request with an error."""
+
+    def __init__(self, error: JSONRPCError):
+        super().__init__(f"{error.code}: {error.message}")
+        self.error = error
+
+
+_HEADERS = {"Content-Type": "application/json"}
+_ids = itertools.count(1)
+
+
+def encode_request(method: str, params: Any, request_id: JSONRPCId) -> bytes:
+    """Encode a JSON-RPC request envelope with the default codec."""
+    return get_codec().dumps(
+        {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+    )
+
+
+def decode_result(content: bytes | str) -> Any:
+    """Decode a JSON-RPC response envelope, raising `JSONRPCResponseError` on errors."""
+    payload = get_codec().loads(content)
+    error = payload.get("error")
+    if error is not None:
+        raise JSONRPCResponseError(JSONRPCError(**error))
+    return payload.get("result")
 
 
 def base_query_fn(
     config: BaseQueryConfig, req: RequestDefinition, endpoint_name: str
 ) -> Any:
-    req_url = config.base_url
+    if isinstance(config.base_url, UpstreamPool):
+        # Any JSON-RPC method may have side effects: only resend unsent requests.
+        return config.base_url.call(
+            lambda req_url: _request(req_url, req, endpoint_name), idempotent=False
+        )
+    return _request(config.base_url, req, endpoint_name)
+
+
+def _request(req_url: str, req: RequestDefinition, endpoint_name: str) -> Any:
     assert req_url is not None
-    json_payload = JSONRPCRequest(
-        jsonrpc="2.0",
-        id=1,
-        method=endpoint_name,
-        params=req,
-    ).model_dump()
-    # import pdb; pdb.set_trace()
-    response = httpx.request(
-        method="POST",
-        url=str(req_url),
-        json=json_payload,
-    )
+    with sync_client() as client:
+        response = client.post(
+            str(req_url),
+            content=encode_request(endpoint_name, req, next(_ids)),
+            headers=_HEADERS,
+            extensions=httpx_extensions(),
+        )
     response.raise_for_status()
-    jsonrpc_response = JSONRPCResponse(**response.json())
-    return jsonrpc_response.result
+    record_payload(len(response.content))
+    with phase("decode"):
+        return decode_result(response.content)
 
 
 async def abase_query_fn(
     config: BaseQueryConfig, req: RequestDefinition, endpoint_name: str
 ):
-    req_url = config.base_url
-    assert req_url is not None
-    async with httpx.AsyncClient() as client:
-        request = client.build_request(
-            method="POST",
-            url=str(req_url),
-            json=JSONRPCRequest(
-                jsonrpc="2.0",
-                id=1,
-                method=endpoint_name,
-                params=req,
-            ).model_dump(),
+    if isinstance(config.base_url, UpstreamPool):
+        return await config.base_url.acall(
+            lambda req_url: _arequest(req_url, req, endpoint_name), idempotent=False
         )
-        response = await client.send(request)
+    return await _arequest(config.base_url, req, endpoint_name)
+
+
+# Async clients are pooled per event loop, so consecutive requests on one
+# loop (such as an Api's background loop) reuse open connections.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient()
+    return client
+
+
+async def _arequest(req_url: str, req: RequestDefinition, endpoint_name: str) -> Any:
+    assert req_url is not None
+    client = _async_client()
+    request = client.build_request(
+        method="POST",
+        url=str(req_url),
+        content=encode_request(endpoint_name, req, next(_ids)),
+        headers=_HEADERS,
+        extensions=httpx_extensions(is_async=True),
+    )
+    response = await client.send(request)
 
     response.raise_for_status()
-    jsonrpc_response = JSONRPCResponse(**response.json())
-    return jsonrpc_response.result
+    record_payload(len(response.content))
+    with phase("decode"):
+        return decode_result(response.content)
+
+
+@dataclass(eq=False)
+class WebSocketSubscription:
+    """A server-push subscription (such as `eth_subscribe`) on a `WebSocketTransport`.
+
+    Iterate with `async for` to receive each notification's `result`. The
+    subscription is renewed transparently when the connection is
+    re-established; notifications sent while disconnected are lost.
+    """
+
+    transport: "WebSocketTransport"
+    method: str
+    params: Any
+    unsubscribe_method: str
+    maxsize: int = 1024
+    server_id: Any = None
+    _queue: asyncio.Queue = field(init=False)
+    _closed: bool = False
+
+    def __post_init__(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+
+    def _deliver(self, result: Any) -> None:
+        # Drop the oldest notification rather than blocking the reader.
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(result)
+
+    async def unsubscribe(self) -> None:
+        """Cancel the subscription on the server and end iteration."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put_nowait(_CLOSED)
+        await self.transport._unsubscribe(self)
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._closed and self._queue.empty():
+            raise StopAsyncIteration
+        result = await self._queue.get()
+        if result is _CLOSED:
+            raise StopAsyncIteration
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def __aenter__(self) -> "WebSocketSubscription":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.unsubscribe()
+
+
+# Queued to end the iteration of an unsubscribed subscription.
+_CLOSED = object()
+
+
+@dataclass(eq=False)
+class WebSocketTransport:
+    """One long-lived JSON-RPC WebSocket connection, shared by concurrent requests.
+
+    Every request gets a unique id, so any number of them can be in flight
+    on the connection at once; a reader task matches responses to waiting
+    requests by id and routes subscription notifications. When the
+    connection drops, in-flight requests fail with `ConnectionError`, and
+    the transport reconnects with exponential backoff (immediately if there
+    are live subscriptions, otherwise on the next request), renewing all
+    subscriptions. A request gives up with `ConnectionError` after
+    `max_connect_attempts` failed attempts; reconnecting in the background
+    to restore subscriptions keeps trying until the transport is closed.
+
+    Requires the optional `websockets` package.
+
+    Attributes:
+        url: The `ws://` or `wss://` endpoint.
+        reconnect_delay: Initial delay between reconnection attempts in seconds.
+        max_reconnect_delay: Upper bound for the backoff delay.
+        max_connect_attempts: Connection attempts made for a request before it fails.
+    """
+
+    url: str
+    reconnect_delay: float = 0.1
+    max_reconnect_delay: float = 30.0
+    max_connect_attempts: int = 5
+    _connection: Any = None
+    _ids: Any = field(default_factory=lambda: itertools.count(1))
+    _pending: dict[int, asyncio.Future] = field(default_factory=dict)
+    _subscriptions: dict[Any, WebSocketSubscription] = field(default_factory=dict)
+    # Subscriptions whose subscribe request is in flight, by request id.
+    _subscribing: dict[int, WebSocketSubscription] = field(default_factory=dict)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    _reader: Optional[asyncio.Task] = None
+    _reconnecting: Optional[asyncio.Task] = None
+    _closed: bool = False
+
+    @classmethod
+    def for_url(cls, url: str) -> "WebSocketTransport":
+        """Return the transport for `url` on the running event loop, creating it if needed."""
+        loop = asyncio.get_running_loop()
+        transports = _transports.setdefault(loop, {})
+        transport = transports.get(url)
+        if transport is None or transport._closed:
+            transport = transports[url] = cls(url)
+        return transport
+
+    async def _connect(self, max_attempts: Optional[int] = None) -> Any:
+        """Connect unless connected, retrying up to `max_attempts` times (forever if None)."""
+        try:
+            from websockets.asyncio.client import connect
+        except ImportError:
+            raise ImportError(
+                "The WebSocket transport requires the 'websockets' package."
+            )
+        delay = self.reconnect_delay
+        attempts = 0
+        while True:
+            # The lock is released while backing off, so a request does not
+            # wait behind an endless background reconnect.
+            async with self._lock:
+                if self._connection is not None:
+                    return self._connection
+                if self._closed:
+                    raise ConnectionError("WebSocket transport is closed.")
+                try:
+                    connection = await connect(self.url)
+                except (OSError, asyncio.TimeoutError) as e:
+                    attempts += 1
+                    if max_attempts is not None and attempts >= max_attempts:
+                        raise ConnectionError(
+                            f"Could not connect to {self.url} after {attempts} attempts."
+                        ) from e
+                else:
+                    self._connection = connection
+                    self._reader = asyncio.get_running_loop().create_task(self._read(connection))
+                    subscriptions = list(self._subscriptions.values())
+                    self._subscriptions.clear()
+                    break
+            await asyncio.sleep(delay * (1 + random.random()))
+            delay = min(delay * 2, self.max_reconnect_delay)
+        for subscription in subscriptions:
+            await self._subscribe(subscription)
+        return connection
+
+    async def _read(self, connection: Any) -> None:
+        try:
+            async for message in connection:
+                payload = get_codec().loads(message)
+                for item in payload if isinstance(payload, list) else [payload]:
+                    self._dispatch(item)
+        except Exception:
+            # Closed or broken connections are handled alike: reconnect.
+            pass
+        finally:
+            await self._disconnected(connection)
+
+    def _dispatch(self, message: dict[str, Any]) -> None:
+        if "id" in message and message["id"] is not None:
+            future = self._pending.pop(message["id"], None)
+            subscription = self._subscribing.pop(message["id"], None)
+            if future is None or future.done():
+                return
+            if message.get("error") is not None:
+                future.set_exception(JSONRPCResponseError(JSONRPCError(**message["error"])))
+                return
+            if subscription is not None:
+                # Register before the first notification can be dispatched.
+                subscription.server_id = message.get("result")
+                self._subscriptions[subscription.server_id] = subscription
+            future.set_result(message.get("result"))
+            return
+        params = message.get("params")
+        if isinstance(params, dict) and "subscription" in params:
+            subscription = self._subscriptions.get(params["subscription"])
+            if subscription is not None:
+                subscription._deliver(params.get("result"))
+
+    async def _disconnected(self, connection: Any) -> None:
+        if self._connection is not connection:
+            return
+        self._connection = None
+        pending, self._pending = self._pending, {}
+        self._subscribing.clear()
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Connection to {self.url} lost."))
+        if self._subscriptions and not self._closed:
+            if self._reconnecting is None or self._reconnecting.done():
+                self._reconnecting = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        try:
+            await self._connect()
+        except (ConnectionError, JSONRPCResponseError):
+            pass
+
+    async def request(self, method: str, params: Any) -> Any:
+        """Send a request and wait for its result."""
+        return await self._request(method, params)
+
+    async def _request(
+        self,
+        method: str,
+        params: Any,
+        subscription: Optional[WebSocketSubscription] = None,
+    ) -> Any:
+        connection = self._connection or await self._connect(self.max_connect_attempts)
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        if subscription is not None:
+            self._subscribing[request_id] = subscription
+        try:
+            # JSON-RPC servers expect text frames.
+            await connection.send(encode_request(method, params, request_id).decode())
+            return await future
+        finally:
+            self._pending.pop(request_id, None)
+            self._subscribing.pop(request_id, None)
+
+    async def subscribe(
+        self,
+        params: Any,
+        method: str = "eth_subscribe",
+        unsubscribe_method: str = "eth_unsubscribe",
+    ) -> WebSocketSubscription:
+        """Open a server-push subscription and return it as an async iterator.
+
+        Example:
+            ```python
+            async with await transport.subscribe(["newHeads"]) as heads:
+                async for head in heads:
+                    print(head["number"])
+            ```
+        """
+        subscription = WebSocketSubscription(self, method, params, unsubscribe_method)
+        await self._subscribe(subscription)
+        return subscription
+
+    async def _subscribe(self, subscription: WebSocketSubscription) -> None:
+        if not subscription._closed:
+            await self._request(subscription.method, subscription.params, subscription)
+
+    async def _unsubscribe(self, subscription: WebSocketSubscription) -> None:
+        if self._subscriptions.get(subscription.server_id) is not subscription:
+            return
+        del self._subscriptions[subscription.server_id]
+        if self._connection is not None:
+            try:
+                await self.request(subscription.unsubscribe_method, [subscription.server_id])
+            except (ConnectionError, JSONRPCResponseError):
+                pass
+
+    async def close(self) -> None:
+        """Close the connection and end all subscriptions."""
+        self._closed = True
+        for subscription in list(self._subscriptions.values()):
+            subscription._closed = True
+            subscription._queue.put_nowait(_CLOSED)
+        self._subscriptions.clear()
+        connection = self._connection
+        if connection is not None:
+            await connection.close()
+            await self._disconnected(connection)
+        if self._reconnecting is not None:
+            self._reconnecting.cancel()
+            await asyncio.gather(self._reconnecting, return_exceptions=True)
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+# One transport per event loop and URL; connections cannot cross loops.
+_transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, WebSocketTransport]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _ws_url(config: BaseQueryConfig) -> str:
+    if isinstance(config.base_url, UpstreamPool):
+        raise TypeError("The WebSocket transport does not support upstream pools.")
+    return config.base_url
+
+
+def ws_base_query_fn(
+    config: BaseQueryConfig, req: RequestDefinition, endpoint_name: str
+) -> Any:
+    raise RuntimeError(
+        "The WebSocket transport is async only; call endpoints with is_async=True."
+    )
+
+
+async def ws_abase_query_fn(
+    config: BaseQueryConfig, req: RequestDefinition, endpoint_name: str
+) -> Any:
+    transport = WebSocketTransport.for_url(_ws_url(config))
+    return await transport.request(endpoint_name, req)
 
 
 class JSONRPCApi(Api[RequestDefinition, BaseQueryConfig, Any]):
@@ -97,3 +453,49 @@ class JSONRPCApi(Api[RequestDefinition, BaseQueryConfig, Any]):
             base_query_fn_handler_async=abase_query_fn,
             cache=cache,
         )
+
+    @classmethod
+    def from_websocket(
+        cls,
+        base_query_config: BaseQueryConfig,
+        cache: Optional[Cache[RequestDefinition, Any]] = None,
+    ):
+        """Create an api speaking JSON-RPC over a persistent WebSocket.
+
+        `base_query_config.base_url` must be a `ws://` or `wss://` URL. All
+        requests on an event loop share one connection per URL.
+        """
+        return cls(
+            base_query_config=base_query_config,
+            base_query_fn_handler=ws_base_query_fn,
+            base_query_fn_handler_async=ws_abase_query_fn,
+            cache=cache,
+        )
+
+    async def server_subscribe(
+        self,
+        params: Any,
+        method: str = "eth_subscribe",
+        unsubscribe_method: str = "eth_unsubscribe",
+        seed: Optional[Callable[[Any], tuple[str | Callable[..., object], dict[str, Any]]]] = None,
+    ) -> AsyncIterator[Any]:
+        """Yield the notifications of a server-push subscription.
+
+        With `seed`, every notification is also written to the cache: `seed`
+        maps it to the endpoint and arguments whose cached response it is.
+
+        Example:
+            ```python
+            async for head in api.server_subscribe(
+                ["newHeads"], seed=lambda head: (get_block, {"number": head["number"]})
+            ):
+                ...
+            ```
+        """
+        transport = WebSocketTransport.for_url(_ws_url(self.base_query_config))
+        async with await transport.subscribe(params, method, unsubscribe_method) as notifications:
+            async for result in notifications:
+                if seed is not None and self.cache is not None:
+                    endpoint, kwargs = seed(result)
+                    self.seed(endpoint, kwargs, result)
+                yield result
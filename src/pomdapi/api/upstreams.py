@@ -0,0 +1,299 @@
+import asyncio
+import itertools
+import random
+import threading
+import time
+import httpx
+
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, Protocol, Sequence, TypeVar
+
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class Upstream:
+    """One node of an `UpstreamPool` and its live statistics.
+
+    Attributes:
+        url: Base URL of the node.
+        in_flight: Requests currently running against the node.
+        latency: Exponentially weighted moving average of request latency
+            in seconds; None until the first request completes.
+        failures: Consecutive failed requests.
+        ejected_until: Monotonic time until which the node is ejected.
+    """
+
+    url: str
+    in_flight: int = 0
+    latency: Optional[float] = None
+    failures: int = 0
+    ejected_until: float = 0.0
+
+    @property
+    def score(self) -> float:
+        """Expected wait for one more request: latency times queue depth."""
+        return (self.latency or 0.0) * (self.in_flight + 1)
+
+
+class SelectionStrategy(Protocol):
+    """Picks the node for the next request among the healthy ones."""
+
+    def choose(self, upstreams: Sequence[Upstream]) -> Upstream:
+        ...
+
+
+@dataclass
+class RoundRobin:
+    """Cycles through the nodes in order."""
+
+    _counter: itertools.count = field(default_factory=itertools.count, repr=False)
+
+    def choose(self, upstreams: Sequence[Upstream]) -> Upstream:
+        return upstreams[next(self._counter) % len(upstreams)]
+
+
+@dataclass
+class LeastInFlight:
+    """Picks the node with the fewest running requests."""
+
+    def choose(self, upstreams: Sequence[Upstream]) -> Upstream:
+        return min(upstreams, key=lambda upstream: upstream.in_flight)
+
+
+@dataclass
+class LeastLatency:
+    """Picks the node with the lowest EWMA latency weighted by its in-flight requests.
+
+    Nodes without measurements yet score 0, so every node gets tried.
+    """
+
+    def choose(self, upstreams: Sequence[Upstream]) -> Upstream:
+        return min(upstreams, key=lambda upstream: upstream.score)
+
+
+@dataclass
+class PowerOfTwoChoices:
+    """Picks the better of two random nodes by EWMA latency and load.
+
+    Nearly as good as `LeastLatency` at steering away from slow nodes, but
+    without sending every client to the same momentarily fastest node.
+    """
+
+    def choose(self, upstreams: Sequence[Upstream]) -> Upstream:
+        if len(upstreams) == 1:
+            return upstreams[0]
+        first, second = random.sample(upstreams, 2)
+        return first if first.score <= second.score else second
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Count transport errors and 5xx responses against a node, not 4xx."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    return isinstance(error, (httpx.TransportError, OSError, TimeoutError))
+
+
+def is_unsent(error: BaseException) -> bool:
+    """Whether a request failed before any of it reached the node."""
+    return isinstance(
+        error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+    )
+
+
+@dataclass(eq=False)
+class UpstreamPool:
+    """Spreads requests over several replicas of one service.
+
+    Pass it as the `base_url` of an `HttpApi` or `JSONRPCApi` config. A node
+    failing `max_failures` requests in a row is ejected for `eject_for`
+    seconds (doubling on each repeated ejection, up to `max_eject_for`),
+    then re-admitted on probation: one more failure ejects it again. A
+    failed request is retried on another node up to `failover` times; one
+    that is not idempotent only when it could not be sent at all, so it
+    never runs twice. With a `health_check`, `check_health()` (or
+    `acheck_health()`) probes every node and ejects or re-admits it
+    accordingly; the pool does not schedule probes itself, so call it
+    periodically, e.g. from a background thread or task. When every node is
+    ejected, all of them are used rather than failing outright.
+
+    Attributes:
+        urls: Base URLs of the replicas.
+        strategy: How the next node is chosen.
+        max_failures: Consecutive failures before a node is ejected.
+        eject_for: Seconds a node stays ejected the first time.
+        max_eject_for: Upper bound for repeated ejections.
+        failover: How many other nodes a failed request is retried on.
+        decay: Weight of the newest sample in the latency average.
+        health_check: Returns whether the node at a URL is healthy; used by
+            `check_health()`.
+
+    Example:
+        ```python
+        pool = UpstreamPool(
+            ["https://node-1.example.com", "https://node-2.example.com"],
+            strategy=PowerOfTwoChoices(),
+        )
+        api = JSONRPCApi.from_defaults(base_query_config=BaseQueryConfig(base_url=pool))
+        ```
+    """
+
+    urls: Sequence[str]
+    strategy: SelectionStrategy = field(default_factory=RoundRobin)
+    max_failures: int = 3
+    eject_for: float = 5.0
+    max_eject_for: float = 300.0
+    failover: int = 1
+    decay: float = 0.3
+    health_check: Optional[Callable[[str], bool]] = None
+    is_failure: Callable[[BaseException], bool] = is_upstream_failure
+    upstreams: list[Upstream] = field(init=False)
+    _ejections: dict[str, int] = field(init=False, default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.urls:
+            raise ValueError("An upstream pool needs at least one URL.")
+        self.upstreams = [Upstream(url) for url in self.urls]
+
+    def __str__(self) -> str:
+        return ",".join(self.urls)
+
+    def healthy(self) -> list[Upstream]:
+        """Return the nodes that are not ejected."""
+        now = time.monotonic()
+        return [upstream for upstream in self.upstreams if upstream.ejected_until <= now]
+
+    def choose(self, exclude: Sequence[Upstream] = ()) -> Upstream:
+        """Pick a node for the next request without reserving it."""
+        candidates = [u for u in self.healthy() if u not in exclude]
+        if not candidates:
+            candidates = [u for u in self.upstreams if u not in exclude] or self.upstreams
+        return self.strategy.choose(candidates)
+
+    def _start(self, exclude: Sequence[Upstream]) -> Upstream:
+        with self._lock:
+            upstream = self.choose(exclude)
+            upstream.in_flight += 1
+            return upstream
+
+    def _finish(
+        self, upstream: Upstream, started: float, error: Optional[BaseException]
+    ) -> bool:
+        """Record a request's outcome; return whether it counts as a failure.
+
+        An interrupted request (cancellation, `KeyboardInterrupt`) says nothing
+        about the node, so only its in-flight slot is released.
+        """
+        elapsed = time.monotonic() - started
+        failed = error is not None and self.is_failure(error)
+        with self._lock:
+            upstream.in_flight -= 1
+            if error is not None and not isinstance(error, Exception):
+                return False
+            if failed:
+                upstream.failures += 1
+                if upstream.failures >= self.max_failures:
+                    self._eject(upstream)
+            else:
+                upstream.failures = 0
+                self._ejections.pop(upstream.url, None)
+                upstream.latency = (
+                    elapsed
+                    if upstream.latency is None
+                    else self.decay * elapsed + (1 - self.decay) * upstream.latency
+                )
+        return failed
+
+    def _eject(self, upstream: Upstream) -> None:
+        count = self._ejections.get(upstream.url, 0)
+        self._ejections[upstream.url] = count + 1
+        duration = min(self.eject_for * 2**count, self.max_eject_for)
+        upstream.ejected_until = time.monotonic() + duration
+        # On probation after re-admission: the next failure ejects again.
+        upstream.failures = self.max_failures - 1
+
+    def _readmit(self, upstream: Upstream) -> None:
+        upstream.ejected_until = 0.0
+        upstream.failures = 0
+        self._ejections.pop(upstream.url, None)
+
+    def _fails_over(
+        self, error: BaseException, failed: bool, idempotent: bool, tried: int
+    ) -> bool:
+        if not failed or tried > self.failover or tried >= len(self.upstreams):
+            return False
+        return idempotent or is_unsent(error)
+
+    def call(self, fn: Callable[[str], T], idempotent: bool = True) -> T:
+        """Run `fn(base_url)` on a chosen node, failing over on node failures.
+
+        Unless `idempotent`, only failures to send the request fail over.
+        """
+        tried: list[Upstream] = []
+        while True:
+            upstream = self._start(tried)
+            started = time.monotonic()
+            try:
+                result = fn(upstream.url)
+            except BaseException as error:
+                failed = self._finish(upstream, started, error)
+                tried.append(upstream)
+                if not self._fails_over(error, failed, idempotent, len(tried)):
+                    raise
+                continue
+            self._finish(upstream, started, None)
+            return result
+
+    async def acall(
+        self, fn: Callable[[str], Awaitable[T]], idempotent: bool = True
+    ) -> T:
+        """Async counterpart of `call`."""
+        tried: list[Upstream] = []
+        while True:
+            upstream = self._start(tried)
+            started = time.monotonic()
+            try:
+                result = await fn(upstream.url)
+            except BaseException as error:
+                failed = self._finish(upstream, started, error)
+                tried.append(upstream)
+                if not self._fails_over(error, failed, idempotent, len(tried)):
+                    raise
+                continue
+            self._finish(upstream, started, None)
+            return result
+
+    def _apply_health(self, upstream: Upstream, healthy: bool) -> None:
+        with self._lock:
+            if healthy:
+                self._readmit(upstream)
+            elif upstream.ejected_until <= time.monotonic():
+                self._eject(upstream)
+
+    def check_health(self) -> None:
+        """Probe every node with `health_check`, ejecting or re-admitting it."""
+        if self.health_check is None:
+            return
+        for upstream in self.upstreams:
+            try:
+                healthy = self.health_check(upstream.url)
+            except Exception:
+                healthy = False
+            self._apply_health(upstream, healthy)
+
+    async def acheck_health(self) -> None:
+        """Like `check_health`, probing all nodes concurrently in threads."""
+        if self.health_check is None:
+            return
+        check = self.health_check
+
+        async def probe(upstream: Upstream) -> None:
+            try:
+                healthy = await asyncio.to_thread(check, upstream.url)
+            except Exception:
+                healthy = False
+            self._apply_health(upstream, healthy)
+
+        await asyncio.gather(*(probe(upstream) for upstream in self.upstreams))
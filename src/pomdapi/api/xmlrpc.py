@@ -0,0 +1,318 @@
+import asyncio
+import threading
+import weakref
+import xmlrpc.client
+import httpx
+from dataclasses import dataclass, field
+from typing import TypeAlias, Any, Optional
+
+from pydantic import BaseModel
+
+from pomdapi.core.api import Api
+from pomdapi.core.caching import Cache
+from pomdapi.core.metrics import record_payload
+
+
+RequestDefinition: TypeAlias = list[Any]
+
+
+class BaseQueryConfig(BaseModel):
+    """Defines the base configuration for all XML-RPC API requests.
+
+    Attributes:
+        base_url: The XML-RPC endpoint.
+        multicall: Coalesce concurrent calls into one `system.multicall`
+            request. The server must support the multicall extension.
+        multicall_window: Seconds to wait for further calls before sending a
+            batch. With 0, async calls issued in the same event loop
+            iteration are batched, and sync calls are not delayed.
+        max_batch: Maximum number of calls per `system.multicall` request.
+
+    Example:
+        ```python
+        config = BaseQueryConfig(base_url="https://example.com/RPC2", multicall=True)
+        ```
+    """
+
+    base_url: str
+    multicall: bool = False
+    multicall_window: float = 0.0
+    max_batch: int = 100
+
+
+_HEADERS = {"Content-Type": "text/xml; charset=utf-8"}
+
+
+def dumps(method: str, params: RequestDefinition) -> bytes:
+    """Marshal a method call."""
+    return xmlrpc.client.dumps(
+        tuple(params), method, encoding="utf-8", allow_none=True
+    ).encode("utf-8")
+
+
+def loads(content: bytes) -> Any:
+    """Unmarshal a method response, raising `xmlrpc.client.Fault` on faults.
+
+    The body is fed to the expat parser as raw bytes, without decoding it
+    to a string first.
+    """
+    parser, unmarshaller = xmlrpc.client.getparser(use_builtin_types=True)
+    parser.feed(content)
+    parser.close()
+    return unmarshaller.close()[0]
+
+
+def _multicall_body(calls: list[tuple[str, RequestDefinition]]) -> bytes:
+    return dumps(
+        "system.multicall",
+        [[{"methodName": method, "params": list(params)} for method, params in calls]],
+    )
+
+
+def _multicall_results(content: bytes) -> list[Any]:
+    """Split a `system.multicall` response into results and `Fault`s."""
+    results = []
+    for item in loads(content):
+        if isinstance(item, dict):
+            results.append(xmlrpc.client.Fault(item["faultCode"], item["faultString"]))
+        else:
+            results.append(item[0])
+    return results
+
+
+# Clients are pooled per endpoint (and per event loop for async clients),
+# so consecutive calls reuse open connections.
+_clients: dict[str, httpx.Client] = {}
+_clients_lock = threading.Lock()
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client(config: BaseQueryConfig) -> httpx.Client:
+    with _clients_lock:
+        client = _clients.get(config.base_url)
+        if client is None:
+            client = _clients[config.base_url] = httpx.Client(headers=_HEADERS)
+        return client
+
+
+def _async_client(config: BaseQueryConfig) -> httpx.AsyncClient:
+    clients = _async_clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(config.base_url)
+    if client is None:
+        client = clients[config.base_url] = httpx.AsyncClient(headers=_HEADERS)
+    return client
+
+
+def _post(config: BaseQueryConfig, body: bytes) -> bytes:
+    response = _client(config).post(config.base_url, content=body)
+    response.raise_for_status()
+    record_payload(len(response.content))
+    return response.content
+
+
+async def _apost(config: BaseQueryConfig, body: bytes) -> bytes:
+    response = await _async_client(config).post(config.base_url, content=body)
+    response.raise_for_status()
+    record_payload(len(response.content))
+    return response.content
+
+
+@dataclass(eq=False)
+class _Call:
+    method: str
+    params: RequestDefinition
+    result: Any = None
+    error: Optional[BaseException] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+@dataclass(eq=False)
+class _Batcher:
+    """Coalesces concurrent sync calls to one endpoint.
+
+    The first caller to find no batch in progress becomes the leader: it
+    waits `multicall_window`, then sends every call queued meanwhile as one
+    request and hands each caller its result. If the leader is interrupted,
+    the calls it has not answered fail and the next caller leads.
+    """
+
+    pending: list[_Call] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    leading: bool = False
+
+    def call(self, config: BaseQueryConfig, method: str, params: RequestDefinition) -> Any:
+        call = _Call(method, params)
+        with self.lock:
+            self.pending.append(call)
+            lead = not self.leading
+            self.leading = True
+        if lead:
+            batch: list[_Call] = []
+            try:
+                if config.multicall_window:
+                    call.done.wait(config.multicall_window)
+                while True:
+                    with self.lock:
+                        batch = self.pending[: config.max_batch]
+                        del self.pending[: config.max_batch]
+                        if not batch:
+                            self.leading = False
+                            break
+                    _send_batch(config, batch)
+            except BaseException as error:
+                self._abandon(batch, error)
+                raise
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _abandon(self, batch: list[_Call], error: BaseException) -> None:
+        """Fail the calls left unanswered by an interrupted leader."""
+        with self.lock:
+            unanswered = [c for c in batch if not c.done.is_set()] + self.pending
+            self.pending = []
+            self.leading = False
+        for call in unanswered:
+            call.error = RuntimeError("The multicall batch was interrupted.")
+            call.error.__cause__ = error
+            call.done.set()
+
+
+def _send_batch(config: BaseQueryConfig, batch: list[_Call]) -> None:
+    try:
+        if len(batch) == 1:
+            body = dumps(batch[0].method, batch[0].params)
+            results: list[Any] = [loads(_post(config, body))]
+        else:
+            calls = [(call.method, call.params) for call in batch]
+            results = _multicall_results(_post(config, _multicall_body(calls)))
+    except Exception as error:
+        results = [error] * len(batch)
+    for call, result in zip(batch, results):
+        if isinstance(result, Exception):
+            call.error = result
+        else:
+            call.result = result
+        call.done.set()
+
+
+@dataclass(eq=False)
+class _AsyncBatcher:
+    """Coalesces async calls issued within one multicall window."""
+
+    pending: list[tuple[str, RequestDefinition, asyncio.Future]] = field(
+        default_factory=list
+    )
+    scheduled: bool = False
+    # The event loop only keeps weak references to tasks, so running flushes
+    # are held here until they finish.
+    flushes: set[asyncio.Task] = field(default_factory=set)
+
+    def call(
+        self, config: BaseQueryConfig, method: str, params: RequestDefinition
+    ) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((method, params, future))
+        if not self.scheduled:
+            self.scheduled = True
+            flush = loop.create_task(self._flush(config))
+            self.flushes.add(flush)
+            flush.add_done_callback(self.flushes.discard)
+        return future
+
+    async def _flush(self, config: BaseQueryConfig) -> None:
+        # Yielding once lets every call issued in this iteration join the batch.
+        await asyncio.sleep(config.multicall_window)
+        self.scheduled = False
+        pending, self.pending = self.pending, []
+        await asyncio.gather(
+            *(
+                self._send(config, pending[i : i + config.max_batch])
+                for i in range(0, len(pending), config.max_batch)
+            )
+        )
+
+    async def _send(
+        self,
+        config: BaseQueryConfig,
+        batch: list[tuple[str, RequestDefinition, asyncio.Future]],
+    ) -> None:
+        try:
+            if len(batch) == 1:
+                method, params, _ = batch[0]
+                results: list[Any] = [loads(await _apost(config, dumps(method, params)))]
+            else:
+                calls = [(method, params) for method, params, _ in batch]
+                results = _multicall_results(
+                    await _apost(config, _multicall_body(calls))
+                )
+        except Exception as error:
+            results = [error] * len(batch)
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+_batchers: dict[str, _Batcher] = {}
+_async_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, _AsyncBatcher]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def base_query_fn(
+    config: BaseQueryConfig, req: RequestDefinition, endpoint_name: str
+) -> Any:
+    if config.multicall:
+        with _clients_lock:
+            batcher = _batchers.setdefault(config.base_url, _Batcher())
+        return batcher.call(config, endpoint_name, req)
+    return loads(_post(config, dumps(endpoint_name, req)))
+
+
+async def abase_query_fn(
+    config: BaseQueryConfig, req: RequestDefinition, endpoint_name: str
+) -> Any:
+    if config.multicall:
+        batchers = _async_batchers.setdefault(asyncio.get_running_loop(), {})
+        batcher = batchers.setdefault(config.base_url, _AsyncBatcher())
+        return await batcher.call(config, endpoint_name, req)
+    return loads(await _apost(config, dumps(endpoint_name, req)))
+
+
+class XMLRPCApi(Api[RequestDefinition, BaseQueryConfig, Any]):
+    """An api whose endpoint names are XML-RPC method names.
+
+    Request functions return the list of call parameters.
+
+    Example:
+        ```python
+        api = XMLRPCApi.from_defaults(
+            base_query_config=BaseQueryConfig(base_url="https://example.com/RPC2", multicall=True)
+        )
+
+        @api.query("pow", response_type=int)
+        def power(base: int, exponent: int):
+            return [base, exponent]
+        ```
+    """
+
+    @classmethod
+    def from_defaults(
+        cls,
+        base_query_config: BaseQueryConfig,
+        cache: Optional[Cache[RequestDefinition, Any]] = None,
+    ):
+        return cls(
+            base_query_config=base_query_config,
+            base_query_fn_handler=base_query_fn,
+            base_query_fn_handler_async=abase_query_fn,
+            cache=cache,
+        )
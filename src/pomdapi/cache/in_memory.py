@@ -1,11 +1,15 @@
+import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Generic, Optional
+from typing import Any, Generic, Iterable, Iterator, Optional
 from pomdapi.core.types import (
+    Tag,
     TResponse,
 )
 from pomdapi.core.api import EndpointDefinitionGen
 from pomdapi.core.caching import Cache
+from pomdapi.core.metrics import CacheMetrics
 
 @dataclass
 class CachedItem(Generic[TResponse]):
@@ -16,15 +20,14 @@ class CachedItem(Generic[TResponse]):
 
 class InMemoryBackend:
     """In memory cache backend."""
+    metrics: Optional[CacheMetrics] = None
+
     def __init__(self):
         self._store: dict[str, CachedItem[dict[str, Any] | str]] = {}
 
     def delete(self, key: str) -> None:
-        """"Delete a key from the cache."""
-        try:
-            del self._store[key]
-        except KeyError:
-            print("key not found")
+        """"Delete a key from the cache, if present."""
+        self._store.pop(key, None)
 
     async def adelete(self, key: str) -> None:
         """"Delete a key from the cache."""
@@ -44,6 +47,8 @@ class InMemoryBackend:
         req = cached_item.value
         if timestamp + ttl < time.time():
             self.delete(key)
+            if self.metrics is not None:
+                self.metrics.stale += 1
             return None
         return req
 
@@ -60,7 +65,188 @@ class InMemoryBackend:
         """"Set a key in the cache."""
         self.set(key, value, ttl)
 
+    def items(self) -> Iterator[tuple[str, Any, Optional[float]]]:
+        """Yield `(key, value, remaining ttl)` for every live entry."""
+        now = time.time()
+        for key, cached_item in list(self._store.items()):
+            if cached_item.ttl is None:
+                yield key, cached_item.value, None
+            elif (remaining := cached_item.timestamp + cached_item.ttl - now) >= 0:
+                yield key, cached_item.value, remaining
+
 
 class InMemoryCache(Cache[EndpointDefinitionGen, TResponse]):
-    def __init__(self):
-        super().__init__(_backend=InMemoryBackend())
+    def __init__(self, keep_unused_for: Optional[int] = None):
+        super().__init__(_backend=InMemoryBackend(), keep_unused_for=keep_unused_for)
+
+
+class StripedInMemoryBackend:
+    """Thread-safe in memory cache backend.
+
+    Keys are spread over `stripes` shards by hash, each guarded by its own
+    lock, so threads touching different keys rarely contend. `locking()`
+    holds the stripes of several keys at once for multi-key updates such as
+    tag invalidation.
+    """
+    metrics: Optional[CacheMetrics] = None
+
+    def __init__(self, stripes: int = 64):
+        self._shards: list[dict[str, CachedItem[Any]]] = [{} for _ in range(stripes)]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _stripe(self, key: str) -> int:
+        return hash(key) % len(self._shards)
+
+    @contextmanager
+    def locking(self, *keys: str) -> Iterator[None]:
+        """Hold the locks of all stripes used by `keys`.
+
+        Stripes are always acquired in index order, so concurrent callers
+        cannot deadlock. Inside the block, use the `*_locked` methods.
+        """
+        stripes = sorted({self._stripe(key) for key in keys})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    def get_locked(self, key: str) -> Optional[Any]:
+        """Get a key. The caller must hold its stripe."""
+        shard = self._shards[self._stripe(key)]
+        cached_item = shard.get(key)
+        if cached_item is None:
+            return None
+        if cached_item.ttl is not None and cached_item.timestamp + cached_item.ttl < time.time():
+            del shard[key]
+            if self.metrics is not None:
+                self.metrics.stale += 1
+            return None
+        return cached_item.value
+
+    def set_locked(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key. The caller must hold its stripe."""
+        self._shards[self._stripe(key)][key] = CachedItem(value, ttl, int(time.time()))
+
+    def delete_locked(self, key: str) -> None:
+        """Delete a key. The caller must hold its stripe."""
+        self._shards[self._stripe(key)].pop(key, None)
+
+    def delete(self, key: str) -> None:
+        """Delete a key from the cache."""
+        with self.locking(key):
+            self.delete_locked(key)
+
+    async def adelete(self, key: str) -> None:
+        """Delete a key from the cache."""
+        self.delete(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a key from the cache."""
+        with self.locking(key):
+            return self.get_locked(key)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get a key from the cache."""
+        return self.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key in the cache."""
+        with self.locking(key):
+            self.set_locked(key, value, ttl)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key in the cache."""
+        self.set(key, value, ttl)
+
+    def items(self) -> Iterator[tuple[str, Any, Optional[float]]]:
+        """Yield `(key, value, remaining ttl)` for every live entry."""
+        now = time.time()
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                entries = list(shard.items())
+            for key, cached_item in entries:
+                if cached_item.ttl is None:
+                    yield key, cached_item.value, None
+                elif (remaining := cached_item.timestamp + cached_item.ttl - now) >= 0:
+                    yield key, cached_item.value, remaining
+
+
+class ConcurrentInMemoryCache(Cache[EndpointDefinitionGen, TResponse]):
+    """In memory cache safe to share between threads.
+
+    Storing a response with its tag index entries, and invalidating tags,
+    each happen atomically with respect to other threads.
+    """
+    _backend: StripedInMemoryBackend
+
+    def __init__(self, stripes: int = 64, keep_unused_for: Optional[int] = None):
+        super().__init__(
+            _backend=StripedInMemoryBackend(stripes=stripes),
+            keep_unused_for=keep_unused_for,
+        )
+
+    def set(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        tags: Iterable[str | Tag],
+        response: TResponse,
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Set a response and its tag index entries in one atomic step."""
+        request_key = self.key_from_req(endpoint_name, request)
+        tag_keys = [self.key_from_tag(tag) for tag in tags]
+        ttl = self._entry_ttl(request_key, ttl)
+        with self._backend.locking(request_key, *tag_keys):
+            self._backend.set_locked(request_key, response, ttl=ttl)
+            for key in tag_keys:
+                self._backend.set_locked(key, request_key, ttl=ttl)
+
+    async def aset(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        tags: Iterable[str | Tag],
+        response: TResponse,
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Set a response and its tag index entries in one atomic step."""
+        self.set(endpoint_name, request, tags, response, ttl)
+
+    def invalidate_tags(self, endpoint_name: str, tags: Iterable[str | Tag]) -> None:
+        """Invalidate a response by tags in one atomic step."""
+        tags = list(tags)
+        tag_keys = [self.key_from_tag(tag) for tag in tags]
+        if not tag_keys:
+            return
+        entity_keys = [
+            self.key_from_entity(tag)
+            for tag in tags
+            if isinstance(tag, Tag) and tag.id is not None
+        ]
+        while True:
+            # The request key must be known to lock its stripe; retry if the
+            # tag was re-pointed between the peek and taking the locks.
+            request_key = self._backend.get(tag_keys[0])
+            keys = [*tag_keys, *entity_keys]
+            if request_key:
+                keys.append(request_key)
+            with self._backend.locking(*keys):
+                if self._backend.get_locked(tag_keys[0]) != request_key:
+                    continue
+                if request_key:
+                    self._backend.delete_locked(request_key)
+                    if self.metrics is not None:
+                        self.metrics.evictions += 1
+                for key in (*tag_keys, *entity_keys):
+                    self._backend.delete_locked(key)
+                return
+
+    async def ainvalidate_tags(
+        self, endpoint_name: str, tags: Iterable[str | Tag]
+    ) -> None:
+        """Invalidate a response by tags in one atomic step."""
+        self.invalidate_tags(endpoint_name, tags)
@@ -1,4 +1,3 @@
-import json
 from dataclasses import dataclass
 from typing import Any, Optional, Generic, Union
 
@@ -6,6 +5,7 @@ from typing import Any, Optional, Generic, Union
 from pomdapi.core.types import TResponse
 from pomdapi.core.api import EndpointDefinitionGen
 from pomdapi.core.caching import Cache
+from pomdapi.cache.serializers import FramedSerializer, Serializer
 
 
 @dataclass
@@ -20,9 +20,18 @@ class MemcachedBackend:
     A Memcached-based cache backend
     """
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 11211):
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 11211,
+        serializer: Optional[Serializer] = None,
+    ):
         self._host = host
         self._port = port
+        self._serializer = serializer or FramedSerializer()
+
+        import aiomcache
+        import memcache
 
         # Synchronous memcache client
         self._sync_client = memcache.Client([f"{host}:{port}"])
@@ -32,29 +41,18 @@ class MemcachedBackend:
 
     def _serialize(self, value: Union[dict[str, Any], str]) -> bytes:
         """
-        Convert a dictionary or string to bytes for storing in Memcached.
+        Convert a value to bytes for storing in Memcached.
         """
-        if isinstance(value, dict):
-            # Store as JSON
-            return json.dumps(value).encode("utf-8")
-        elif isinstance(value, str):
-            return value.encode("utf-8")
-        else:
-            raise TypeError("Value must be a dict or a string.")
+        return self._serializer.dumps(value)
 
     def _deserialize(self, raw_data: Optional[bytes]) -> Optional[Union[dict[str, Any], str]]:
         """
-        Convert raw bytes from Memcached into either a dict or a string.
+        Convert raw bytes from Memcached back into a value.
         Returns None if data is None.
         """
         if raw_data is None:
             return None
-        text = raw_data.decode("utf-8", errors="replace")
-        # Attempt to parse JSON; if it fails, treat as plain string.
-        try:
-#            return json.loads(text)
-        except json.JSONDecodeError:
-            return text
+        return self._serializer.loads(raw_data)
 
     # ----------------------------
     # Synchronous methods
@@ -102,8 +100,17 @@ class MemcachedCache(Cache[EndpointDefinitionGen, TResponse]):
     """
     A Cache class that uses the MemcachedBackend for both sync and async caching.
     """
-    def __init__(self, host: str = "127.0.0.1", port: int = 11211):
-        super().__init__(_backend=MemcachedBackend(host=host, port=port))
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 11211,
+        serializer: Optional[Serializer] = None,
+        keep_unused_for: Optional[int] = None,
+    ):
+        super().__init__(
+            _backend=MemcachedBackend(host=host, port=port, serializer=serializer),
+            keep_unused_for=keep_unused_for,
+        )
 
 
 
@@ -1,19 +1,25 @@
-import json
 from typing import Any, Optional, Union
 
 
 from pomdapi.core.types import TResponse
 from pomdapi.core.api import EndpointDefinitionGen
 from pomdapi.core.caching import Cache
+from pomdapi.cache.serializers import FramedSerializer, Serializer
 
 from redis import Redis
 from redis.asyncio import Redis as AsyncRedis
 
 class RedisBackend:
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 6379):
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        serializer: Optional[Serializer] = None,
+    ):
         self._host = host
         self._port = port
+        self._serializer = serializer or FramedSerializer()
 
         # Synchronous redis client
         self._sync_client = Redis(host=host, port=port)
@@ -23,23 +29,18 @@ class RedisBackend:
 
     def _serialize(self, value: Any) -> bytes:
         """
-        Convert a dictionary or string to bytes for storing in Redis.
+        Convert a value to bytes for storing in Redis.
         """
-        return json.dumps(value).encode("utf-8")
+        return self._serializer.dumps(value)
 
     def _deserialize(self, raw_data: Optional[bytes]) -> Optional[Union[dict[str, Any], str]]:
         """
-        Convert raw bytes from Redis into either a dict or a string.
+        Convert raw bytes from Redis back into a value.
         Returns None if data is None.
         """
         if raw_data is None:
             return None
-        text = raw_data.decode("utf-8", errors="replace")
-        # Attempt to parse JSON; if it fails, treat as plain string.
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            return text
+        return self._serializer.loads(raw_data)
 
     def delete(self, key: str) -> None:
         """Delete a key from the cache (sync)."""
@@ -81,5 +82,16 @@ class RedisCache(Cache[EndpointDefinitionGen, TResponse]):
     """
     A Cache class that uses the RedisBackend for both sync and async caching.
     """
-    def __init__(self, host: str = "127.0.0.1", port: int = 6379, ttl: int = 60):
-        super().__init__(_backend=RedisBackend(host=host, port=port), _ttl=ttl)
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 6379,
+        ttl: int = 60,
+        serializer: Optional[Serializer] = None,
+        keep_unused_for: Optional[int] = None,
+    ):
+        super().__init__(
+            _backend=RedisBackend(host=host, port=port, serializer=serializer),
+            _ttl=ttl,
+            keep_unused_for=keep_unused_for,
+        )
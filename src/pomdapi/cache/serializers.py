@@ -0,0 +1,236 @@
+import json
+import pickle
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Literal, Optional, Protocol, TypeAlias
+
+from pomdapi.core.codec import JSONCodec, get_codec
+
+
+Compression: TypeAlias = Literal["zlib", "zstd", "lz4"]
+
+# Header byte layout: 0b0000_FFCC
+#   FF: serializer format (1 = json, 2 = msgpack, 3 = pickle)
+#   CC: compression (0 = none, 1 = zlib, 2 = zstd, 3 = lz4)
+# Valid headers are in the 0x04-0x0F range. Values written before framing
+# existed are bare JSON text, which starts with a printable character or with
+# whitespace. Three headers are whitespace bytes: 0x09 (msgpack+zlib), 0x0A
+# (msgpack+zstd) and 0x0D (pickle+zlib). Their compressed payloads start with
+# a zlib or zstd magic number, which is never valid JSON, so data starting
+# with one of these bytes is decoded as JSON first when it parses as such.
+FORMAT_JSON = 1
+FORMAT_MSGPACK = 2
+FORMAT_PICKLE = 3
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+COMPRESSION_LZ4 = 3
+
+_WHITESPACE_HEADERS = frozenset(b"\t\n\r")
+
+_COMPRESSION_IDS: dict[Compression, int] = {
+    "zlib": COMPRESSION_ZLIB,
+    "zstd": COMPRESSION_ZSTD,
+    "lz4": COMPRESSION_LZ4,
+}
+
+
+class Serializer(Protocol):
+    """Protocol defining how cache backends turn values into bytes.
+
+    Methods:
+        dumps: Encode a value to bytes
+        loads: Decode bytes produced by `dumps` back to a value
+    """
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value to bytes."""
+        ...
+
+    def loads(self, data: bytes) -> Any:
+        """Decode bytes back to a value."""
+        ...
+
+
+class JsonSerializer:
+    """JSON serializer. Portable, but cannot represent bytes.
+
+    Uses the default codec (see `pomdapi.core.codec.get_codec`) unless
+    another `codec` is given.
+    """
+
+    format_id = FORMAT_JSON
+
+    def __init__(self, codec: Optional[JSONCodec] = None):
+        self.codec = codec or get_codec()
+
+    def dumps(self, value: Any) -> bytes:
+        return self.codec.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return self.codec.loads(data)
+
+
+class MsgpackSerializer:
+    """MessagePack serializer. Requires the `msgpack` package."""
+
+    format_id = FORMAT_MSGPACK
+
+    def __init__(self):
+        import msgpack
+
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    def dumps(self, value: Any) -> bytes:
+        return self._packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._unpackb(data, raw=False)
+
+
+class PickleSerializer:
+    """Pickle serializer.
+
+    Fastest option for Python-only deployments. Never use it with a cache
+    that untrusted parties can write to.
+    """
+
+    format_id = FORMAT_PICKLE
+
+    def __init__(self, protocol: int = 5):
+        self.protocol = protocol
+
+    def dumps(self, value: Any) -> bytes:
+        return pickle.dumps(value, protocol=self.protocol)
+
+    def loads(self, data: bytes) -> Any:
+        return pickle.loads(data)
+
+
+def _compressor(compression: int, level: Optional[int]):
+    if compression == COMPRESSION_ZLIB:
+        return lambda data: zlib.compress(data, 1 if level is None else level)
+    if compression == COMPRESSION_ZSTD:
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3 if level is None else level).compress
+    if compression == COMPRESSION_LZ4:
+        import lz4.frame
+
+        return lambda data: lz4.frame.compress(
+            data, compression_level=0 if level is None else level
+        )
+    raise ValueError(f"Unknown compression id {compression}.")
+
+
+def _decompress(compression: int, data: bytes) -> bytes:
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(data)
+    if compression == COMPRESSION_ZSTD:
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    if compression == COMPRESSION_LZ4:
+        import lz4.frame
+
+        return lz4.frame.decompress(data)
+    raise ValueError(f"Unknown compression id {compression}.")
+
+
+@dataclass
+class FramedSerializer:
+    """Serializer writing a one-byte header in front of every payload.
+
+    The header records the serializer format and the compression used, so
+    payloads compressed differently can still be decoded. Only payloads in
+    the format of `serializer` are decoded; anything else raises
+    `ValueError`. Pickle payloads written by other processes are refused
+    unless `allow_pickle` is set, since unpickling data from a shared
+    store lets anyone who can write to it run code in every reader.
+    Payloads smaller than `threshold` bytes are never compressed.
+
+    Attributes:
+        serializer: The serializer used to encode and decode values.
+        compression: The compression applied to large payloads, if any.
+        threshold: Minimum encoded size in bytes before compression kicks in.
+        level: Optional compression level passed to the compressor.
+        allow_pickle: Also decode pickle payloads when `serializer` is not a
+            pickle serializer, e.g. while migrating away from one. Only
+            enable it if every writer to the store is trusted.
+
+    Example:
+        ```python
+        serializer = FramedSerializer(
+            serializer=MsgpackSerializer(),
+            compression="zstd",
+            threshold=1024,
+        )
+        cache = RedisCache(serializer=serializer)
+        ```
+    """
+
+    serializer: Serializer = field(default_factory=JsonSerializer)
+    compression: Optional[Compression] = "zlib"
+    threshold: int = 4096
+    level: Optional[int] = None
+    allow_pickle: bool = False
+
+    def __post_init__(self):
+        format_id = getattr(self.serializer, "format_id", None)
+        if format_id not in (FORMAT_JSON, FORMAT_MSGPACK, FORMAT_PICKLE):
+            raise ValueError("serializer must define a known `format_id`.")
+        self._format_id: int = format_id
+        self._compression_id = (
+            _COMPRESSION_IDS[self.compression] if self.compression else COMPRESSION_NONE
+        )
+        self._compress = (
+            _compressor(self._compression_id, self.level)
+            if self.compression
+            else None
+        )
+        self._decoders: dict[int, Serializer] = {self._format_id: self.serializer}
+        if self.allow_pickle and self._format_id != FORMAT_PICKLE:
+            self._decoders[FORMAT_PICKLE] = PickleSerializer()
+
+    def _decoder(self, format_id: int) -> Serializer:
+        decoder = self._decoders.get(format_id)
+        if decoder is None:
+            raise ValueError(
+                f"Refusing to decode a payload of serializer format id {format_id}; "
+                f"this serializer is configured for format id {self._format_id}."
+            )
+        return decoder
+
+    def dumps(self, value: Any) -> bytes:
+        payload = self.serializer.dumps(value)
+        compression = COMPRESSION_NONE
+        if self._compress is not None and len(payload) >= self.threshold:
+            payload = self._compress(payload)
+            compression = self._compression_id
+        return bytes(((self._format_id << 2) | compression,)) + payload
+
+    def loads(self, data: bytes) -> Any:
+        header = data[0] if data else 0
+        if not 0x04 <= header <= 0x0F:
+            return _loads_legacy(data)
+        if header in _WHITESPACE_HEADERS:
+            try:
+                return json.loads(data)
+            except ValueError:
+                pass
+        payload = memoryview(data)[1:]
+        compression = header & 0b11
+        if compression != COMPRESSION_NONE:
+            payload = _decompress(compression, payload)
+        return self._decoder(header >> 2).loads(bytes(payload))
+
+
+def _loads_legacy(data: bytes) -> Any:
+    """Decode values written as bare JSON text before framing was introduced."""
+    text = data.decode("utf-8", errors="replace")
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
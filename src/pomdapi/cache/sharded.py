@@ -0,0 +1,229 @@
+import asyncio
+import bisect
+import hashlib
+from typing import Any, Iterable, Mapping, Optional
+
+from pomdapi.core.types import TResponse
+from pomdapi.core.api import EndpointDefinitionGen
+from pomdapi.core.caching import Cache, CacheBackend
+
+
+def _hash(value: str) -> int:
+    """Stable 64-bit hash used to place nodes and keys on the ring."""
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def routing_key(key: str) -> str:
+    """Return the part of a key that decides its placement on the ring.
+
+    Like Redis Cluster hash tags, if the key contains a non-empty `{...}`
+    section only that section is hashed, so keys sharing the same hash tag
+    always land on the same node(s). Only used by rings created with
+    `hash_tags=True`: request keys are reprs that routinely contain braces.
+    """
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1 : end]
+    return key
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes.
+
+    Every node is placed `vnodes` times on a 64-bit ring. A key is owned by the
+    first virtual node clockwise from its hash, so adding or removing one of N
+    nodes only remaps roughly 1/N of the keys.
+
+    Attributes:
+        vnodes: Number of virtual nodes placed on the ring per physical node.
+        hash_tags: Place keys by their `{...}` hash tag (see `routing_key`)
+            instead of the full key.
+    """
+
+    def __init__(
+        self, nodes: Iterable[str] = (), vnodes: int = 160, hash_tags: bool = False
+    ):
+        if vnodes < 1:
+            raise ValueError("vnodes must be at least 1.")
+        self.vnodes = vnodes
+        self.hash_tags = hash_tags
+        self._nodes: set[str] = set()
+        self._hashes: list[int] = []
+        self._owners: list[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> frozenset[str]:
+        return frozenset(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add_node(self, node: str) -> None:
+        """Place a node on the ring."""
+        if node in self._nodes:
+            return
+        self._nodes.add(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect_left(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove_node(self, node: str) -> None:
+        """Remove a node and all of its virtual nodes from the ring."""
+        if node not in self._nodes:
+            return
+        self._nodes.discard(node)
+        kept = [(h, o) for h, o in zip(self._hashes, self._owners) if o != node]
+        self._hashes = [h for h, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def get_nodes(self, key: str, count: int = 1) -> list[str]:
+        """Return up to `count` distinct nodes responsible for a key.
+
+        The first node is the primary owner, the following ones are the
+        replicas found by walking the ring clockwise.
+        """
+        if not self._hashes:
+            raise LookupError("The hash ring has no nodes.")
+        count = min(count, len(self._nodes))
+        placed = routing_key(key) if self.hash_tags else key
+        start = bisect.bisect(self._hashes, _hash(placed))
+        found: list[str] = []
+        for offset in range(len(self._hashes)):
+            owner = self._owners[(start + offset) % len(self._hashes)]
+            if owner not in found:
+                found.append(owner)
+                if len(found) == count:
+                    break
+        return found
+
+    def get_node(self, key: str) -> str:
+        """Return the primary node responsible for a key."""
+        return self.get_nodes(key, 1)[0]
+
+
+class ShardedBackend:
+    """A cache backend spreading keys over several backends.
+
+    Keys are placed with a consistent-hash ring. Writes and deletes go to the
+    primary node and its `replicas - 1` successors; reads are served by the
+    first of those nodes holding the key. Request keys and tag keys are
+    routed independently but deterministically, so a tag always resolves to
+    the node(s) its index entry was written to and invalidation stays correct.
+
+    Attributes:
+        nodes: Mapping of node name to the backend serving it.
+        vnodes: Number of virtual nodes per backend on the ring.
+        replicas: Number of nodes every key is written to.
+        hash_tags: Co-locate keys sharing a `{...}` hash tag. Only enable it
+            for keys built with explicit hash tags; by default the full key
+            is hashed.
+
+    Example:
+        ```python
+        backend = ShardedBackend(
+            {
+                "redis-a": RedisBackend(host="10.0.0.1"),
+                "redis-b": RedisBackend(host="10.0.0.2"),
+                "redis-c": RedisBackend(host="10.0.0.3"),
+            },
+            replicas=2,
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        nodes: Mapping[str, CacheBackend],
+        vnodes: int = 160,
+        replicas: int = 1,
+        hash_tags: bool = False,
+    ):
+        if replicas < 1:
+            raise ValueError("replicas must be at least 1.")
+        self._nodes: dict[str, CacheBackend] = dict(nodes)
+        self._ring = HashRing(self._nodes, vnodes=vnodes, hash_tags=hash_tags)
+        self.replicas = replicas
+
+    @property
+    def ring(self) -> HashRing:
+        return self._ring
+
+    def add_node(self, name: str, backend: CacheBackend) -> None:
+        """Add a backend to the ring. About 1/N of the keys move to it."""
+        self._nodes[name] = backend
+        self._ring.add_node(name)
+
+    def remove_node(self, name: str) -> CacheBackend:
+        """Remove a backend from the ring and return it."""
+        self._ring.remove_node(name)
+        return self._nodes.pop(name)
+
+    def backends_for(self, key: str) -> list[CacheBackend]:
+        """Return the backends a key is stored on, primary first."""
+        return [self._nodes[n] for n in self._ring.get_nodes(key, self.replicas)]
+
+    def delete(self, key: str) -> None:
+        """Delete a key from all of its replicas."""
+        for backend in self.backends_for(key):
+            backend.delete(key)
+
+    async def adelete(self, key: str) -> None:
+        """Delete a key from all of its replicas."""
+        await asyncio.gather(*(b.adelete(key) for b in self.backends_for(key)))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a key from the first replica holding it."""
+        for backend in self.backends_for(key):
+            value = backend.get(key)
+            if value is not None:
+                return value
+        return None
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get a key from the first replica holding it."""
+        for backend in self.backends_for(key):
+            value = await backend.aget(key)
+            if value is not None:
+                return value
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key on all of its replicas."""
+        for backend in self.backends_for(key):
+            backend.set(key, value, ttl=ttl)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key on all of its replicas."""
+        await asyncio.gather(
+            *(b.aset(key, value, ttl=ttl) for b in self.backends_for(key))
+        )
+
+
+class ShardedCache(Cache[EndpointDefinitionGen, TResponse]):
+    """
+    A Cache class spreading entries over several backends with a hash ring.
+    """
+    def __init__(
+        self,
+        nodes: Mapping[str, CacheBackend],
+        vnodes: int = 160,
+        replicas: int = 1,
+        ttl: int = 60,
+        keep_unused_for: Optional[int] = None,
+        hash_tags: bool = False,
+    ):
+        super().__init__(
+            _backend=ShardedBackend(
+                nodes, vnodes=vnodes, replicas=replicas, hash_tags=hash_tags
+            ),
+            _ttl=ttl,
+            keep_unused_for=keep_unused_for,
+        )
@@ -0,0 +1,334 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from pomdapi.core.types import TResponse
+from pomdapi.core.api import EndpointDefinitionGen
+from pomdapi.core.caching import Cache
+from pomdapi.core.metrics import CacheMetrics
+from pomdapi.cache.serializers import FramedSerializer, Serializer
+
+
+_MAGIC = b"PMDSHM01"
+# magic, slots, slot_size, ways, stripes
+_HEADER = struct.Struct("<8sIIII")
+_HEADER_SIZE = 64
+# seq, key_len, value_len, key_hash, expires_at, last_access
+_SLOT = struct.Struct("<IHIQdd")
+_SLOT_HEADER_SIZE = 40
+_SEQ = struct.Struct("<I")
+_LAST_ACCESS = struct.Struct("<d")
+_LAST_ACCESS_OFFSET = _SLOT.size - _LAST_ACCESS.size
+_READ_RETRIES = 16
+# Stripe locks cover bytes [0, stripes) of the file, stripes being at most
+# 2**32 - 1; the initialisation lock lies past all of them.
+_INIT_LOCK_OFFSET = 1 << 32
+
+
+def _default_path(name: str) -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, f"pomdapi-{name}")
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class SharedMemoryBackend:
+    """
+    A cache backend shared by all processes on one host.
+
+    Entries live in a fixed-size hash table inside a memory-mapped file
+    (on `/dev/shm` when available, so it never touches disk). Every worker
+    that opens the same path sees the same entries, so N workers hold one
+    copy of the data instead of N.
+
+    The table is set-associative: a key hashes to a bucket of `ways` slots
+    of `slot_size` bytes each. When a bucket is full, the expired or least
+    recently read slot is evicted. Values that do not fit in a slot are not
+    cached.
+
+    Writers lock one of `stripes` stripes, using a thread lock plus a POSIX
+    byte-range lock on the file. Readers take no lock. Each slot carries a
+    sequence counter (a seqlock), and a reader retries if a writer changed
+    the slot while it was being read.
+
+    A file is used rather than `multiprocessing.shared_memory` because
+    unrelated worker processes can attach to it by path, and no resource
+    tracker unlinks it when the first worker exits. POSIX only.
+
+    Attributes:
+        path: Location of the mapped file.
+        slots: Total number of slots in the table.
+        slot_size: Bytes per slot, including a 40-byte slot header.
+        ways: Number of slots per bucket.
+        stripes: Number of independent writer locks.
+
+    Example:
+        ```python
+        # identical in every gunicorn/uvicorn worker
+        cache = SharedMemoryCache(name="github", slots=65536, slot_size=4096)
+        ```
+    """
+
+    metrics: Optional[CacheMetrics] = None
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        slots: int = 16384,
+        slot_size: int = 4096,
+        ways: int = 8,
+        stripes: int = 64,
+        serializer: Optional[Serializer] = None,
+    ):
+        if slots % ways:
+            raise ValueError("slots must be a multiple of ways.")
+        if stripes < 1:
+            raise ValueError("stripes must be at least 1.")
+        if slot_size <= _SLOT_HEADER_SIZE:
+            raise ValueError(f"slot_size must be larger than {_SLOT_HEADER_SIZE}.")
+        self.path = path or _default_path("cache")
+        self._serializer = serializer or FramedSerializer()
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.slots, self.slot_size, self.ways, self.stripes = self._init_file(
+            slots, slot_size, ways, stripes
+        )
+        self._buckets = self.slots // self.ways
+        self._mm = mmap.mmap(self._fd, _HEADER_SIZE + self.slots * self.slot_size)
+        self._thread_locks = [threading.Lock() for _ in range(self.stripes)]
+
+    def _init_file(
+        self, slots: int, slot_size: int, ways: int, stripes: int
+    ) -> tuple[int, int, int, int]:
+        """Create the table or attach to an existing one.
+
+        The geometry of an existing file wins over the arguments, so workers
+        started with different settings still agree on the layout.
+        """
+        size = _HEADER_SIZE + slots * slot_size
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, _INIT_LOCK_OFFSET)
+        try:
+            header = os.pread(self._fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size:
+                magic, *geometry = _HEADER.unpack(header)
+                if magic != _MAGIC:
+                    raise ValueError(f"{self.path} is not a pomdapi shared cache.")
+                return tuple(geometry)  # type: ignore[return-value]
+            os.ftruncate(self._fd, size)
+            os.pwrite(
+                self._fd, _HEADER.pack(_MAGIC, slots, slot_size, ways, stripes), 0
+            )
+            return slots, slot_size, ways, stripes
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, _INIT_LOCK_OFFSET)
+
+    def close(self) -> None:
+        """Unmap the table. The file and its entries stay in place."""
+        self._mm.close()
+        os.close(self._fd)
+
+    def unlink(self) -> None:
+        """Remove the backing file. Processes still attached keep their mapping."""
+        os.unlink(self.path)
+
+    def _bucket(self, key_hash: int) -> int:
+        return key_hash % self._buckets
+
+    def _slot_offset(self, bucket: int, way: int) -> int:
+        return _HEADER_SIZE + (bucket * self.ways + way) * self.slot_size
+
+    @contextmanager
+    def _stripe(self, bucket: int) -> Iterator[None]:
+        stripe = bucket % self.stripes
+        with self._thread_locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+
+    def _read_slot(
+        self, offset: int, key_hash: int, key: bytes, locked: bool = False
+    ) -> tuple[bool, Optional[bytes], float]:
+        """Read a slot, without locking unless `locked` says the stripe is held.
+
+        Returns whether the slot holds `key`, its value bytes and its expiry.
+        """
+        mm = self._mm
+        for _ in range(1 if locked else _READ_RETRIES):
+            seq, key_len, value_len, slot_hash, expires_at, _ = _SLOT.unpack_from(
+                mm, offset
+            )
+            # An odd sequence under the lock means a writer died mid-write.
+            if seq & 1 and not locked:
+                continue
+            if key_len == 0 or slot_hash != key_hash:
+                matched, value = False, None
+            else:
+                start = offset + _SLOT_HEADER_SIZE
+                matched = mm[start : start + key_len] == key
+                value = (
+                    mm[start + key_len : start + key_len + value_len]
+                    if matched
+                    else None
+                )
+            if locked or _SEQ.unpack_from(mm, offset)[0] == seq:
+                return matched, value, expires_at
+        # A writer keeps changing this slot; read it under the stripe lock.
+        with self._stripe(self._bucket(key_hash)):
+            return self._read_slot(offset, key_hash, key, locked=True)
+
+    def _begin_write(self, offset: int) -> int:
+        """Make a slot's sequence odd and return it. Readers retry until it is even again."""
+        seq = _SEQ.unpack_from(self._mm, offset)[0] | 1
+        _SEQ.pack_into(self._mm, offset, seq)
+        return seq
+
+    def _write_slot(
+        self,
+        offset: int,
+        key_hash: int,
+        key: bytes,
+        value: bytes,
+        expires_at: float,
+    ) -> None:
+        """Write a slot. The caller must hold the stripe lock."""
+        mm = self._mm
+        seq = self._begin_write(offset)
+        start = offset + _SLOT_HEADER_SIZE
+        mm[start : start + len(key)] = key
+        mm[start + len(key) : start + len(key) + len(value)] = value
+        _SLOT.pack_into(
+            mm, offset, seq, len(key), len(value), key_hash, expires_at, time.time()
+        )
+        _SEQ.pack_into(mm, offset, (seq + 1) & 0xFFFFFFFF)
+
+    def _clear_slot(self, offset: int) -> None:
+        """Mark a slot empty. The caller must hold the stripe lock."""
+        mm = self._mm
+        seq = self._begin_write(offset)
+        _SLOT.pack_into(mm, offset, seq, 0, 0, 0, 0.0, 0.0)
+        _SEQ.pack_into(mm, offset, (seq + 1) & 0xFFFFFFFF)
+
+    def _find(self, bucket: int, key_hash: int, key: bytes) -> Optional[int]:
+        """Return the offset of the slot holding `key`. The caller must hold the stripe lock."""
+        for way in range(self.ways):
+            offset = self._slot_offset(bucket, way)
+            if self._read_slot(offset, key_hash, key, locked=True)[0]:
+                return offset
+        return None
+
+    def _victim(self, bucket: int, now: float) -> int:
+        """Pick the slot to overwrite: empty, else expired, else least recently read."""
+        victim, oldest = 0, float("inf")
+        for way in range(self.ways):
+            offset = self._slot_offset(bucket, way)
+            _, key_len, _, _, expires_at, last_access = _SLOT.unpack_from(
+                self._mm, offset
+            )
+            if key_len == 0 or (expires_at and expires_at < now):
+                return offset
+            if last_access < oldest:
+                victim, oldest = offset, last_access
+        if self.metrics is not None:
+            self.metrics.evictions += 1
+        return victim
+
+    def delete(self, key: str) -> None:
+        """Delete a key from the cache."""
+        raw_key = key.encode("utf-8")
+        key_hash = _key_hash(raw_key)
+        bucket = self._bucket(key_hash)
+        with self._stripe(bucket):
+            offset = self._find(bucket, key_hash, raw_key)
+            if offset is not None:
+                self._clear_slot(offset)
+
+    async def adelete(self, key: str) -> None:
+        """Delete a key from the cache."""
+        self.delete(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a key from the cache."""
+        raw_key = key.encode("utf-8")
+        key_hash = _key_hash(raw_key)
+        bucket = self._bucket(key_hash)
+        for way in range(self.ways):
+            offset = self._slot_offset(bucket, way)
+            matched, value, expires_at = self._read_slot(offset, key_hash, raw_key)
+            if not matched or value is None:
+                continue
+            now = time.time()
+            if expires_at and expires_at < now:
+                if self.metrics is not None:
+                    self.metrics.stale += 1
+                return None
+            # Racy by design: a lost update only makes eviction less precise.
+            _LAST_ACCESS.pack_into(self._mm, offset + _LAST_ACCESS_OFFSET, now)
+            return self._serializer.loads(value)
+        return None
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get a key from the cache."""
+        return self.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key in the cache with an optional TTL in seconds."""
+        raw_key = key.encode("utf-8")
+        data = self._serializer.dumps(value)
+        key_hash = _key_hash(raw_key)
+        bucket = self._bucket(key_hash)
+        now = time.time()
+        with self._stripe(bucket):
+            offset = self._find(bucket, key_hash, raw_key)
+            if _SLOT_HEADER_SIZE + len(raw_key) + len(data) > self.slot_size:
+                # Too large to cache; make sure no stale value survives.
+                if offset is not None:
+                    self._clear_slot(offset)
+                return
+            if offset is None:
+                offset = self._victim(bucket, now)
+            self._write_slot(
+                offset, key_hash, raw_key, data, now + ttl if ttl else 0.0
+            )
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key in the cache with an optional TTL in seconds."""
+        self.set(key, value, ttl)
+
+
+class SharedMemoryCache(Cache[EndpointDefinitionGen, TResponse]):
+    """
+    A Cache class whose entries are shared by all worker processes on a host.
+    """
+    def __init__(
+        self,
+        name: str = "cache",
+        slots: int = 16384,
+        slot_size: int = 4096,
+        ways: int = 8,
+        stripes: int = 64,
+        ttl: int = 60,
+        serializer: Optional[Serializer] = None,
+        keep_unused_for: Optional[int] = None,
+    ):
+        super().__init__(
+            _backend=SharedMemoryBackend(
+                path=_default_path(name),
+                slots=slots,
+                slot_size=slot_size,
+                ways=ways,
+                stripes=stripes,
+                serializer=serializer,
+            ),
+            _ttl=ttl,
+            keep_unused_for=keep_unused_for,
+        )
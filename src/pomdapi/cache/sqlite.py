@@ -0,0 +1,203 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, Iterator, Optional
+
+from pomdapi.core.types import TResponse
+from pomdapi.core.api import EndpointDefinitionGen
+from pomdapi.core.caching import Cache
+from pomdapi.core.metrics import CacheMetrics
+from pomdapi.cache.serializers import FramedSerializer, Serializer
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)
+    WHERE expires_at IS NOT NULL;
+"""
+
+
+class SQLiteBackend:
+    """
+    A persistent cache backend storing entries in a local SQLite database.
+
+    The database runs in WAL mode, so several worker processes on one host
+    can read concurrently while one of them writes. Nothing is loaded up
+    front: the connection is opened on first use and entries are read on
+    demand, so startup stays fast however large the cache file is. Each
+    thread (and each forked process) gets its own connection, except for an
+    in-memory database (`":memory:"`), which only exists within the
+    connection that created it: its threads share one connection, used by
+    one of them at a time.
+
+    Attributes:
+        path: Location of the database file.
+        timeout: Seconds to wait for a competing writer before failing.
+
+    Example:
+        ```python
+        cache = SQLiteCache(path="/var/cache/myservice/pomdapi.sqlite3")
+        api = HttpApi.from_defaults(base_query_config=config, cache=cache)
+        ```
+    """
+
+    metrics: Optional[CacheMetrics] = None
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        serializer: Optional[Serializer] = None,
+        timeout: float = 5.0,
+    ):
+        self.path = os.fspath(path)
+        self.timeout = timeout
+        self._serializer = serializer or FramedSerializer()
+        self._local = threading.local()
+        self._schema_ready = False
+        self._in_memory = self.path in (":memory:", "")
+        self._shared: Optional[sqlite3.Connection] = None
+        self._lock: AbstractContextManager[Any] = (
+            threading.RLock() if self._in_memory else nullcontext()
+        )
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready or self._in_memory:
+            conn.executescript(_SCHEMA)
+            self._schema_ready = True
+        return conn
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection to use; hold `_lock` while using it."""
+        if self._in_memory:
+            with self._lock:
+                if self._shared is None:
+                    self._shared = self._open()
+                return self._shared
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        # Connections must not be shared with a forked child.
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = self._open()
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def close(self) -> None:
+        """Close the connection owned by the calling thread, or the shared in-memory one."""
+        if self._in_memory:
+            with self._lock:
+                if self._shared is not None:
+                    self._shared.close()
+                    self._shared = None
+            return
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def purge_expired(self) -> int:
+        """Delete all expired entries and return how many were removed."""
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at < ?",
+                (time.time(),),
+            )
+            return cursor.rowcount
+
+    def delete(self, key: str) -> None:
+        """Delete a key from the cache."""
+        with self._lock:
+            self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    async def adelete(self, key: str) -> None:
+        """Delete a key from the cache."""
+        await asyncio.to_thread(self.delete, key)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a key from the cache."""
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                conn.execute(
+                    "DELETE FROM entries WHERE key = ? AND expires_at = ?",
+                    (key, expires_at),
+                )
+                if self.metrics is not None:
+                    self.metrics.stale += 1
+                return None
+        return self._serializer.loads(value)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get a key from the cache."""
+        return await asyncio.to_thread(self.get, key)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key in the cache with an optional TTL in seconds."""
+        expires_at = time.time() + ttl if ttl else None
+        data = self._serializer.dumps(value)
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO entries (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET "
+                "value = excluded.value, expires_at = excluded.expires_at",
+                (key, data, expires_at),
+            )
+
+    async def aset(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Set a key in the cache with an optional TTL in seconds."""
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def items(self) -> Iterator[tuple[str, Any, Optional[float]]]:
+        """Yield `(key, value, remaining ttl)` for every live entry."""
+        now = time.time()
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key, value, expires_at FROM entries "
+                "WHERE expires_at IS NULL OR expires_at >= ?",
+                (now,),
+            )
+            if self._in_memory:
+                # The shared connection must not be left mid-query.
+                rows = rows.fetchall()
+        for key, value, expires_at in rows:
+            ttl = None if expires_at is None else expires_at - now
+            yield key, self._serializer.loads(value), ttl
+
+
+class SQLiteCache(Cache[EndpointDefinitionGen, TResponse]):
+    """
+    A Cache class persisting entries to a local SQLite database.
+    """
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        ttl: int = 60,
+        serializer: Optional[Serializer] = None,
+        keep_unused_for: Optional[int] = None,
+    ):
+        super().__init__(
+            _backend=SQLiteBackend(path=path, serializer=serializer),
+            _ttl=ttl,
+            keep_unused_for=keep_unused_for,
+        )
@@ -1,12 +1,17 @@
 import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from functools import wraps
+from functools import partial, wraps
 from typing import (
     TYPE_CHECKING,
+    Any,
+    Awaitable,
     Callable,
     Generic,
     Iterable,
     Literal,
+    Mapping,
     Optional,
     ParamSpec,
     Protocol,
@@ -17,14 +22,23 @@ from typing import (
     cast,
 )
     
+import httpx
 from typing_extensions import TypeIs
 
 from pydantic import BaseModel, TypeAdapter
 
-from pomdapi.core.caching import Cache
+from pomdapi.core.bridge import BackgroundLoop
+from pomdapi.core.caching import Cache, QueryRef
+from pomdapi.core.fanout import SyncMap
+from pomdapi.core.middleware import CallContext, Middleware, Pipeline, compose
+from pomdapi.core.tracing import phase
+from pomdapi.core.subscriptions import Subscription, SubscriptionManager
 from pomdapi.core.types import (
+    CacheUpdate,
     EndpointDefinition,
+    Entity,
     ProvidesTags,
+    Tag,
 )
 
 
@@ -54,7 +68,7 @@ class SyncAsync(Protocol[QueryParam, QueryResponse]):
         is_async: Literal[True] = True,
         *args: QueryParam.args,
         **kwargs: QueryParam.kwargs,
-    ) -> asyncio.Future[QueryResponse]:
+    ) -> Awaitable[QueryResponse]:
         ...
 
     @overload
@@ -63,10 +77,38 @@ class SyncAsync(Protocol[QueryParam, QueryResponse]):
         is_async: bool = True,
         *args: QueryParam.args,
         **kwargs: QueryParam.kwargs,
-    ) -> asyncio.Future[QueryResponse] | QueryResponse:
+    ) -> Awaitable[QueryResponse] | QueryResponse:
         ...
 
 
+class Ready(Generic[QueryResponse]):
+    """An awaitable that is already complete.
+
+    Async calls answered from the cache return one, so awaiting them
+    neither suspends nor schedules anything on the event loop.
+    """
+
+    __slots__ = ("_value", "_error")
+
+    def __init__(
+        self, value: Any = None, error: Optional[BaseException] = None
+    ) -> None:
+        self._value = value
+        self._error = error
+
+    def done(self) -> bool:
+        return True
+
+    def result(self) -> QueryResponse:
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def __await__(self):
+        return self.result()
+        yield  # makes this a generator, as `__await__` must return an iterator
+
+
 EndpointDefinitionGen = TypeVar("EndpointDefinitionGen", contravariant=True)
 TResponse = TypeVar("TResponse", covariant=True)
 EndpointName: TypeAlias = str
@@ -100,6 +142,27 @@ def is_base_query_fn_async_arity_2(
     return isinstance(fn, Callable) and len(inspect.signature(fn).parameters) == 2
 
 
+def _validator(response_type: Any) -> Callable[[CallContext, Any], Any]:
+    """Return the final validation step of an endpoint's middleware chain.
+
+    The type adapter is built on first use, so forward references in the
+    response type may be resolved after the endpoint is registered.
+    """
+    if response_type is None:
+        return lambda ctx, response: response
+    adapter: Optional[TypeAdapter] = None
+
+    def validate(ctx: CallContext, response: Any) -> Any:
+        nonlocal adapter
+        if isinstance(response_type, BaseModel):
+            return response_type.model_validate(response)
+        if adapter is None:
+            adapter = TypeAdapter(response_type)
+        return adapter.validate_python(response)
+
+    return validate
+
+
 @dataclass
 class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
     """
@@ -116,6 +179,9 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
         base_query_fn_handler_async: Asynchronous function to execute requests
         endpoints: Dictionary mapping endpoint names to their definitions
         cache: Optional cache implementation for responses
+        middleware: Middleware wrapping every endpoint call, outermost first
+        background_loop: If set, sync calls run on this shared event loop
+            through the async handler and cache methods; see `BackgroundLoop`
 
     Example:
         ```python
@@ -141,6 +207,23 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
         default_factory=dict
     )
     cache: Optional[Cache[EndpointDefinitionGen, TResponse]] = None
+    subscriptions: SubscriptionManager = field(
+        default_factory=SubscriptionManager, repr=False
+    )
+    middleware: list[Middleware] = field(default_factory=list)
+    background_loop: Optional[BackgroundLoop] = None
+    _pipelines: dict[str, Pipeline] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    # Pools for `map_sync`, smallest first. A larger pool is added when a call
+    # asks for more workers; earlier ones stay alive for maps still using them.
+    _executors: list[tuple[int, ThreadPoolExecutor]] = field(
+        default_factory=list, init=False, repr=False
+    )
+    _sync_client: Optional[httpx.Client] = field(default=None, init=False, repr=False)
+    _fanout_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
 
     def base_query_fn(
         self, fn: BaseQueryFn[BaseQueryConfig, EndpointDefinitionGen, TResponse]
@@ -150,10 +233,136 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
             self.base_query_fn_handler = fn
         return fn
 
+    def use(self, *middleware: Middleware) -> None:
+        """Append middleware to the chain and recompose every endpoint's pipeline."""
+        self.middleware.extend(middleware)
+        self._pipelines.clear()
+        for name in self.endpoints:
+            self._pipeline(name)
+
+    def _pipeline(self, endpoint_name: str) -> Pipeline:
+        """Return the endpoint's composed middleware chains, composing them once."""
+        pipeline = self._pipelines.get(endpoint_name)
+        if pipeline is None:
+            endpoint = self.endpoints[endpoint_name]
+            acall = compose(self.middleware, "acall", self._acall)
+            pipeline = self._pipelines[endpoint_name] = Pipeline(
+                call=compose(self.middleware, "call", self._call),
+                acall=acall,
+                resolve=compose(self.middleware, "resolve", self._resolve),
+                transport=compose(self.middleware, "transport", self._transport),
+                atransport=compose(self.middleware, "atransport", self._atransport),
+                cache_lookup=compose(
+                    self.middleware, "cache_lookup", self._cache_lookup
+                ),
+                validate=compose(
+                    self.middleware, "validate", _validator(endpoint.response_type)
+                ),
+                inline_hits=acall == self._acall,
+            )
+        return pipeline
+
+    def _call(self, ctx: CallContext) -> Any:
+        run = self._query_call if ctx.endpoint.is_query else self._mutation_call
+        response = run(ctx)
+        return self._pipeline(ctx.endpoint_name).validate(ctx, response)
+
+    async def _acall(self, ctx: CallContext) -> Any:
+        run = self._aquery_call if ctx.endpoint.is_query else self._amutation_call
+        response = await run(ctx)
+        return self._pipeline(ctx.endpoint_name).validate(ctx, response)
+
+    def _call_sync(self, ctx: CallContext) -> Any:
+        """Run a sync endpoint call, on the background loop if there is one.
+
+        Bridged calls go through the `acall` chain; cache hits answered
+        without awaiting never leave the calling thread.
+        """
+        bridge = self.background_loop
+        if bridge is None or bridge.in_loop_thread():
+            return self._pipeline(ctx.endpoint_name).call(ctx)
+        ctx.is_async = True
+        awaitable = self._call_async(ctx)
+        if isinstance(awaitable, Ready):
+            return awaitable.result()
+        return bridge.run(awaitable)
+
+    def close(self) -> None:
+        """Shut down the background loop and the `map_sync` thread pool, if any."""
+        if self.background_loop is not None:
+            self.background_loop.shutdown()
+        with self._fanout_lock:
+            executors, client = self._executors, self._sync_client
+            self._executors, self._sync_client = [], None
+        for _, executor in executors:
+            executor.shutdown(cancel_futures=True)
+        if client is not None:
+            client.close()
+
+    def _call_async(self, ctx: CallContext) -> Awaitable[Any]:
+        """Return the awaitable of an async endpoint call.
+
+        Calls are plain coroutines, not tasks, so nothing is scheduled on the
+        event loop until the caller awaits. Unless middleware wraps `acall`,
+        a query is resolved and looked up in the cache right away, and a hit
+        is returned validated as an already complete `Ready`.
+        """
+        pipeline = self._pipeline(ctx.endpoint_name)
+        if not (pipeline.inline_hits and self.cache and ctx.endpoint.is_query):
+            return pipeline.acall(ctx)
+        try:
+            ctx.request, ctx.tags = pipeline.resolve(ctx)
+            cached_response = pipeline.cache_lookup(ctx)
+            if cached_response is None:
+                return self._afetch_validated(ctx)
+            return Ready(pipeline.validate(ctx, cached_response))
+        except Exception as error:
+            return Ready(error=error)
+
+    async def _afetch_validated(self, ctx: CallContext) -> Any:
+        response = await self._afetch(ctx)
+        return self._pipeline(ctx.endpoint_name).validate(ctx, response)
+
+    def _resolve(
+        self, ctx: CallContext
+    ) -> tuple[EndpointDefinitionGen, Optional[Iterable[str | Tag]]]:
+        return self._resolve_request(ctx.endpoint, *ctx.args, **ctx.kwargs)
+
+    def _transport(self, ctx: CallContext) -> TResponse:
+        assert self.base_query_fn_handler
+        if is_base_query_fn_arity_2(self.base_query_fn_handler):
+            return self.base_query_fn_handler(self.base_query_config, ctx.request)
+        return self.base_query_fn_handler(
+            self.base_query_config, ctx.request, ctx.endpoint_name # type: ignore
+        )
+
+    async def _atransport(self, ctx: CallContext) -> TResponse:
+        assert self.base_query_fn_handler_async is not None
+        if is_base_query_fn_async_arity_2(self.base_query_fn_handler_async):
+            return await self.base_query_fn_handler_async(
+                self.base_query_config, ctx.request
+            )
+        return await self.base_query_fn_handler_async(
+            self.base_query_config, ctx.request, ctx.endpoint_name # type: ignore
+        )
+
+    def _cache_lookup(self, ctx: CallContext) -> Optional[TResponse]:
+        assert self.cache is not None
+        if ctx.endpoint.entity:
+            return self.cache.get_normalized(
+                ctx.endpoint_name,
+                ctx.request,
+                ctx.endpoint.entity.bind(*ctx.args, **ctx.kwargs),
+                ctx.tags or [],
+            )
+        return self.cache.get_by_request(ctx.endpoint_name, ctx.request)
+
     def query(
         self,
         name: str,
         response_type: Type[ResponseType],
+        entity: Optional[Entity] = None,
+        response_tags: Optional[Callable[[Any], Iterable[str | Tag]]] = None,
     ) -> Callable[
         [
             Callable[QueryParam, EndpointDefinitionGen]
@@ -163,6 +372,14 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
     ]:
         """Decorator to register a query endpoint.
         The decorated function will execute the query and return the response.
+
+        If `entity` is given, cached responses are normalized: every entity is
+        stored once under its tag identity, and a request providing an entity's
+        tag is answered from the cache even if only a list containing that
+        entity was fetched before.
+
+        `response_tags` extracts further tags from each response; they are
+        provided in addition to those returned by the decorated function.
         """
 
         def decorator(
@@ -172,8 +389,13 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
             endpoint = EndpointDefinition(
                 request_fn=fn,
                 is_query_endpoint=True,
+                entity=entity,
+                response_type=response_type,
+                response_tags=response_tags,
             )
             self.endpoints[name] = endpoint
+            self._pipelines.pop(name, None)
+            self._pipeline(name)
 
             if TYPE_CHECKING:
 
@@ -190,7 +412,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
                     is_async: Literal[True] = True,
                     *args: QueryParam.args,
                     **kwargs: QueryParam.kwargs,
-                ) -> asyncio.Future[ResponseType]:
+                ) -> Awaitable[ResponseType]:
                     ...
 
                 @overload
@@ -198,7 +420,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
                     is_async: bool = True,
                     *args: QueryParam.args,
                     **kwargs: QueryParam.kwargs,
-                ) -> asyncio.Future[ResponseType] | ResponseType:
+                ) -> Awaitable[ResponseType] | ResponseType:
                     ...
 
             @wraps(fn)
@@ -206,28 +428,11 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
                 is_async: bool = True,
                 *args: QueryParam.args,
                 **kwargs: QueryParam.kwargs,
-            ) -> asyncio.Future[ResponseType] | ResponseType:
+            ) -> Awaitable[ResponseType] | ResponseType:
+                ctx = CallContext(self, name, endpoint, is_async, args, kwargs)
                 if is_async:
-
-                    async def _run() -> ResponseType:
-                        response = await self.run_query(
-                            is_async=True, endpoint_name=name, *args, **kwargs
-                        )
-                        if isinstance(response_type, BaseModel):
-                            return response_type.model_validate(response)
-                        adapter = TypeAdapter(response_type)
-                        return adapter.validate_python(response)
-
-                    return asyncio.ensure_future(_run())
-
-                response = self.run_query(
-                    is_async=False, endpoint_name=name, *args, **kwargs
-                )
-
-                if isinstance(response_type, BaseModel):
-                    return response_type.model_validate(response)
-                adapter = TypeAdapter(response_type)
-                return adapter.validate_python(response)
+                    return self._call_async(ctx)
+                return self._call_sync(ctx)
 
             return wrapper
 
@@ -238,6 +443,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
         self,
         name: str,
         response_type: Type[ResponseType],
+        updates: Iterable[CacheUpdate] = (),
     ) -> Callable[
         [
             Callable[QueryParam, EndpointDefinitionGen]
@@ -252,6 +458,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
         self,
         name: str,
         response_type: Literal[None] = None,
+        updates: Iterable[CacheUpdate] = (),
     ) -> Callable[
         [
             Callable[QueryParam, EndpointDefinitionGen]
@@ -266,6 +473,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
         self,
         name: str,
         response_type: Type[ResponseType] | None = None,
+        updates: Iterable[CacheUpdate] = (),
     ) -> Callable[
         [
             Callable[QueryParam, EndpointDefinitionGen]
@@ -279,6 +487,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
         self,
         name: str,
         response_type: Type[ResponseType] | None = None,
+        updates: Iterable[CacheUpdate] = (),
     ) -> Callable[
         [
             Callable[QueryParam, EndpointDefinitionGen]
@@ -288,6 +497,10 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
     ]:
         """Decorator to register a mutation endpoint.
         The decorated function will execute the mutation and return the response.
+
+        `updates` patch cached query responses in place, either optimistically
+        before the request or from its response, instead of invalidating them
+        and forcing a refetch. See `CacheUpdate`.
         """
 
         def decorator(
@@ -297,8 +510,12 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
             endpoint = EndpointDefinition(
                 request_fn=fn,
                 is_query_endpoint=False,
+                response_type=response_type,
+                updates=list(updates),
             )
             self.endpoints[name] = endpoint
+            self._pipelines.pop(name, None)
+            self._pipeline(name)
 
             if response_type is None:
                 if TYPE_CHECKING:
@@ -316,7 +533,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
                         is_async: Literal[True] = True,
                         *args: QueryParam.args,
                         **kwargs: QueryParam.kwargs,
-                    ) -> asyncio.Future[None]:
+                    ) -> Awaitable[None]:
                         ...
 
                     @overload
@@ -324,26 +541,23 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
                         is_async: bool = True,
                         *args: QueryParam.args,
                         **kwargs: QueryParam.kwargs,
-                    ) -> asyncio.Future[None] | None:
+                    ) -> Awaitable[None] | None:
                         ...
 
                 @wraps(fn)
                 def none_wrapper(
                     is_async: bool, *args, **kwargs
-                ) -> asyncio.Future[None] | (None):
+                ) -> Awaitable[None] | (None):
+                    ctx = CallContext(self, name, endpoint, is_async, args, kwargs)
                     if is_async:
 
                         async def _run() -> None:
-                            await self.run_mutation(
-                                is_async=True, endpoint_name=name, *args, **kwargs
-                            )
+                            await self._pipeline(name).acall(ctx)
                             return None
 
-                        return asyncio.ensure_future(_run())
+                        return _run()
 
-                    self.run_mutation(
-                        is_async=False, endpoint_name=name, *args, **kwargs
-                    )
+                    self._call_sync(ctx)
                     return None
 
                 return none_wrapper
@@ -364,7 +578,7 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
                         is_async: Literal[True] = True,
                         *args: QueryParam.args,
                         **kwargs: QueryParam.kwargs,
-                    ) -> asyncio.Future[ResponseType]:
+                    ) -> Awaitable[ResponseType]:
                         ...
 
                     @overload
@@ -372,41 +586,378 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
                         is_async: bool = True,
                         *args: QueryParam.args,
                         **kwargs: QueryParam.kwargs,
-                    ) -> asyncio.Future[ResponseType] | (ResponseType):
+                    ) -> Awaitable[ResponseType] | (ResponseType):
                         ...
 
                 @wraps(fn)
                 def wrapper(
                     is_async: bool, *args, **kwargs
-                ) -> asyncio.Future[ResponseType] | (ResponseType):
+                ) -> Awaitable[ResponseType] | (ResponseType):
+                    ctx = CallContext(self, name, endpoint, is_async, args, kwargs)
                     if is_async:
+                        return self._call_async(ctx)
+                    return self._call_sync(ctx)
 
-                        async def _run() -> ResponseType:
-                            response = await self.run_mutation(
-                                is_async=True, endpoint_name=name, *args, **kwargs
-                            )
+                return wrapper
 
-                            if isinstance(response_type, BaseModel):
-                                return response_type.model_validate(response)
+        return decorator
 
-                            adapter = TypeAdapter(response_type)
-                            return adapter.validate_python(response)
+    def endpoint_name(self, endpoint: str | Callable[..., object]) -> str:
+        """Return the name of an endpoint given its name or decorated function."""
+        if isinstance(endpoint, str):
+            return endpoint
+        request_fn = getattr(endpoint, "__wrapped__", None)
+        for name, definition in self.endpoints.items():
+            if definition.request_fn is request_fn:
+                return name
+        raise ValueError(f"{endpoint!r} is not an endpoint of this api.")
+
+    def call(
+        self, is_async: bool, endpoint: str | Callable[..., object], *args, **kwargs
+    ) -> Any:
+        """Call an endpoint as its decorated function would, given its name.
+
+        The response is validated, and an awaitable is returned if `is_async`.
+        """
+        name, definition = self._definition(endpoint)
+        ctx = CallContext(self, name, definition, is_async, args, kwargs)
+        if is_async:
+            return self._call_async(ctx)
+        return self._call_sync(ctx)
+
+    def retain(
+        self, endpoint: str | Callable[..., object], *args, **kwargs
+    ) -> QueryRef:
+        """Return a reference keeping a query's cached response alive.
+
+        With a cache configured with `keep_unused_for`, a retained entry never
+        expires; once its last reference is released it is dropped after the
+        grace period. The reference is taken when entering the returned
+        handle or calling its `acquire`/`aacquire` method.
+
+        Example:
+            ```python
+            async with api.retain(get_repo_issue, owner="octocat", repo="hello-world", issue_number=1):
+                issue = await get_repo_issue(owner="octocat", repo="hello-world", issue_number=1)
+            ```
+        """
+        if self.cache is None:
+            raise ValueError("Retaining a query requires a cache.")
+        name, definition = self._query_definition(endpoint)
+        request_def, tags = self._resolve_request(definition, *args, **kwargs)
+        return QueryRef(self.cache, name, request_def, list(tags or []))
+
+    def _definition(
+        self, endpoint: str | Callable[..., object]
+    ) -> tuple[str, EndpointDefinition[EndpointDefinitionGen]]:
+        """Look up an endpoint the api can call, rejecting streamed ones."""
+        name = self.endpoint_name(endpoint)
+        definition = self.endpoints.get(name)
+        if definition is None:
+            raise ValueError(f"No endpoint named '{name}' found.")
+        if definition.streamed:
+            raise ValueError(
+                f"Endpoint '{name}' streams its response; iterate over its decorated function instead."
+            )
+        return name, definition
 
-                        return asyncio.ensure_future(_run())
+    def _query_definition(
+        self, endpoint: str | Callable[..., object]
+    ) -> tuple[str, EndpointDefinition[EndpointDefinitionGen]]:
+        name, definition = self._definition(endpoint)
+        if not definition.is_query:
+            raise ValueError(f"No query endpoint named '{name}' found.")
+        return name, definition
 
-                    response = self.run_mutation(
-                        is_async=False, endpoint_name=name, *args, **kwargs
-                    )
+    def seed(
+        self,
+        endpoint: str | Callable[..., object],
+        kwargs: Mapping[str, Any],
+        response: Any,
+        tags: Optional[Iterable[str | Tag]] = None,
+    ) -> None:
+        """Store a response in the cache as if `endpoint(**kwargs)` had returned it.
+
+        Tags default to the ones the endpoint's request function provides.
+
+        Example:
+            ```python
+            api.seed(get_repo_issue, {"owner": "octocat", "repo": "hello-world", "issue_number": 1}, issue)
+            ```
+        """
+        if self.cache is None:
+            raise ValueError("Seeding requires a cache.")
+        name, definition = self._query_definition(endpoint)
+        request_def, provided_tags = self._resolve_request(definition, **kwargs)
+        tags = list(provided_tags or []) if tags is None else list(tags)
+        if definition.entity:
+            self.cache.set_normalized(
+                endpoint_name=name,
+                request=request_def,
+                entity=definition.entity.bind(**kwargs),
+                response=response,
+                tags=tags,
+            )
+        else:
+            self.cache.set(
+                endpoint_name=name, request=request_def, response=response, tags=tags
+            )
 
-                    if isinstance(response_type, BaseModel):
-                        return response_type.model_validate(response)
+    def prefetch(
+        self,
+        endpoint: str | Callable[..., object],
+        kwargs_iter: Iterable[Mapping[str, Any]],
+        concurrency: int = 8,
+    ) -> int:
+        """Warm the cache by running a query for every set of arguments.
+
+        Responses are only written to the cache, neither validated nor
+        returned, and arguments already cached are skipped. At most
+        `concurrency` requests run at once, in worker threads; `kwargs_iter`
+        is consumed lazily. Returns how many argument sets were processed. The first
+        failing query stops the warm-up and its error is raised.
+
+        Example:
+            ```python
+            api.prefetch(get_repo_issue, ({"owner": "octocat", "repo": "hello-world", "issue_number": n} for n in range(1, 101)))
+            ```
+        """
+        name, _ = self._query_definition(endpoint)
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+        pending = iter(kwargs_iter)
+        lock = threading.Lock()
+        errors: list[BaseException] = []
+        count = 0
+
+        def worker() -> None:
+            nonlocal count
+            while not errors:
+                with lock:
+                    kwargs = next(pending, None)
+                if kwargs is None:
+                    return
+                try:
+                    self._run_query(False, name, (), dict(kwargs))
+                except BaseException as error:
+                    errors.append(error)
+                    return
+                with lock:
+                    count += 1
+
+        workers = [
+            threading.Thread(target=worker, name=f"pomdapi-prefetch:{name}")
+            for _ in range(concurrency)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return count
+
+    def map_sync(
+        self,
+        endpoint: str | Callable[..., object],
+        kwargs_iter: Iterable[Mapping[str, Any]],
+        workers: int = 8,
+        ordered: bool = True,
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+    ) -> SyncMap[Any]:
+        """Call an endpoint for every set of arguments, `workers` at a time.
+
+        Calls run as sync calls on a thread pool owned by the api, and the
+        HTTP based apis send them through one pooled `httpx.Client`, so
+        connections are reused across calls. Results are validated and
+        yielded in input order, or as they complete if not `ordered`. A call
+        taking longer than `timeout` seconds fails with `TimeoutError`. See
+        `SyncMap` for error handling and cancellation; `close()` releases the
+        pool.
+
+        Example:
+            ```python
+            with api.map_sync(get_repo_issue, ({"owner": "octocat", "repo": "hello-world", "issue_number": n} for n in range(1, 101)), workers=16) as issues:
+                for issue in issues:
+                    ...
+            ```
+        """
+        name, _ = self._definition(endpoint)
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        with self._fanout_lock:
+            if not self._executors or self._executors[-1][0] < workers:
+                self._executors.append(
+                    (workers, ThreadPoolExecutor(workers, thread_name_prefix="pomdapi-map"))
+                )
+            executor = self._executors[-1][1]
+            if self._sync_client is None:
+                self._sync_client = httpx.Client()
+            client = self._sync_client
+        return SyncMap(
+            executor,
+            partial(self.call, False, name),
+            kwargs_iter,
+            workers,
+            ordered=ordered,
+            timeout=timeout,
+            return_exceptions=return_exceptions,
+            client=client,
+        )
 
-                    adapter = TypeAdapter(response_type)
-                    return adapter.validate_python(response)
+    async def aprefetch(
+        self,
+        endpoint: str | Callable[..., object],
+        kwargs_iter: Iterable[Mapping[str, Any]],
+        concurrency: int = 8,
+    ) -> int:
+        """Async counterpart of `prefetch`, running up to `concurrency` queries as tasks.
+
+        Like `prefetch`, the first failing query stops the warm-up and its
+        error is raised.
+        """
+        name, _ = self._query_definition(endpoint)
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1.")
+        pending = iter(kwargs_iter)
+        count = 0
+
+        async def worker() -> None:
+            nonlocal count
+            for kwargs in pending:
+                await self._run_query(True, name, (), dict(kwargs))
+                count += 1
+
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(concurrency):
+                    tg.create_task(worker())
+        except BaseExceptionGroup as group:
+            raise group.exceptions[0] from None
+        return count
+
+    def subscribe(
+        self,
+        endpoint: str | Callable[..., object],
+        *args,
+        interval: float = 1.0,
+        callback: Optional[Callable[[Any], Any]] = None,
+        on_error: Optional[Callable[[BaseException], Any]] = None,
+        **kwargs,
+    ) -> Subscription:
+        """Poll a query endpoint and receive every fresh result.
+
+        All subscribers to the same endpoint and arguments share one poller,
+        so N consumers cost one upstream request per `interval`. Each result
+        is written to the cache and delivered validated, either through
+        `callback` or by iterating the returned subscription with
+        `async for`. The poller stops when its last subscriber unsubscribes.
+
+        Example:
+            ```python
+            async with api.subscribe(get_gas_price, interval=1.0) as prices:
+                async for price in prices:
+                    print(price)
+
+            # or from synchronous code
+            subscription = api.subscribe(get_gas_price, interval=1.0, callback=print)
+            ...
+            subscription.unsubscribe()
+            ```
+        """
+        name, definition = self._query_definition(endpoint)
+        request_def, tags = self._resolve_request(definition, *args, **kwargs)
+        adapter = TypeAdapter(definition.response_type or Any)
+        # Pin the polled entry for as long as anybody is subscribed.
+        ref = (
+            QueryRef(self.cache, name, request_def, list(tags or []))
+            if self.cache is not None
+            else None
+        )
 
-                return wrapper
+        async def fetch() -> Any:
+            response = await self._run_query(True, name, args, kwargs, refetch=True)
+            return adapter.validate_python(response)
+
+        def fetch_sync() -> Any:
+            response = self._run_query(False, name, args, kwargs, refetch=True)
+            return adapter.validate_python(response)
+
+        return self.subscriptions.subscribe(
+            Cache.key_from_req(name, request_def),
+            interval,
+            fetch,
+            fetch_sync,
+            callback=callback,
+            on_error=on_error,
+            on_start=ref and ref.acquire,
+            on_stop=ref and ref.release,
+        )
 
-        return decorator
+    @staticmethod
+    def _resolve_request(
+        endpoint: EndpointDefinition[EndpointDefinitionGen], *args, **kwargs
+    ) -> tuple[EndpointDefinitionGen, Optional[Iterable[str | Tag]]]:
+        """Call an endpoint's request function and split off the tags it provides."""
+        request_def_and_tags = endpoint.request_fn(*args, **kwargs)
+        tags = None
+        if isinstance(request_def_and_tags, tuple):
+            request_def, tags = request_def_and_tags
+            if callable(tags):
+                tags = tags(*args, **kwargs)
+            if not isinstance(tags, Iterable):
+                tags = [tags]
+        else:
+            request_def = cast(EndpointDefinitionGen, request_def_and_tags)
+        return request_def, tags
+
+    @staticmethod
+    def _provided_tags(
+        endpoint: EndpointDefinition[EndpointDefinitionGen],
+        tags: Optional[Iterable[str | Tag]],
+        response: Any,
+    ) -> list[str | Tag]:
+        """Tags of the request function, plus those extracted from the response."""
+        provided = list(tags or [])
+        if endpoint.response_tags is not None:
+            provided.extend(endpoint.response_tags(response))
+        return provided
+
+    def _update_targets(
+        self, update: CacheUpdate, *args, **kwargs
+    ) -> tuple[Optional[str], Iterable[str | Tag]]:
+        """Resolve a `CacheUpdate` to its endpoint's cache key and its tags."""
+        assert self.cache is not None
+        key = None
+        if update.endpoint_name is not None:
+            query_kwargs = update.query_args(*args, **kwargs) if update.query_args else {}
+            request_def, _ = self._resolve_request(
+                self.endpoints[update.endpoint_name], **query_kwargs
+            )
+            key = self.cache.key_from_req(update.endpoint_name, request_def)
+        tags = update.tags(*args, **kwargs) if callable(update.tags) else update.tags
+        if isinstance(tags, (str, Tag)):
+            tags = [tags]
+        return key, tags
+
+    @staticmethod
+    def _unique_keys(key: Optional[str], tagged: Iterable[str]) -> list[str]:
+        """Merge the endpoint key and tagged keys, keeping each key once in order."""
+        keys = [key] if key is not None else []
+        return list(dict.fromkeys([*keys, *tagged]))
+
+    def _update_target_keys(self, update: CacheUpdate, *args, **kwargs) -> list[str]:
+        """Return the cache keys a `CacheUpdate` applies to."""
+        key, tags = self._update_targets(update, *args, **kwargs)
+        return self._unique_keys(key, self.cache.keys_for_tags(tags))
+
+    async def _aupdate_target_keys(
+        self, update: CacheUpdate, *args, **kwargs
+    ) -> list[str]:
+        """Async counterpart of `_update_target_keys`."""
+        key, tags = self._update_targets(update, *args, **kwargs)
+        return self._unique_keys(key, await self.cache.akeys_for_tags(tags))
 
     @overload
     def run_query(
@@ -417,88 +968,94 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
     @overload
     def run_query(
         self, is_async: Literal[True], endpoint_name: str, *args, **kwargs
-    ) -> asyncio.Future[TResponse]:
+    ) -> Awaitable[TResponse]:
         ...
 
     @overload
     def run_query(
         self, is_async: bool, endpoint_name: str, *args, **kwargs
-    ) -> asyncio.Future[TResponse] | TResponse:
+    ) -> Awaitable[TResponse] | TResponse:
         ...
 
     def run_query(
         self, is_async: bool, endpoint_name: str, *args, **kwargs
-    ) -> asyncio.Future[TResponse] | TResponse:
-        if self.base_query_fn is None:
-            raise ValueError("base_query function is not set.")
+    ) -> Awaitable[TResponse] | TResponse:
+        return self._run_query(is_async, endpoint_name, args, kwargs)
 
-        endpoint = self.endpoints.get(endpoint_name)
-        if endpoint is None or not endpoint.is_query:
-            raise ValueError(f"No query endpoint named '{endpoint_name}' found.")
-
-        request_def_and_tags = endpoint.request_fn(*args, **kwargs)
-        tags = None
-        if isinstance(request_def_and_tags, tuple):
-            request_def, tags = request_def_and_tags
-            if callable(tags):
-                tags = tags(*args, **kwargs)
-            if not isinstance(tags, Iterable):
-                tags = [tags]
-        else:
-            request_def = cast(EndpointDefinitionGen, request_def_and_tags)
-
-        if self.cache:
-            cached_response = self.cache.get_by_request(endpoint_name, request_def)
+    def _run_query(
+        self,
+        is_async: bool,
+        endpoint_name: str,
+        args: tuple,
+        kwargs: dict,
+        refetch: bool = False,
+    ) -> Awaitable[TResponse] | TResponse:
+        """Run a query. With `refetch`, skip the cache lookup but still store the response."""
+        endpoint_name, endpoint = self._query_definition(endpoint_name)
+        ctx = CallContext(self, endpoint_name, endpoint, is_async, args, kwargs)
+        if is_async:
+            return self._aquery_call(ctx, refetch)
+        return self._query_call(ctx, refetch)
+
+    def _query_call(self, ctx: CallContext, refetch: bool = False) -> TResponse:
+        """Run a query through the endpoint's middleware chains; see `_run_query`."""
+        pipeline = self._pipeline(ctx.endpoint_name)
+        ctx.request, ctx.tags = pipeline.resolve(ctx)
+        if self.cache and not refetch:
+            cached_response = pipeline.cache_lookup(ctx)
             if cached_response is not None:
                 return cached_response
 
-        assert self.base_query_fn_handler
-        if is_async:
-
-            async def _run() -> TResponse:
-                assert self.base_query_fn_handler_async is not None
-                if is_base_query_fn_async_arity_2(self.base_query_fn_handler_async):
-                    response = await self.base_query_fn_handler_async(
-                        self.base_query_config, request_def
-                    )
-                else:
-                    response = await self.base_query_fn_handler_async(
-                        self.base_query_config, request_def, endpoint_name # type: ignore
-                    ) 
-
-                if self.cache:
-                    await self.cache.aset(
-                        endpoint_name=endpoint_name,
-                        request=request_def,
-                        response=response,
-                        tags=tags and tags or [],
-                    )
-                return response
-
-            return asyncio.ensure_future(_run())
+        response = pipeline.transport(ctx)
+        provided_tags = self._provided_tags(ctx.endpoint, ctx.tags, response)
+        with phase("cache_store"):
+            if self.cache and ctx.endpoint.entity:
+                self.cache.set_normalized(
+                    endpoint_name=ctx.endpoint_name,
+                    request=ctx.request,
+                    entity=ctx.endpoint.entity.bind(*ctx.args, **ctx.kwargs),
+                    response=response,
+                    tags=provided_tags,
+                )
+            elif self.cache:
+                self.cache.set(
+                    endpoint_name=ctx.endpoint_name,
+                    request=ctx.request,
+                    response=response,
+                    tags=provided_tags,
+                )
+        return response
 
-        # GET Number of parameters
-        # fn_sig = inspect.signature(self.base_query_fn_handler)
-        if is_base_query_fn_arity_2(self.base_query_fn_handler):
-            response = self.base_query_fn_handler(self.base_query_config, request_def)
-        else:
-            response = self.base_query_fn_handler(
-                self.base_query_config, request_def, endpoint_name # type: ignore
-            )
-        # if len(fn_sig.parameters) == 3:
-        #    fn = cast(Callable[[BaseQueryConfig, EndpointDefinitionGen, str], TResponse], self.base_query_fn_handler)
-        #    response = fn(self.base_query_config, request_def, endpoint_name)
-        # else:
-        #    fn = cast(Callable[[BaseQueryConfig, EndpointDefinitionGen], TResponse], self.base_query_fn_handler)
-        #    response = fn(self.base_query_config, request_def)
-
-        if self.cache:
-            self.cache.set(
-                endpoint_name=endpoint_name,
-                request=request_def,
-                response=response,
-                tags=tags and tags or [],
-            )
+    async def _aquery_call(self, ctx: CallContext, refetch: bool = False) -> TResponse:
+        """Async counterpart of `_query_call`."""
+        pipeline = self._pipeline(ctx.endpoint_name)
+        ctx.request, ctx.tags = pipeline.resolve(ctx)
+        if self.cache and not refetch:
+            cached_response = pipeline.cache_lookup(ctx)
+            if cached_response is not None:
+                return cached_response
+        return await self._afetch(ctx)
+
+    async def _afetch(self, ctx: CallContext) -> TResponse:
+        """Send a resolved query upstream and store the response in the cache."""
+        response = await self._pipeline(ctx.endpoint_name).atransport(ctx)
+        provided_tags = self._provided_tags(ctx.endpoint, ctx.tags, response)
+        with phase("cache_store"):
+            if self.cache and ctx.endpoint.entity:
+                await self.cache.aset_normalized(
+                    endpoint_name=ctx.endpoint_name,
+                    request=ctx.request,
+                    entity=ctx.endpoint.entity.bind(*ctx.args, **ctx.kwargs),
+                    response=response,
+                    tags=provided_tags,
+                )
+            elif self.cache:
+                await self.cache.aset(
+                    endpoint_name=ctx.endpoint_name,
+                    request=ctx.request,
+                    response=response,
+                    tags=provided_tags,
+                )
         return response
 
     @overload
@@ -510,69 +1067,94 @@ class Api(Generic[EndpointDefinitionGen, BaseQueryConfig, TResponse]):
     @overload
     def run_mutation(
         self, is_async: Literal[True], endpoint_name: str, *args, **kwargs
-    ) -> asyncio.Future[TResponse]:
+    ) -> Awaitable[TResponse]:
         ...
 
     @overload
     def run_mutation(
         self, is_async: bool, endpoint_name: str, *args, **kwargs
-    ) -> asyncio.Future[TResponse] | TResponse:
+    ) -> Awaitable[TResponse] | TResponse:
         ...
 
     def run_mutation(
         self, is_async: bool, endpoint_name: str, *args, **kwargs
-    ) -> asyncio.Future[TResponse] | TResponse:
-        if self.base_query_fn is None:
-            raise ValueError("base_query function is not set.")
-
+    ) -> Awaitable[TResponse] | TResponse:
         endpoint = self.endpoints.get(endpoint_name)
         if endpoint is None or not endpoint.is_mutation:
             raise ValueError(f"No mutation endpoint named '{endpoint_name}' found.")
-
-        request_def_and_tags = endpoint.request_fn(*args, **kwargs)
-        tags = None
-        if isinstance(request_def_and_tags, tuple):
-            request_def, tags = request_def_and_tags
-            if callable(tags):
-                tags = tags(*args, **kwargs)
-            if not isinstance(tags, Iterable):
-                tags = [tags]
-        else:
-            request_def = cast(EndpointDefinitionGen, request_def_and_tags)
-        assert self.base_query_fn_handler
+        ctx = CallContext(self, endpoint_name, endpoint, is_async, args, kwargs)
         if is_async:
-
-            async def _run() -> TResponse:
-                assert self.base_query_fn_handler_async is not None
-                if is_base_query_fn_async_arity_2(self.base_query_fn_handler_async):
-                    response = await self.base_query_fn_handler_async(
-                        self.base_query_config,
-                        request_def,
-                    )
-                else:
-                    response = await self.base_query_fn_handler_async(
-                        self.base_query_config,
-                        request_def,
-                        endpoint_name, # type: ignore
+            return self._amutation_call(ctx)
+        return self._mutation_call(ctx)
+
+    def _mutation_call(self, ctx: CallContext) -> TResponse:
+        """Run a mutation through the endpoint's middleware chains."""
+        pipeline = self._pipeline(ctx.endpoint_name)
+        endpoint_name, args, kwargs = ctx.endpoint_name, ctx.args, ctx.kwargs
+        ctx.request, ctx.tags = pipeline.resolve(ctx)
+        tags = ctx.tags
+        updates = ctx.endpoint.updates if self.cache else []
+        rollbacks: dict[str, Any] = {}
+        for update in updates:
+            if update.optimistic:
+                for key in self._update_target_keys(update, *args, **kwargs):
+                    previous = self.cache.patch(
+                        key, lambda cached: update.update(cached, None, *args, **kwargs)
                     )
-                if self.cache and tags:
-                    await self.cache.ainvalidate_tags(
-                        endpoint_name=endpoint_name,
-                        tags=tags,
+                    if previous is not None:
+                        rollbacks.setdefault(key, previous)
+        try:
+            response = pipeline.transport(ctx)
+        except BaseException:
+            # Restore each entry to what it held before the first patch.
+            for key, previous in reversed(rollbacks.items()):
+                self.cache.patch(key, lambda _, previous=previous: previous)
+            raise
+        for update in updates:
+            if not update.optimistic:
+                for key in self._update_target_keys(update, *args, **kwargs):
+                    self.cache.patch(
+                        key, lambda cached: update.update(cached, response, *args, **kwargs)
                     )
-                return response
 
-            return asyncio.ensure_future(_run())
-
-        if is_base_query_fn_arity_2(self.base_query_fn_handler):
-            response = self.base_query_fn_handler(self.base_query_config, request_def)
-        else:
-            response = self.base_query_fn_handler(
-                self.base_query_config, request_def, endpoint_name # type: ignore
+        if self.cache and tags:
+            self.cache.invalidate_tags(
+                endpoint_name=endpoint_name,
+                tags=tags,
             )
+        return response
 
+    async def _amutation_call(self, ctx: CallContext) -> TResponse:
+        """Async counterpart of `_mutation_call`."""
+        pipeline = self._pipeline(ctx.endpoint_name)
+        endpoint_name, args, kwargs = ctx.endpoint_name, ctx.args, ctx.kwargs
+        ctx.request, ctx.tags = pipeline.resolve(ctx)
+        tags = ctx.tags
+        updates = ctx.endpoint.updates if self.cache else []
+        rollbacks: dict[str, Any] = {}
+        for update in updates:
+            if update.optimistic:
+                for key in await self._aupdate_target_keys(update, *args, **kwargs):
+                    previous = await self.cache.apatch(
+                        key, lambda cached: update.update(cached, None, *args, **kwargs)
+                    )
+                    if previous is not None:
+                        rollbacks.setdefault(key, previous)
+        try:
+            response = await pipeline.atransport(ctx)
+        except BaseException:
+            # Restore each entry to what it held before the first patch.
+            for key, previous in reversed(rollbacks.items()):
+                await self.cache.apatch(key, lambda _, previous=previous: previous)
+            raise
+        for update in updates:
+            if not update.optimistic:
+                for key in await self._aupdate_target_keys(update, *args, **kwargs):
+                    await self.cache.apatch(
+                        key, lambda cached: update.update(cached, response, *args, **kwargs)
+                    )
         if self.cache and tags:
-            self.cache.invalidate_tags(
+            await self.cache.ainvalidate_tags(
                 endpoint_name=endpoint_name,
                 tags=tags,
             )
@@ -0,0 +1,165 @@
+import asyncio
+import concurrent.futures
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class BackgroundLoop:
+    """An event loop running on a dedicated thread, for sync-over-async calls.
+
+    Sync callers submit coroutines and block on the result, so every thread
+    shares the loop's connection pools, request coalescing and async cache
+    clients. At most `max_pending` coroutines are queued or running at once;
+    submitting more blocks until one finishes, or raises `TimeoutError` once
+    `timeout` runs out.
+
+    Attributes:
+        max_pending: Maximum number of submitted coroutines not yet finished.
+        name: Name of the loop's thread.
+
+    Example:
+        ```python
+        api = HttpApi.from_defaults(config, cache=InMemoryCache())
+        api.background_loop = BackgroundLoop(max_pending=64)
+        issue = get_issue(is_async=False, number=1)  # runs on the shared loop
+        api.close()
+        ```
+    """
+
+    max_pending: int = 256
+    name: str = "pomdapi-loop"
+    _loop: Optional[asyncio.AbstractEventLoop] = field(default=None, init=False, repr=False)
+    _thread: Optional[threading.Thread] = field(default=None, init=False, repr=False)
+    _slots: threading.BoundedSemaphore = field(init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _closed: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.max_pending < 1:
+            raise ValueError("max_pending must be at least 1.")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The event loop, started on first use."""
+        if self._loop is None:
+            self.start()
+        assert self._loop is not None
+        return self._loop
+
+    def start(self) -> "BackgroundLoop":
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The background loop has been shut down.")
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+        return self
+
+    def in_loop_thread(self) -> bool:
+        """Whether the caller is running on the loop's own thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(
+        self, awaitable: Awaitable[T], timeout: Optional[float] = None
+    ) -> "concurrent.futures.Future[T]":
+        """Schedule `awaitable` on the loop and return a future of its result.
+
+        Raises:
+            TimeoutError: If `max_pending` coroutines are still unfinished
+                after `timeout` seconds.
+            RuntimeError: If the loop has been shut down.
+        """
+        loop = self.loop
+        if not self._slots.acquire(timeout=timeout):
+            _discard(awaitable)
+            raise TimeoutError(f"{self.max_pending} calls are already pending.")
+        try:
+            if self._closed:
+                raise RuntimeError("The background loop has been shut down.")
+            future = asyncio.run_coroutine_threadsafe(_await(awaitable), loop)
+        except BaseException:
+            self._slots.release()
+            _discard(awaitable)
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, awaitable: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Run `awaitable` on the loop and block until its result.
+
+        `timeout` bounds both the wait for a free slot and for the result;
+        on timeout the coroutine is cancelled.
+        """
+        if self.in_loop_thread():
+            _discard(awaitable)
+            raise RuntimeError("Blocking on the background loop from its own thread would deadlock.")
+        future = self.submit(awaitable, timeout)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"The call did not finish within {timeout}s.") from None
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """Cancel unfinished coroutines, stop the loop and join its thread."""
+        if self.in_loop_thread():
+            raise RuntimeError("The background loop cannot shut itself down.")
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            loop, thread = self._loop, self._thread
+        if loop is None or thread is None:
+            return
+
+        async def drain() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), loop).result(timeout)
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            if not thread.is_alive():
+                loop.close()
+
+    def __enter__(self) -> "BackgroundLoop":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown()
+
+
+async def _await(awaitable: Awaitable[T]) -> T:
+    return await awaitable
+
+
+def _discard(awaitable: Awaitable[Any]) -> None:
+    """Close a coroutine that will never run, so it is not reported as never awaited."""
+    close = getattr(awaitable, "close", None)
+    if close is not None:
+        close()
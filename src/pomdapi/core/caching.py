@@ -1,8 +1,24 @@
 import asyncio
-from dataclasses import dataclass
-from typing import Any, Generic, Iterable, Protocol, Optional
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, Iterable, Iterator, Protocol, Optional
 
-from pomdapi.core.types import TResponse, Tag, EndpointDefinitionGen
+from pomdapi.core.metrics import CacheMetrics
+from pomdapi.core.types import TResponse, Tag, Entity, EndpointDefinitionGen
+
+
+# Marker keys of the reference documents stored for normalized responses.
+_ENTITY = "__entity__"
+_ENTITY_REF = "__entity_ref__"
+_ENTITY_REFS = "__entity_refs__"
+
+# First line of a snapshot file written by `Cache.export_snapshot`.
+_SNAPSHOT_FORMAT = "pomdapi-cache-snapshot"
+_SNAPSHOT_VERSION = 1
 
 
 class CacheBackend(Protocol):
@@ -46,10 +62,37 @@ class CacheBackend(Protocol):
         ...
 
 
+class SnapshotBackend(CacheBackend, Protocol):
+    """A cache backend whose live entries can be enumerated for snapshots."""
+
+    def items(self) -> Iterator[tuple[str, Any, Optional[float]]]:
+        """Yield `(key, value, ttl)` for every live entry.
+
+        `ttl` is the number of seconds the entry has left, or None if it
+        does not expire.
+        """
+        ...
+
+
 @dataclass
 class Cache(Generic[EndpointDefinitionGen, TResponse]):
+    """Tag-aware response cache on top of a `CacheBackend`.
+
+    Attributes:
+        keep_unused_for: If set, entries are reference counted: an entry
+            retained with `retain` never expires, and an entry nobody retains
+            is dropped `keep_unused_for` seconds after it was written or last
+            released. Reference counts are kept per process.
+        metrics: Lookup counters, set by `Metrics.instrument_cache`.
+    """
     _backend: CacheBackend
     _ttl: int = 60
+    keep_unused_for: Optional[int] = None
+    metrics: Optional[CacheMetrics] = field(default=None, init=False, repr=False)
+    _refs: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _refs_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
 
     @staticmethod
     def key_from_req(endpoint_name: str, request: EndpointDefinitionGen) -> str:
@@ -59,13 +102,320 @@ class Cache(Generic[EndpointDefinitionGen, TResponse]):
     def key_from_tag(tag: str | Tag) -> str:
         return f"tag/{tag}"
 
+    @staticmethod
+    def key_from_entity(tag: Tag) -> str:
+        return f"entity/{tag.type}/{tag.id}"
+
+    def _normalize(
+        self, entity: Entity, response: TResponse
+    ) -> tuple[Any, dict[str, Any]]:
+        """Split a response into a reference document and the entities it holds.
+
+        Reference documents record the entity spec so they can be normalized
+        again when patched.
+        """
+        spec = [entity.type, entity.id_field, entity.scope]
+        if isinstance(response, list) and all(
+            isinstance(item, dict) and entity.id_field in item for item in response
+        ):
+            entities = {
+                self.key_from_entity(entity.tag_for(item)): item for item in response
+            }
+            return {_ENTITY: spec, _ENTITY_REFS: list(entities)}, entities
+        if isinstance(response, dict) and entity.id_field in response:
+            key = self.key_from_entity(entity.tag_for(response))
+            return {_ENTITY: spec, _ENTITY_REF: key}, {key: response}
+        return response, {}
+
+    def _entry_ttl(self, request_key: str, ttl: Optional[int]) -> Optional[int]:
+        """The TTL to write an entry with, taking reference counts into account."""
+        if self.keep_unused_for is None:
+            return ttl
+        return None if self._refs.get(request_key) else self.keep_unused_for
+
+    def _related_keys(self, cached: Any, tags: Iterable[str | Tag]) -> list[str]:
+        """Tag index and entity keys whose lifetime follows a request entry."""
+        keys = [self.key_from_tag(tag) for tag in tags]
+        if isinstance(cached, dict) and _ENTITY_REFS in cached:
+            keys.extend(cached[_ENTITY_REFS])
+        elif isinstance(cached, dict) and _ENTITY_REF in cached:
+            keys.append(cached[_ENTITY_REF])
+        return keys
+
+    def _count_ref(self, request_key: str, delta: int) -> bool:
+        """Adjust a reference count. Returns True when it crossed zero."""
+        with self._refs_lock:
+            count = self._refs.get(request_key, 0) + delta
+            if count > 0:
+                self._refs[request_key] = count
+            else:
+                self._refs.pop(request_key, None)
+            return (delta > 0 and count == 1) or (delta < 0 and count == 0)
+
+    def retain(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        tags: Iterable[str | Tag] = (),
+    ) -> None:
+        """Pin an entry so it does not expire while referenced."""
+        request_key = self.key_from_req(endpoint_name, request)
+        if self._count_ref(request_key, +1):
+            self._rewrite_ttl(request_key, tags)
+
+    def release(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        tags: Iterable[str | Tag] = (),
+    ) -> None:
+        """Drop a reference. Unreferenced entries expire after `keep_unused_for`."""
+        request_key = self.key_from_req(endpoint_name, request)
+        if self._count_ref(request_key, -1):
+            self._rewrite_ttl(request_key, tags)
+
+    async def aretain(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        tags: Iterable[str | Tag] = (),
+    ) -> None:
+        """Pin an entry so it does not expire while referenced."""
+        request_key = self.key_from_req(endpoint_name, request)
+        if self._count_ref(request_key, +1):
+            await self._arewrite_ttl(request_key, tags)
+
+    async def arelease(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        tags: Iterable[str | Tag] = (),
+    ) -> None:
+        """Drop a reference. Unreferenced entries expire after `keep_unused_for`."""
+        request_key = self.key_from_req(endpoint_name, request)
+        if self._count_ref(request_key, -1):
+            await self._arewrite_ttl(request_key, tags)
+
+    def _rewrite_ttl(self, request_key: str, tags: Iterable[str | Tag]) -> None:
+        if self.keep_unused_for is None:
+            return
+        cached = self._backend.get(request_key)
+        if cached is None:
+            return
+        ttl = self._entry_ttl(request_key, None)
+        self._backend.set(request_key, cached, ttl=ttl)
+        for key in self._related_keys(cached, tags):
+            if (value := self._backend.get(key)) is not None:
+                self._backend.set(key, value, ttl=ttl)
+
+    async def _arewrite_ttl(self, request_key: str, tags: Iterable[str | Tag]) -> None:
+        if self.keep_unused_for is None:
+            return
+        cached = await self._backend.aget(request_key)
+        if cached is None:
+            return
+        ttl = self._entry_ttl(request_key, None)
+        await self._backend.aset(request_key, cached, ttl=ttl)
+        for key in self._related_keys(cached, tags):
+            if (value := await self._backend.aget(key)) is not None:
+                await self._backend.aset(key, value, ttl=ttl)
+
+    def _resolve(self, cached: Any) -> Optional[TResponse]:
+        """Replace a reference document by the entities it points to."""
+        if isinstance(cached, dict) and _ENTITY_REFS in cached:
+            items = [self._backend.get(key) for key in cached[_ENTITY_REFS]]
+            return None if any(item is None for item in items) else items
+        if isinstance(cached, dict) and _ENTITY_REF in cached:
+            return self._backend.get(cached[_ENTITY_REF])
+        return cached
+
+    async def _aresolve(self, cached: Any) -> Optional[TResponse]:
+        """Replace a reference document by the entities it points to."""
+        if isinstance(cached, dict) and _ENTITY_REFS in cached:
+            items = await asyncio.gather(
+                *(self._backend.aget(key) for key in cached[_ENTITY_REFS])
+            )
+            return None if any(item is None for item in items) else list(items)
+        if isinstance(cached, dict) and _ENTITY_REF in cached:
+            return await self._backend.aget(cached[_ENTITY_REF])
+        return cached
+
+    def _entity_lookups(
+        self, entity: Entity, tags: Iterable[str | Tag]
+    ) -> list[str]:
+        """Entity keys that can answer a request providing `tags`."""
+        return [
+            self.key_from_entity(tag)
+            for tag in tags
+            if isinstance(tag, Tag) and tag.type == entity.type and tag.id is not None
+        ]
+
+    def get_normalized(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        entity: Entity,
+        tags: Iterable[str | Tag],
+    ) -> Optional[TResponse]:
+        """Get a response stored with `set_normalized`.
+
+        Falls back to an entity cached by another endpoint when this request
+        has not been cached itself but provides a tag identifying the entity.
+        Returns None if any referenced entity is gone.
+        """
+        response = self._get_normalized(endpoint_name, request, entity, tags)
+        if self.metrics is not None:
+            self.metrics.lookup(response)
+        return response
+
+    def _get_normalized(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        entity: Entity,
+        tags: Iterable[str | Tag],
+    ) -> Optional[TResponse]:
+        cached = self._backend.get(self.key_from_req(endpoint_name, request))
+        if cached is not None:
+            return self._resolve(cached)
+        for key in self._entity_lookups(entity, tags):
+            if (item := self._backend.get(key)) is not None:
+                return item
+        return None
+
+    async def aget_normalized(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        entity: Entity,
+        tags: Iterable[str | Tag],
+    ) -> Optional[TResponse]:
+        """Get a response stored with `aset_normalized`."""
+        response = await self._aget_normalized(endpoint_name, request, entity, tags)
+        if self.metrics is not None:
+            self.metrics.lookup(response)
+        return response
+
+    async def _aget_normalized(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        entity: Entity,
+        tags: Iterable[str | Tag],
+    ) -> Optional[TResponse]:
+        cached = await self._backend.aget(self.key_from_req(endpoint_name, request))
+        if cached is not None:
+            return await self._aresolve(cached)
+        for key in self._entity_lookups(entity, tags):
+            if (item := await self._backend.aget(key)) is not None:
+                return item
+        return None
+
+    def set_normalized(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        entity: Entity,
+        tags: Iterable[str | Tag],
+        response: TResponse,
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Set a response, storing each entity it contains only once."""
+        ttl = self._entry_ttl(self.key_from_req(endpoint_name, request), ttl)
+        refs, entities = self._normalize(entity, response)
+        for key, item in entities.items():
+            self._backend.set(key, item, ttl=ttl)
+        self.set(endpoint_name, request, tags, refs, ttl=ttl)
+
+    async def aset_normalized(
+        self,
+        endpoint_name: str,
+        request: EndpointDefinitionGen,
+        entity: Entity,
+        tags: Iterable[str | Tag],
+        response: TResponse,
+        ttl: Optional[int] = None,
+    ) -> None:
+        """Set a response, storing each entity it contains only once."""
+        ttl = self._entry_ttl(self.key_from_req(endpoint_name, request), ttl)
+        refs, entities = self._normalize(entity, response)
+        await asyncio.gather(
+            *(self._backend.aset(key, item, ttl=ttl) for key, item in entities.items())
+        )
+        await self.aset(endpoint_name, request, tags, refs, ttl=ttl)
+
+    def keys_for_tags(self, tags: Iterable[str | Tag]) -> list[str]:
+        """Return the request keys currently indexed under `tags`."""
+        keys = (self._backend.get(self.key_from_tag(tag)) for tag in tags)
+        return list(dict.fromkeys(key for key in keys if key))
+
+    async def akeys_for_tags(self, tags: Iterable[str | Tag]) -> list[str]:
+        """Return the request keys currently indexed under `tags`."""
+        keys = await asyncio.gather(
+            *(self._backend.aget(self.key_from_tag(tag)) for tag in tags)
+        )
+        return list(dict.fromkeys(key for key in keys if key))
+
+    def patch(
+        self,
+        key: str,
+        update: Callable[[TResponse], TResponse],
+        ttl: Optional[int] = None,
+    ) -> Optional[TResponse]:
+        """Replace a cached response by `update(response)` in place.
+
+        Normalized responses are resolved before `update` sees them, and the
+        result is normalized again, so patched entities are seen by every
+        response referencing them. Does nothing if `key` is not cached.
+
+        Returns the response as it was before the patch, or None.
+        """
+        cached = self._backend.get(key)
+        previous = self._resolve(cached) if cached is not None else None
+        if previous is None:
+            return None
+        patched = update(previous)
+        ttl = self._entry_ttl(key, ttl)
+        if isinstance(cached, dict) and _ENTITY in cached:
+            refs, entities = self._normalize(Entity(*cached[_ENTITY]), patched)
+            for entity_key, item in entities.items():
+                self._backend.set(entity_key, item, ttl=ttl)
+            patched = refs
+        self._backend.set(key, patched, ttl=ttl)
+        return previous
+
+    async def apatch(
+        self,
+        key: str,
+        update: Callable[[TResponse], TResponse],
+        ttl: Optional[int] = None,
+    ) -> Optional[TResponse]:
+        """Replace a cached response by `update(response)` in place."""
+        cached = await self._backend.aget(key)
+        previous = await self._aresolve(cached) if cached is not None else None
+        if previous is None:
+            return None
+        patched = update(previous)
+        ttl = self._entry_ttl(key, ttl)
+        if isinstance(cached, dict) and _ENTITY in cached:
+            refs, entities = self._normalize(Entity(*cached[_ENTITY]), patched)
+            await asyncio.gather(
+                *(self._backend.aset(k, item, ttl=ttl) for k, item in entities.items())
+            )
+            patched = refs
+        await self._backend.aset(key, patched, ttl=ttl)
+        return previous
+
     def get_by_request(
         self,
         endpoint_name: str,
         request: EndpointDefinitionGen,
     ) -> Optional[TResponse]:
         key = self.key_from_req(endpoint_name, request)
-        return self._backend.get(key)
+        response = self._backend.get(key)
+        if self.metrics is not None:
+            self.metrics.lookup(response)
+        return response
 
     async def aget_by_request(
         self,
@@ -74,7 +424,10 @@ class Cache(Generic[EndpointDefinitionGen, TResponse]):
     ) -> Optional[TResponse]:
         """Get a response from the cache by request."""
         key = self.key_from_req(endpoint_name, request)
-        return await self._backend.aget(key)
+        response = await self._backend.aget(key)
+        if self.metrics is not None:
+            self.metrics.lookup(response)
+        return response
 
     def get_by_tags(
         self,
@@ -108,6 +461,7 @@ class Cache(Generic[EndpointDefinitionGen, TResponse]):
     ) -> None:
         """Set a response in the cache."""
         request_key = self.key_from_req(endpoint_name, request)
+        ttl = self._entry_ttl(request_key, ttl)
         self._backend.set(request_key, response, ttl=ttl)
         for tag in tags:
             key = self.key_from_tag(tag)
@@ -123,6 +477,7 @@ class Cache(Generic[EndpointDefinitionGen, TResponse]):
     ) -> None:
         """Set a response in the cache."""
         request_def_key = self.key_from_req(endpoint_name, request)
+        ttl = self._entry_ttl(request_def_key, ttl)
         async with asyncio.TaskGroup() as tg:
             tg.create_task(self._backend.aset(request_def_key, response, ttl=ttl))
             for tag in tags:
@@ -136,7 +491,11 @@ class Cache(Generic[EndpointDefinitionGen, TResponse]):
             if i == 0:
                 if (request_key := self._backend.get(tag_key)):
                     self._backend.delete(request_key)
+                    if self.metrics is not None:
+                        self.metrics.evictions += 1
             self._backend.delete(tag_key)
+            if isinstance(tag, Tag) and tag.id is not None:
+                self._backend.delete(self.key_from_entity(tag))
 
     async def ainvalidate_tags(
         self, endpoint_name: str, tags: Iterable[str | Tag]
@@ -148,5 +507,127 @@ class Cache(Generic[EndpointDefinitionGen, TResponse]):
                 if i == 0:
                     if (request_key := await self._backend.aget(tag_key)):
                         tg.create_task(self._backend.adelete(request_key))
+                        if self.metrics is not None:
+                            self.metrics.evictions += 1
                 tg.create_task(self._backend.adelete(tag_key))
+                if isinstance(tag, Tag) and tag.id is not None:
+                    tg.create_task(self._backend.adelete(self.key_from_entity(tag)))
+
+    def _snapshot_backend(self) -> SnapshotBackend:
+        if not callable(getattr(self._backend, "items", None)):
+            raise TypeError(
+                f"{type(self._backend).__name__} does not support snapshots."
+            )
+        return self._backend  # type: ignore[return-value]
+
+    def export_snapshot(self, path: str | os.PathLike[str]) -> int:
+        """Write all live entries, tag index included, to a JSON lines file.
+
+        Cached values must be JSON serializable. Returns the number of
+        entries written.
+
+        Example:
+            ```python
+            api.cache.export_snapshot("warm.jsonl")
+            # in a freshly started worker
+            api.cache.import_snapshot("warm.jsonl")
+            ```
+        """
+        backend = self._snapshot_backend()
+        count = 0
+        with open(path, "w", encoding="utf-8") as file:
+            header = {
+                "format": _SNAPSHOT_FORMAT,
+                "version": _SNAPSHOT_VERSION,
+                "exported_at": time.time(),
+            }
+            file.write(json.dumps(header) + "\n")
+            for key, value, ttl in backend.items():
+                file.write(json.dumps({"key": key, "value": value, "ttl": ttl}) + "\n")
+                count += 1
+        return count
+
+    def import_snapshot(self, path: str | os.PathLike[str]) -> int:
+        """Load entries written by `export_snapshot`.
+
+        Entries keep the lifetime they had left at export time, minus the
+        time elapsed since; entries that expired in between are skipped.
+        Returns the number of entries loaded.
+        """
+        count = 0
+        with open(path, encoding="utf-8") as file:
+            header = json.loads(file.readline() or "null")
+            if not isinstance(header, dict) or header.get("format") != _SNAPSHOT_FORMAT:
+                raise ValueError(f"{os.fspath(path)} is not a cache snapshot.")
+            if header.get("version") != _SNAPSHOT_VERSION:
+                raise ValueError(
+                    f"Unsupported cache snapshot version {header.get('version')!r}."
+                )
+            elapsed = max(time.time() - header["exported_at"], 0.0)
+            for line in file:
+                entry = json.loads(line)
+                ttl = entry["ttl"]
+                if ttl is not None:
+                    ttl -= elapsed
+                    if ttl <= 0:
+                        continue
+                    ttl = math.ceil(ttl)
+                self._backend.set(entry["key"], entry["value"], ttl=ttl)
+                count += 1
+        return count
+
+
+@dataclass(eq=False)
+class QueryRef(Generic[EndpointDefinitionGen]):
+    """A reference to one cached query, returned by `Api.retain`.
+
+    While held, the query's cache entry does not expire. Use it as a (sync
+    or async) context manager, or call `acquire`/`release` explicitly; both
+    are idempotent.
+
+    Example:
+        ```python
+        with api.retain(get_repo_issues, owner="octocat", repo="hello-world"):
+            issues = get_repo_issues(owner="octocat", repo="hello-world", is_async=False)
+        ```
+    """
+
+    cache: Cache
+    endpoint_name: str
+    request: EndpointDefinitionGen
+    tags: Iterable[str | Tag] = ()
+    held: bool = False
+
+    def acquire(self) -> "QueryRef[EndpointDefinitionGen]":
+        if not self.held:
+            self.held = True
+            self.cache.retain(self.endpoint_name, self.request, self.tags)
+        return self
+
+    def release(self) -> None:
+        if self.held:
+            self.held = False
+            self.cache.release(self.endpoint_name, self.request, self.tags)
+
+    async def aacquire(self) -> "QueryRef[EndpointDefinitionGen]":
+        if not self.held:
+            self.held = True
+            await self.cache.aretain(self.endpoint_name, self.request, self.tags)
+        return self
+
+    async def arelease(self) -> None:
+        if self.held:
+            self.held = False
+            await self.cache.arelease(self.endpoint_name, self.request, self.tags)
+
+    def __enter__(self) -> "QueryRef[EndpointDefinitionGen]":
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "QueryRef[EndpointDefinitionGen]":
+        return await self.aacquire()
 
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.arelease()
@@ -0,0 +1,134 @@
+import json
+import re
+from typing import Any, Optional, Protocol
+
+
+class JSONCodec(Protocol):
+    """Protocol defining how JSON is encoded and decoded on the wire and in caches.
+
+    Methods:
+        dumps: Encode a value to UTF-8 JSON bytes
+        loads: Decode JSON bytes or text to a value
+    """
+
+    name: str
+
+    def dumps(self, value: Any) -> bytes:
+        """Encode a value to UTF-8 JSON bytes."""
+        ...
+
+    def loads(self, data: bytes | str) -> Any:
+        """Decode JSON bytes or text to a value."""
+        ...
+
+
+# 19 digits in a row may be an integer outside the 64-bit range, which the
+# native decoders silently turn into a float. Such payloads, along with
+# long decimal strings or fractions that merely look alike, are decoded by
+# the standard library instead.
+_WIDE_NUMBER = re.compile(rb"\d{19}")
+_WIDE_NUMBER_TEXT = re.compile(r"\d{19}")
+
+
+def _may_hold_wide_ints(data: bytes | str) -> bool:
+    pattern = _WIDE_NUMBER_TEXT if isinstance(data, str) else _WIDE_NUMBER
+    return pattern.search(data) is not None
+
+
+class StdlibCodec:
+    """JSON codec based on the standard library `json` module."""
+
+    name = "stdlib"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """JSON codec based on `orjson`.
+
+    Values orjson cannot encode, such as integers wider than 64 bits, are
+    encoded with the standard library instead, and payloads that may hold
+    such integers are decoded with it too, as orjson would turn them into
+    floats.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+        self._error = orjson.JSONEncodeError
+        self._options = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return self._dumps(value, option=self._options)
+        except self._error:
+            return json.dumps(value).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> Any:
+        if _may_hold_wide_ints(data):
+            return json.loads(data)
+        return self._loads(data)
+
+
+class MsgspecCodec:
+    """JSON codec based on `msgspec.json`.
+
+    Like `OrjsonCodec`, falls back to the standard library for integers
+    wider than 64 bits.
+    """
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._encode = msgspec.json.Encoder().encode
+        self._decode = msgspec.json.Decoder().decode
+        self._error = (TypeError, OverflowError, msgspec.EncodeError)
+
+    def dumps(self, value: Any) -> bytes:
+        try:
+            return self._encode(value)
+        except self._error:
+            return json.dumps(value).encode("utf-8")
+
+    def loads(self, data: bytes | str) -> Any:
+        if _may_hold_wide_ints(data):
+            return json.loads(data)
+        return self._decode(data)
+
+
+_default: Optional[JSONCodec] = None
+
+
+def get_codec() -> JSONCodec:
+    """Return the codec used by the protocol modules and cache serializers.
+
+    Defaults to the fastest one installed: orjson, then msgspec, then the
+    standard library.
+    """
+    global _default
+    if _default is None:
+        for factory in (OrjsonCodec, MsgspecCodec):
+            try:
+                _default = factory()
+                break
+            except ImportError:
+                continue
+        else:
+            _default = StdlibCodec()
+    return _default
+
+
+def set_codec(codec: JSONCodec) -> None:
+    """Replace the default codec, e.g. `set_codec(StdlibCodec())`."""
+    global _default
+    _default = codec
@@ -0,0 +1,145 @@
+import contextvars
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Generic, Iterable, Iterator, Mapping, Optional, TypeVar
+
+import httpx
+
+
+T = TypeVar("T")
+
+_pooled_client: ContextVar[Optional[httpx.Client]] = ContextVar(
+    "pomdapi_pooled_client", default=None
+)
+
+
+@contextmanager
+def sync_client() -> Iterator[httpx.Client]:
+    """Yield the pooled client of the current `map_sync` call, or a fresh one.
+
+    Fresh clients are closed on exit; the pooled client is kept open so its
+    connections are reused by the following calls.
+    """
+    client = _pooled_client.get()
+    if client is not None:
+        yield client
+        return
+    with httpx.Client() as client:
+        yield client
+
+
+class SyncMap(Generic[T]):
+    """Results of calling an endpoint for many sets of arguments on a thread pool.
+
+    Iterating yields the result of each call, in input order if `ordered`
+    or as soon as each completes otherwise. At most `workers` calls are
+    submitted at once and `kwargs_iter` is consumed lazily. A call taking
+    longer than `timeout` seconds from its submission fails with
+    `TimeoutError`; it is abandoned, as threads cannot be interrupted.
+
+    The first failing call raises and cancels the calls not yet started,
+    unless `return_exceptions` is set, in which case the error is yielded
+    in place of its result. `cancel()`, leaving a `with` block or closing
+    the iterator early cancels the remaining calls too.
+    """
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        call: Callable[..., T],
+        kwargs_iter: Iterable[Mapping[str, Any]],
+        workers: int,
+        ordered: bool = True,
+        timeout: Optional[float] = None,
+        return_exceptions: bool = False,
+        client: Optional[httpx.Client] = None,
+    ) -> None:
+        self._executor = executor
+        self._call = call
+        self._pending = iter(kwargs_iter)
+        self._workers = workers
+        self._ordered = ordered
+        self._timeout = timeout
+        self._return_exceptions = return_exceptions
+        self._client = client
+        self._inflight: deque[tuple[Future, float]] = deque()
+        self._cancelled = False
+
+    def _submit(self) -> None:
+        """Top up the calls in flight to `workers`."""
+        while not self._cancelled and len(self._inflight) < self._workers:
+            kwargs = next(self._pending, None)
+            if kwargs is None:
+                return
+            context = contextvars.copy_context()
+            context.run(_pooled_client.set, self._client)
+            future = self._executor.submit(context.run, self._call, **kwargs)
+            deadline = time.monotonic() + self._timeout if self._timeout is not None else float("inf")
+            self._inflight.append((future, deadline))
+
+    def _outcome(self, future: Future) -> T:
+        error = future.exception()
+        if error is None:
+            return future.result()
+        if self._return_exceptions:
+            return error  # type: ignore[return-value]
+        self.cancel()
+        raise error
+
+    def _expired(self, future: Future) -> T:
+        future.cancel()
+        error = TimeoutError(f"The call did not finish within {self._timeout}s.")
+        if self._return_exceptions:
+            return error  # type: ignore[return-value]
+        self.cancel()
+        raise error
+
+    def __iter__(self) -> Iterator[T]:
+        try:
+            self._submit()
+            while self._inflight:
+                if self._ordered:
+                    future, deadline = self._inflight.popleft()
+                    done, _ = wait([future], timeout=_remaining(deadline))
+                    yield self._outcome(future) if done else self._expired(future)
+                else:
+                    deadline = min(d for _, d in self._inflight)
+                    done, _ = wait(
+                        [f for f, _ in self._inflight],
+                        timeout=_remaining(deadline),
+                        return_when=FIRST_COMPLETED,
+                    )
+                    now = time.monotonic()
+                    for entry in list(self._inflight):
+                        future, deadline = entry
+                        if future in done:
+                            self._inflight.remove(entry)
+                            yield self._outcome(future)
+                        elif deadline <= now:
+                            self._inflight.remove(entry)
+                            yield self._expired(future)
+                self._submit()
+        finally:
+            self.cancel()
+
+    def cancel(self) -> None:
+        """Stop submitting calls and cancel those not yet started."""
+        self._cancelled = True
+        for future, _ in self._inflight:
+            future.cancel()
+        self._inflight.clear()
+
+    def __enter__(self) -> "SyncMap[T]":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.cancel()
+
+
+def _remaining(deadline: float) -> Optional[float]:
+    if deadline == float("inf"):
+        return None
+    return max(deadline - time.monotonic(), 0)
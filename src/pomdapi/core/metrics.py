@@ -0,0 +1,369 @@
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+
+from pomdapi.core.middleware import CallContext, Middleware
+
+if TYPE_CHECKING:
+    from pomdapi.core.api import Api
+    from pomdapi.core.caching import Cache
+
+
+class Histogram:
+    """Log-linear histogram of non-negative integers, in the style of HdrHistogram.
+
+    Values below `2**precision` are counted exactly. Larger values fall in
+    buckets at most `1 / 2**(precision - 1)` of their value wide, so
+    quantiles carry a bounded relative error (about 3% with the default
+    precision) while recording costs a few integer operations.
+
+    Attributes:
+        count: Number of recorded values.
+        total: Sum of recorded values.
+        max: Largest recorded value.
+    """
+
+    __slots__ = ("_bits", "_sub", "_half", "counts", "count", "total", "max")
+
+    def __init__(self, precision: int = 6):
+        self._bits = precision
+        self._sub = 1 << precision
+        self._half = self._sub >> 1
+        self.counts = [0] * self._sub
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        if value < self._sub:
+            index = max(value, 0)
+        else:
+            shift = value.bit_length() - self._bits
+            index = self._sub + (shift - 1) * self._half + (value >> shift) - self._half
+            if index >= len(self.counts):
+                self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def _upper(self, index: int) -> int:
+        """Return the largest value counted in a bucket."""
+        if index < self._sub:
+            return index
+        shift, offset = divmod(index - self._sub, self._half)
+        return ((offset + self._half + 1) << (shift + 1)) - 1
+
+    def quantile(self, q: float) -> int:
+        """Return an upper estimate of the `q` quantile, or 0 when empty."""
+        if not self.count:
+            return 0
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+
+@dataclass(eq=False)
+class EndpointMetrics:
+    """Statistics of one endpoint's upstream calls.
+
+    Attributes:
+        latency: Call latency in microseconds.
+        payload: Response body sizes in bytes.
+        in_flight: Calls currently running.
+        errors: Calls that raised.
+    """
+
+    latency: Histogram = field(default_factory=Histogram)
+    payload: Histogram = field(default_factory=Histogram)
+    in_flight: int = 0
+    errors: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _start(self) -> int:
+        with self._lock:
+            self.in_flight += 1
+        return time.perf_counter_ns()
+
+    def _finish(self, started: int, failed: bool) -> None:
+        elapsed = (time.perf_counter_ns() - started) // 1000
+        with self._lock:
+            self.in_flight -= 1
+            self.latency.record(elapsed)
+            if failed:
+                self.errors += 1
+
+    def record_payload(self, size: int) -> None:
+        with self._lock:
+            self.payload.record(size)
+
+
+@dataclass(eq=False)
+class CacheMetrics:
+    """Lookup counters of one cache backend.
+
+    Counters are updated without locking, so under heavy thread contention a
+    few increments may be lost.
+
+    Attributes:
+        backend: Label of the backend.
+        hits: Lookups answered from the cache.
+        misses: Lookups that found nothing, including stale entries.
+        stale: Lookups that found an expired entry.
+        evictions: Live entries removed before expiring, by tag
+            invalidation or to make room.
+    """
+
+    backend: str
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    evictions: int = 0
+
+    def lookup(self, response: Any) -> None:
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+_current: ContextVar[Optional[EndpointMetrics]] = ContextVar(
+    "pomdapi_endpoint_metrics", default=None
+)
+
+
+def record_payload(size: int) -> None:
+    """Record a response body size for the endpoint being called.
+
+    Called by the protocol modules; does nothing unless the call runs
+    through an instrumented api.
+    """
+    stats = _current.get()
+    if stats is not None:
+        stats.record_payload(size)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics(Middleware):
+    """Collects latency, in-flight, payload and cache statistics.
+
+    `instrument(api)` adds the collector to the api's middleware and to its
+    cache. Apis and caches that are not instrumented record nothing and pay
+    nothing for it: the middleware is not composed into their calls, and
+    caches skip a single `None` check.
+
+    Statistics are exported as a Prometheus text snapshot with
+    `prometheus()`, as a dict with `snapshot()`, or pushed periodically to a
+    callback with `report_every()`.
+
+    Attributes:
+        namespace: Prefix of the exported metric names.
+        endpoints: Statistics per endpoint name.
+        caches: Counters per cache backend label.
+
+    Example:
+        ```python
+        metrics = Metrics()
+        metrics.instrument(api)
+        ...
+        print(metrics.prometheus())
+        ```
+    """
+
+    quantiles = (0.5, 0.9, 0.99)
+
+    def __init__(self, namespace: str = "pomdapi"):
+        self.namespace = namespace
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.caches: dict[str, CacheMetrics] = {}
+        self._lock = threading.Lock()
+
+    def instrument(self, api: "Api") -> "Api":
+        """Record the calls of `api` and the lookups of its cache."""
+        if self not in api.middleware:
+            api.use(self)
+        if api.cache is not None:
+            self.instrument_cache(api.cache)
+        return api
+
+    def instrument_cache(self, cache: "Cache", name: Optional[str] = None) -> CacheMetrics:
+        """Record the lookups of `cache` under `name`, by default its backend's class name.
+
+        Caches instrumented under the same name share their counters.
+        """
+        name = name or type(cache._backend).__name__
+        with self._lock:
+            stats = self.caches.get(name)
+            if stats is None:
+                stats = self.caches[name] = CacheMetrics(name)
+        cache.metrics = stats
+        if hasattr(cache._backend, "metrics"):
+            cache._backend.metrics = stats
+        return stats
+
+    def endpoint(self, name: str) -> EndpointMetrics:
+        stats = self.endpoints.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.endpoints.setdefault(name, EndpointMetrics())
+        return stats
+
+    def transport(self, ctx: CallContext, call_next: Callable[[CallContext], Any]) -> Any:
+        stats = self.endpoint(ctx.endpoint_name)
+        token = _current.set(stats)
+        started = stats._start()
+        failed = True
+        try:
+            response = call_next(ctx)
+            failed = False
+            return response
+        finally:
+            stats._finish(started, failed)
+            _current.reset(token)
+
+    async def atransport(
+        self, ctx: CallContext, call_next: Callable[[CallContext], Awaitable[Any]]
+    ) -> Any:
+        stats = self.endpoint(ctx.endpoint_name)
+        token = _current.set(stats)
+        started = stats._start()
+        failed = True
+        try:
+            response = await call_next(ctx)
+            failed = False
+            return response
+        finally:
+            stats._finish(started, failed)
+            _current.reset(token)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return the current statistics as plain data."""
+        endpoints = {}
+        for name, stats in list(self.endpoints.items()):
+            with stats._lock:
+                endpoints[name] = {
+                    "count": stats.latency.count,
+                    "errors": stats.errors,
+                    "in_flight": stats.in_flight,
+                    "latency_seconds": {
+                        **{
+                            f"p{round(q * 100)}": stats.latency.quantile(q) / 1e6
+                            for q in self.quantiles
+                        },
+                        "max": stats.latency.max / 1e6,
+                        "sum": stats.latency.total / 1e6,
+                    },
+                    "payload_bytes": {
+                        **{
+                            f"p{round(q * 100)}": stats.payload.quantile(q)
+                            for q in self.quantiles
+                        },
+                        "max": stats.payload.max,
+                        "sum": stats.payload.total,
+                        "count": stats.payload.count,
+                    },
+                }
+        caches = {
+            name: {
+                "hits": stats.hits,
+                "misses": stats.misses,
+                "stale": stats.stale,
+                "evictions": stats.evictions,
+                "hit_ratio": stats.hit_ratio,
+            }
+            for name, stats in list(self.caches.items())
+        }
+        return {"endpoints": endpoints, "caches": caches}
+
+    def prometheus(self) -> str:
+        """Return the current statistics in the Prometheus text exposition format."""
+        ns = self.namespace
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help: str) -> None:
+            lines.append(f"# HELP {ns}_{name} {help}")
+            lines.append(f"# TYPE {ns}_{name} {kind}")
+
+        def summary(name: str, histogram: Histogram, labels: str, scale: float) -> None:
+            for q in self.quantiles:
+                value = histogram.quantile(q) / scale
+                lines.append(f'{ns}_{name}{{{labels},quantile="{q}"}} {value}')
+            lines.append(f"{ns}_{name}_sum{{{labels}}} {histogram.total / scale}")
+            lines.append(f"{ns}_{name}_count{{{labels}}} {histogram.count}")
+
+        endpoints = sorted(self.endpoints.items())
+        if endpoints:
+            family("request_duration_seconds", "summary", "Latency of upstream calls.")
+            for name, stats in endpoints:
+                with stats._lock:
+                    summary(
+                        "request_duration_seconds",
+                        stats.latency,
+                        f'endpoint="{_escape(name)}"',
+                        1e6,
+                    )
+            family("requests_in_flight", "gauge", "Upstream calls currently running.")
+            for name, stats in endpoints:
+                lines.append(
+                    f'{ns}_requests_in_flight{{endpoint="{_escape(name)}"}} {stats.in_flight}'
+                )
+            family("request_errors_total", "counter", "Upstream calls that raised.")
+            for name, stats in endpoints:
+                lines.append(
+                    f'{ns}_request_errors_total{{endpoint="{_escape(name)}"}} {stats.errors}'
+                )
+            family("response_size_bytes", "summary", "Size of upstream response bodies.")
+            for name, stats in endpoints:
+                with stats._lock:
+                    summary(
+                        "response_size_bytes",
+                        stats.payload,
+                        f'endpoint="{_escape(name)}"',
+                        1,
+                    )
+
+        caches = sorted(self.caches.items())
+        if caches:
+            family("cache_lookups_total", "counter", "Cache lookups by result.")
+            for name, stats in caches:
+                label = _escape(name)
+                lines.append(f'{ns}_cache_lookups_total{{backend="{label}",result="hit"}} {stats.hits}')
+                lines.append(f'{ns}_cache_lookups_total{{backend="{label}",result="miss"}} {stats.misses}')
+            family("cache_stale_total", "counter", "Cache lookups that found an expired entry.")
+            for name, stats in caches:
+                lines.append(f'{ns}_cache_stale_total{{backend="{_escape(name)}"}} {stats.stale}')
+            family("cache_evictions_total", "counter", "Live cache entries removed before expiring.")
+            for name, stats in caches:
+                lines.append(f'{ns}_cache_evictions_total{{backend="{_escape(name)}"}} {stats.evictions}')
+        return "\n".join(lines) + "\n"
+
+    def report_every(
+        self, interval: float, callback: Callable[[dict[str, Any]], None]
+    ) -> Callable[[], None]:
+        """Call `callback(snapshot())` every `interval` seconds from a daemon thread.
+
+        Returns a function that stops reporting.
+        """
+        stop = threading.Event()
+
+        def run() -> None:
+            while not stop.wait(interval):
+                callback(self.snapshot())
+
+        threading.Thread(target=run, name="pomdapi-metrics", daemon=True).start()
+        return stop.set
@@ -0,0 +1,132 @@
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Awaitable, Callable, Iterable, Optional, Sequence
+
+from pomdapi.core.types import EndpointDefinition, Tag
+
+
+@dataclass(eq=False, slots=True)
+class CallContext:
+    """State of one endpoint call, handed to every middleware hook.
+
+    Attributes:
+        api: The `Api` running the call.
+        endpoint_name: Name of the called endpoint.
+        endpoint: Definition of the called endpoint.
+        is_async: Whether the call runs on the event loop.
+        args: Positional arguments of the call.
+        kwargs: Keyword arguments of the call.
+        request: The request definition, once the request function ran.
+        tags: Tags provided by the request function.
+        state: Free-form storage for middleware, e.g. start times.
+    """
+
+    api: Any
+    endpoint_name: str
+    endpoint: EndpointDefinition
+    is_async: bool
+    args: tuple
+    kwargs: dict
+    request: Any = None
+    tags: Optional[Iterable[str | Tag]] = None
+    state: dict[str, Any] = field(default_factory=dict)
+
+
+class Middleware:
+    """Base class for middleware wrapping the stages of endpoint calls.
+
+    Override the hooks to wrap; each receives the `CallContext` and
+    `call_next`, which runs the rest of the chain. Hooks that are not
+    overridden are left out of the composed chain, so they cost nothing.
+
+    - `call` / `acall` wrap a whole sync / async call of an endpoint
+      function, from its arguments to the validated response.
+    - `resolve` wraps the request function, returning the request
+      definition and the tags it provides.
+    - `transport` / `atransport` wrap the sync / async base query function
+      of queries and mutations.
+    - `cache_lookup` wraps the cache lookup of queries and returns the cached
+      response or None. It runs synchronously for sync and async calls alike.
+    - `validate` wraps the validation of a raw response into the endpoint's
+      response type.
+
+    Example:
+        ```python
+        class Retry(Middleware):
+            def transport(self, ctx, call_next):
+                try:
+                    return call_next(ctx)
+                except httpx.TransportError:
+                    return call_next(ctx)
+
+        api.use(Retry())
+        ```
+    """
+
+    def call(self, ctx: CallContext, call_next: Callable[[CallContext], Any]) -> Any:
+        return call_next(ctx)
+
+    async def acall(
+        self, ctx: CallContext, call_next: Callable[[CallContext], Awaitable[Any]]
+    ) -> Any:
+        return await call_next(ctx)
+
+    def resolve(
+        self, ctx: CallContext, call_next: Callable[[CallContext], Any]
+    ) -> tuple[Any, Optional[Iterable[str | Tag]]]:
+        return call_next(ctx)
+
+    def transport(self, ctx: CallContext, call_next: Callable[[CallContext], Any]) -> Any:
+        return call_next(ctx)
+
+    async def atransport(
+        self, ctx: CallContext, call_next: Callable[[CallContext], Awaitable[Any]]
+    ) -> Any:
+        return await call_next(ctx)
+
+    def cache_lookup(
+        self, ctx: CallContext, call_next: Callable[[CallContext], Any]
+    ) -> Any:
+        return call_next(ctx)
+
+    def validate(
+        self,
+        ctx: CallContext,
+        response: Any,
+        call_next: Callable[[CallContext, Any], Any],
+    ) -> Any:
+        return call_next(ctx, response)
+
+
+def compose(middleware: Sequence[Middleware], hook: str, terminal: Callable) -> Callable:
+    """Wrap `terminal` in the `hook` of each middleware overriding it.
+
+    The first middleware is the outermost. With no overriding middleware,
+    `terminal` itself is returned.
+    """
+    chain = terminal
+    for mw in reversed(middleware):
+        method = getattr(type(mw), hook, None)
+        if method is None or method is getattr(Middleware, hook):
+            continue
+        chain = partial(getattr(mw, hook), call_next=chain)
+    return chain
+
+
+@dataclass(frozen=True)
+class Pipeline:
+    """The composed middleware chains of one endpoint.
+
+    Attributes:
+        inline_hits: Whether no middleware wraps `acall`, so async cache hits
+            may be answered without entering the `acall` chain.
+    """
+
+    call: Callable[[CallContext], Any]
+    acall: Callable[[CallContext], Awaitable[Any]]
+    resolve: Callable[[CallContext], tuple[Any, Optional[Iterable[str | Tag]]]]
+    transport: Callable[[CallContext], Any]
+    atransport: Callable[[CallContext], Awaitable[Any]]
+    cache_lookup: Callable[[CallContext], Any]
+    validate: Callable[[CallContext, Any], Any]
+    inline_hits: bool = False
@@ -1,4 +1,5 @@
 import asyncio
+import threading
 from dataclasses import dataclass, field
 
 
@@ -7,6 +8,10 @@ class AsyncRWLock:
     _readers: int = 0
     _readers_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
     _resource_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Writer-preferring mode: a waiting writer closes the turnstile so that
+    # readers arriving after it queue behind it instead of starving it.
+    fair: bool = False
+    _turnstile: asyncio.Lock = field(default_factory=asyncio.Lock)
 
     def read(self) -> "_ReaderContext":
         return _ReaderContext(self)
@@ -15,6 +20,10 @@ class AsyncRWLock:
         return _WriterContext(self)
 
     async def acquire_reader(self):
+        if self.fair:
+            # Pass through the turnstile; blocks while a writer is waiting
+            async with self._turnstile:
+                pass
         # First, acquire the _readers_lock to adjust count
         async with self._readers_lock:
             self._readers += 1
@@ -30,6 +39,11 @@ class AsyncRWLock:
                 self._resource_lock.release()
 
     async def acquire_writer(self):
+        if self.fair:
+            # Hold the turnstile until the resource is ours
+            async with self._turnstile:
+                await self._resource_lock.acquire()
+            return
         # Writers must acquire the resource lock exclusively
         await self._resource_lock.acquire()
 
@@ -57,3 +71,69 @@ class _WriterContext:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         self._lock.release_writer()
+
+
+@dataclass
+class RWLock:
+    """Thread-based sibling of `AsyncRWLock` for synchronous code."""
+
+    _readers: int = 0
+    _readers_lock: threading.Lock = field(default_factory=threading.Lock)
+    _resource_lock: threading.Lock = field(default_factory=threading.Lock)
+    fair: bool = False
+    _turnstile: threading.Lock = field(default_factory=threading.Lock)
+
+    def read(self) -> "_SyncReaderContext":
+        return _SyncReaderContext(self)
+
+    def write(self) -> "_SyncWriterContext":
+        return _SyncWriterContext(self)
+
+    def acquire_reader(self):
+        if self.fair:
+            with self._turnstile:
+                pass
+        with self._readers_lock:
+            self._readers += 1
+            if self._readers == 1:
+                self._resource_lock.acquire()
+
+    def release_reader(self):
+        with self._readers_lock:
+            self._readers -= 1
+            # The last reader may release a lock taken by another thread;
+            # threading.Lock (unlike RLock) allows this.
+            if self._readers == 0:
+                self._resource_lock.release()
+
+    def acquire_writer(self):
+        if self.fair:
+            with self._turnstile:
+                self._resource_lock.acquire()
+            return
+        self._resource_lock.acquire()
+
+    def release_writer(self):
+        self._resource_lock.release()
+
+
+@dataclass
+class _SyncReaderContext:
+    _lock: RWLock
+
+    def __enter__(self):
+        self._lock.acquire_reader()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._lock.release_reader()
+
+
+@dataclass
+class _SyncWriterContext:
+    _lock: RWLock
+
+    def __enter__(self):
+        self._lock.acquire_writer()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._lock.release_writer()
@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(eq=False)
+class Subscription(Generic[T]):
+    """A subscriber to a shared poller.
+
+    Iterate over it with `async for` to receive every fresh result, or pass a
+    `callback` to `Api.subscribe`. A slow iterator only ever sees the latest
+    result. Errors raised by `callback` or `on_error` are logged, as are
+    fetch errors of a callback subscription without `on_error`. Leave with
+    `unsubscribe()` or by using the subscription as a (sync or async)
+    context manager; the poller stops with its last subscriber.
+
+    Example:
+        ```python
+        async with api.subscribe(get_gas_price, interval=1.0) as prices:
+            async for price in prices:
+                print(price)
+        ```
+    """
+
+    _manager: "SubscriptionManager"
+    _poller: "_Poller"
+    callback: Optional[Callable[[T], Any]] = None
+    on_error: Optional[Callable[[BaseException], Any]] = None
+    _queue: Optional[asyncio.Queue] = None
+    _closed: bool = False
+
+    def _deliver(self, value: Any, error: Optional[BaseException]) -> None:
+        if error is not None:
+            if self.on_error is not None:
+                self.on_error(error)
+            elif self._queue is not None:
+                self._put((None, error))
+            else:
+                logger.error("Polling %s failed", self._poller.key, exc_info=error)
+            return
+        if self.callback is not None:
+            self.callback(value)
+        if self._queue is not None:
+            self._put((value, None))
+
+    def _put(self, item: tuple[Any, Optional[BaseException]]) -> None:
+        assert self._queue is not None
+        # Keep only the freshest result for slow consumers.
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(item)
+
+    def unsubscribe(self) -> None:
+        """Stop receiving results."""
+        if not self._closed:
+            self._closed = True
+            self._manager._unsubscribe(self)
+            if self._queue is not None and not self._queue.full():
+                self._queue.put_nowait((None, StopAsyncIteration()))
+
+    def __aiter__(self) -> "Subscription[T]":
+        if self._queue is None:
+            raise TypeError("Callback subscriptions cannot be iterated.")
+        return self
+
+    async def __anext__(self) -> T:
+        if self._closed and (self._queue is None or self._queue.empty()):
+            raise StopAsyncIteration
+        assert self._queue is not None
+        value, error = await self._queue.get()
+        if error is not None:
+            raise error
+        return value
+
+    def __enter__(self) -> "Subscription[T]":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.unsubscribe()
+
+    async def __aenter__(self) -> "Subscription[T]":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.unsubscribe()
+
+
+@dataclass(eq=False)
+class _Poller(ABC):
+    """Polls one query key and fans results out to its subscribers.
+
+    `loop` is the event loop the poller runs on, None for a thread poller.
+    """
+
+    key: str
+    interval: float
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    subscribers: list[Subscription] = field(default_factory=list)
+    on_stop: Optional[Callable[[], Any]] = None
+
+    def publish(self, value: Any, error: Optional[BaseException] = None) -> None:
+        for subscription in list(self.subscribers):
+            # A failing subscriber must not keep the others from the result.
+            try:
+                subscription._deliver(value, error)
+            except Exception:
+                logger.exception("A subscriber callback for %s failed", self.key)
+
+    @abstractmethod
+    def start(self) -> None:
+        ...
+
+    @abstractmethod
+    def stop(self) -> None:
+        ...
+
+
+@dataclass(eq=False)
+class _AsyncPoller(_Poller):
+    fetch: Optional[Callable[[], Awaitable[Any]]] = None
+    _task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        assert self.loop is not None
+        self._task = self.loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        assert self.fetch is not None
+        while True:
+            try:
+                self.publish(await self.fetch())
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                self.publish(None, error)
+            await asyncio.sleep(self.interval)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+
+@dataclass(eq=False)
+class _ThreadPoller(_Poller):
+    fetch: Optional[Callable[[], Any]] = None
+    _stopped: threading.Event = field(default_factory=threading.Event)
+
+    def start(self) -> None:
+        threading.Thread(
+            target=self._run, name=f"pomdapi-poller:{self.key}", daemon=True
+        ).start()
+
+    def _run(self) -> None:
+        assert self.fetch is not None
+        while not self._stopped.is_set():
+            try:
+                self.publish(self.fetch())
+            except Exception as error:
+                self.publish(None, error)
+            self._stopped.wait(self.interval)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+@dataclass
+class SubscriptionManager:
+    """Keeps one poller per query key, shared by all its subscribers.
+
+    Pollers run as tasks on the caller's event loop, one per loop; when
+    subscribing with a callback outside of an event loop, they run in a
+    daemon thread using the synchronous query path instead.
+    """
+
+    _pollers: dict[
+        tuple[str, Optional[asyncio.AbstractEventLoop]], _Poller
+    ] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def subscribe(
+        self,
+        key: str,
+        interval: float,
+        fetch: Callable[[], Awaitable[Any]],
+        fetch_sync: Callable[[], Any],
+        callback: Optional[Callable[[Any], Any]] = None,
+        on_error: Optional[Callable[[BaseException], Any]] = None,
+        on_start: Optional[Callable[[], Any]] = None,
+        on_stop: Optional[Callable[[], Any]] = None,
+    ) -> Subscription:
+        """Subscribe to `key`, starting its poller if needed.
+
+        `on_start` and `on_stop` are called when the poller for `key` starts
+        and stops, not for every subscriber.
+        """
+        loop: Optional[asyncio.AbstractEventLoop]
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if callback is None:
+                raise RuntimeError(
+                    "Iterating a subscription requires a running event loop; "
+                    "pass a callback to subscribe from synchronous code."
+                )
+            loop = None
+
+        with self._lock:
+            poller = self._pollers.get((key, loop))
+            created = poller is None
+            if poller is None:
+                if loop is not None:
+                    poller = _AsyncPoller(key, interval, loop, fetch=fetch)
+                else:
+                    poller = _ThreadPoller(key, interval, fetch=fetch_sync)
+                poller.on_stop = on_stop
+                self._pollers[(key, loop)] = poller
+            poller.interval = min(poller.interval, interval)
+            subscription = Subscription(
+                self,
+                poller,
+                callback=callback,
+                on_error=on_error,
+                _queue=asyncio.Queue(maxsize=1) if callback is None else None,
+            )
+            poller.subscribers.append(subscription)
+        if created:
+            if on_start is not None:
+                on_start()
+            poller.start()
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        poller = subscription._poller
+        with self._lock:
+            if subscription in poller.subscribers:
+                poller.subscribers.remove(subscription)
+            if poller.subscribers:
+                return
+            if self._pollers.get((poller.key, poller.loop)) is poller:
+                del self._pollers[(poller.key, poller.loop)]
+        poller.stop()
+        if poller.on_stop is not None:
+            poller.on_stop()
+
+    @property
+    def active(self) -> int:
+        """Number of running pollers."""
+        return len(self._pollers)
@@ -0,0 +1,327 @@
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Iterator,
+    Optional,
+    Protocol,
+    Sequence,
+)
+
+from pomdapi.core.middleware import CallContext, Middleware
+
+if TYPE_CHECKING:
+    from pomdapi.core.api import Api
+
+
+@dataclass(eq=False)
+class Span:
+    """One timed phase of a traced call.
+
+    Timestamps come from `time.monotonic_ns()`, so they order phases
+    reliably but are not wall-clock times.
+
+    Attributes:
+        name: Name of the phase, e.g. `"transport"`.
+        trace_id: 128-bit id shared by all spans of a call.
+        span_id: 64-bit id of this span.
+        parent_id: Id of the enclosing span; None for the root span.
+        start_ns: Monotonic start time in nanoseconds.
+        end_ns: Monotonic end time in nanoseconds; None while running.
+        attributes: Details such as the endpoint name or cache result.
+        error: Name of the exception that ended the span, if any.
+    """
+
+    name: str
+    trace_id: int
+    span_id: int
+    parent_id: Optional[int]
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ns(self) -> int:
+        return (self.end_ns or self.start_ns) - self.start_ns
+
+
+class SpanSink(Protocol):
+    """Receives the spans of each traced call once it finished.
+
+    Mirrors the `export`/`shutdown` methods of an OpenTelemetry span
+    exporter.
+    """
+
+    def export(self, spans: Sequence[Span]) -> None:
+        ...
+
+    def shutdown(self) -> None:
+        ...
+
+
+class InMemorySink:
+    """Keeps every exported span in `spans`, for tests and debugging."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def shutdown(self) -> None:
+        pass
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def by_name(self, name: str) -> list[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+class OpenTelemetrySink:
+    """Replays spans through an OpenTelemetry tracer.
+
+    Requires the `opentelemetry-api` package; spans go wherever the
+    configured tracer provider exports them.
+    """
+
+    def __init__(self, tracer: Any = None):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = tracer or trace.get_tracer("pomdapi")
+
+    def export(self, spans: Sequence[Span]) -> None:
+        # Monotonic timestamps are shifted onto the wall clock for export.
+        offset = time.time_ns() - time.monotonic_ns()
+        started = {}
+        for span in spans:
+            parent = started.get(span.parent_id)
+            context = self._trace.set_span_in_context(parent) if parent else None
+            otel_span = self._tracer.start_span(
+                span.name,
+                context=context,
+                start_time=span.start_ns + offset,
+                attributes=span.attributes,
+            )
+            if span.error is not None:
+                otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+            started[span.span_id] = otel_span
+        for span in reversed(spans):
+            started[span.span_id].end(end_time=(span.end_ns or span.start_ns) + offset)
+
+    def shutdown(self) -> None:
+        pass
+
+
+@dataclass(eq=False)
+class Trace:
+    """The spans of one call, nested by start order."""
+
+    trace_id: int = field(default_factory=lambda: random.getrandbits(128))
+    spans: list[Span] = field(default_factory=list)
+    _open: list[Span] = field(default_factory=list)
+
+    @property
+    def root(self) -> Span:
+        return self.spans[0]
+
+    def begin(self, name: str, **attributes: Any) -> Span:
+        span = Span(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=random.getrandbits(64),
+            parent_id=self._open[-1].span_id if self._open else None,
+            start_ns=time.monotonic_ns(),
+            attributes=attributes,
+        )
+        self.spans.append(span)
+        self._open.append(span)
+        return span
+
+    def end(self, span: Span, error: Optional[BaseException] = None) -> None:
+        span.end_ns = time.monotonic_ns()
+        if error is not None:
+            span.error = type(error).__name__
+        if span in self._open:
+            self._open.remove(span)
+
+    @contextmanager
+    def phase(self, name: str, **attributes: Any) -> Iterator[Span]:
+        span = self.begin(name, **attributes)
+        try:
+            yield span
+        except BaseException as error:
+            self.end(span, error)
+            raise
+        self.end(span)
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("pomdapi_trace", default=None)
+_untraced = nullcontext()
+
+
+def current_trace() -> Optional[Trace]:
+    """Return the trace of the call running in this context, if it is sampled."""
+    return _current.get()
+
+
+def phase(name: str, **attributes: Any) -> ContextManager[Any]:
+    """Time a block as a span of the current trace; a no-op when not tracing."""
+    trace = _current.get()
+    if trace is None:
+        return _untraced
+    return trace.phase(name, **attributes)
+
+
+def _httpx_phases(trace: Trace) -> tuple[Callable, Callable]:
+    """Build httpx `trace` extension callbacks recording connection phases.
+
+    httpcore reports phases as `<name>.started` followed by
+    `<name>.complete` or `<name>.failed`, e.g. `connection.connect_tcp` or
+    `http11.receive_response_headers`.
+    """
+    running: dict[str, Span] = {}
+
+    def hook(event: str, info: dict[str, Any]) -> None:
+        name, _, stage = event.rpartition(".")
+        if stage == "started":
+            running[name] = trace.begin(f"httpx.{name}")
+        elif (span := running.pop(name, None)) is not None:
+            trace.end(span, info.get("exception") if stage == "failed" else None)
+
+    async def ahook(event: str, info: dict[str, Any]) -> None:
+        hook(event, info)
+
+    return hook, ahook
+
+
+def httpx_extensions(is_async: bool = False) -> dict[str, Any]:
+    """Request extensions recording httpx connection phases in the current trace.
+
+    Empty when not tracing, so it can be passed to every request.
+    """
+    trace = _current.get()
+    if trace is None:
+        return {}
+    hook, ahook = _httpx_phases(trace)
+    return {"trace": ahook if is_async else hook}
+
+
+class Tracer(Middleware):
+    """Records the phases of endpoint calls as spans.
+
+    A sampled call produces a root span `pomdapi.query` or
+    `pomdapi.mutation` with child spans for the request function,
+    the cache lookup, the transport (including httpx connection phases and
+    JSON decoding for the HTTP based apis), the cache store and the
+    validation. Spans are handed to `sink` when the call finishes.
+
+    Attributes:
+        sink: Receives the spans of each sampled call.
+        sample_rate: Fraction of calls traced, between 0 and 1.
+
+    Example:
+        ```python
+        sink = InMemorySink()
+        Tracer(sink, sample_rate=0.01).instrument(api)
+        ```
+    """
+
+    def __init__(self, sink: SpanSink, sample_rate: float = 1.0):
+        self.sink = sink
+        self.sample_rate = sample_rate
+
+    def instrument(self, api: "Api") -> "Api":
+        if self not in api.middleware:
+            api.use(self)
+        return api
+
+    def _start(self, ctx: CallContext) -> Optional[Trace]:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        trace = Trace()
+        trace.begin(
+            "pomdapi.query" if ctx.endpoint.is_query else "pomdapi.mutation",
+            endpoint=ctx.endpoint_name,
+            is_async=ctx.is_async,
+        )
+        return trace
+
+    def _finish(self, trace: Trace, error: Optional[BaseException]) -> None:
+        trace.end(trace.root, error)
+        self.sink.export(trace.spans)
+
+    def call(self, ctx: CallContext, call_next: Callable[[CallContext], Any]) -> Any:
+        trace = self._start(ctx)
+        if trace is None:
+            return call_next(ctx)
+        token = _current.set(trace)
+        error = None
+        try:
+            return call_next(ctx)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            _current.reset(token)
+            self._finish(trace, error)
+
+    async def acall(
+        self, ctx: CallContext, call_next: Callable[[CallContext], Awaitable[Any]]
+    ) -> Any:
+        trace = self._start(ctx)
+        if trace is None:
+            return await call_next(ctx)
+        token = _current.set(trace)
+        error = None
+        try:
+            return await call_next(ctx)
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            _current.reset(token)
+            self._finish(trace, error)
+
+    def resolve(self, ctx: CallContext, call_next: Callable[[CallContext], Any]) -> Any:
+        with phase("request_fn"):
+            return call_next(ctx)
+
+    def cache_lookup(self, ctx: CallContext, call_next: Callable[[CallContext], Any]) -> Any:
+        trace = _current.get()
+        if trace is None:
+            return call_next(ctx)
+        with trace.phase("cache_lookup") as span:
+            cached = call_next(ctx)
+            span.attributes["hit"] = cached is not None
+        trace.root.attributes["cache_hit"] = cached is not None
+        return cached
+
+    def transport(self, ctx: CallContext, call_next: Callable[[CallContext], Any]) -> Any:
+        with phase("transport"):
+            return call_next(ctx)
+
+    async def atransport(
+        self, ctx: CallContext, call_next: Callable[[CallContext], Awaitable[Any]]
+    ) -> Any:
+        with phase("transport"):
+            return await call_next(ctx)
+
+    def validate(
+        self, ctx: CallContext, response: Any, call_next: Callable[[CallContext, Any], Any]
+    ) -> Any:
+        with phase("validate"):
+            return call_next(ctx, response)
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from typing import (
+    Any,
     Callable,
     Generic,
     Optional,
@@ -22,12 +23,110 @@ class Tag:
     id: Optional[str] = None
 
 
+@dataclass
+class Entity:
+    """Describes the normalized entities contained in an endpoint's responses.
+
+    Responses are either a single entity or a list of entities. Each entity
+    is identified by the tag `Tag(type=type, id=str(item[id_field]))`, so an
+    endpoint providing that tag can be answered from an entity cached by any
+    other endpoint.
+
+    Ids that are only unique within a parent, such as issue numbers within a
+    repository, need a `scope`: a function of the endpoint's arguments
+    returning the parent's identity. The tag id then becomes
+    `f"{scope}/{item[id_field]}"`, and endpoints must provide tags in that
+    form.
+
+    Attributes:
+        type: The entity type, matching `Tag.type`.
+        id_field: The item field holding the entity id, matching `Tag.id`.
+        scope: Computes the scope of the ids from the endpoint's arguments,
+            or the scope itself once bound to a call.
+
+    Example:
+        ```python
+        issue = Entity("Issue", id_field="number", scope=lambda owner, repo, **_: f"{owner}/{repo}")
+
+        @api.query("getRepoIssues", response_type=list[Issue], entity=issue)
+        def get_repo_issues(owner: str, repo: str):
+            ...
+
+        @api.query("getRepoIssue", response_type=Issue, entity=issue)
+        def get_repo_issue(owner: str, repo: str, number: int):
+            return RequestDefinition(...), Tag("Issue", f"{owner}/{repo}/{number}")
+        ```
+    """
+    type: str
+    id_field: str = "id"
+    scope: Optional[str | Callable[..., str]] = None
+
+    def bind(self, *args, **kwargs) -> "Entity":
+        """Return the entity with its scope computed from an endpoint call's arguments."""
+        if not callable(self.scope):
+            return self
+        return Entity(self.type, self.id_field, str(self.scope(*args, **kwargs)))
+
+    def tag_for(self, item: dict) -> Tag:
+        """Returns the tag identifying an entity."""
+        assert not callable(self.scope), "Bind the entity to a call first."
+        if self.scope is None:
+            return Tag(type=self.type, id=str(item[self.id_field]))
+        return Tag(type=self.type, id=f"{self.scope}/{item[self.id_field]}")
+
+
 ProvidesTags = (
     tuple[EndpointDefinitionGen, (str | Tag | Iterable[str | Tag])]
     | tuple[EndpointDefinitionGen, Callable[P, str | Tag | Iterable[str | Tag]]]
 )
 
 
+@dataclass
+class CacheUpdate:
+    """Patches cached query responses when a mutation runs.
+
+    Targets are the entry of `endpoint_name` called with the keyword
+    arguments returned by `query_args`, plus every entry indexed under `tags`.
+    Both can be combined; an entry matched both ways is patched once. Both
+    `query_args` and a callable `tags` receive the mutation's arguments.
+
+    `update` is called as `update(cached, result, *args, **kwargs)` with the
+    cached response, the raw mutation result and the mutation's arguments,
+    and returns the new cached response. With `optimistic=True` it runs
+    before the request with `result=None`, and the previous responses are
+    restored if the request fails.
+
+    Attributes:
+        update: Computes the patched response.
+        endpoint_name: Name of the query endpoint to patch.
+        query_args: Maps the mutation's arguments to the query's kwargs.
+        tags: Tags whose indexed entries are patched.
+        optimistic: Patch before the request and roll back on failure.
+
+    Example:
+        ```python
+        @api.mutation(
+            "createIssue",
+            response_type=Issue,
+            updates=[
+                CacheUpdate(
+                    endpoint_name="getRepoIssues",
+                    query_args=lambda owner, repo, issue_data: {"owner": owner, "repo": repo},
+                    update=lambda issues, created, *args, **kwargs: [*issues, created],
+                )
+            ],
+        )
+        ```
+    """
+    update: Callable[..., Any]
+    endpoint_name: Optional[str] = None
+    query_args: Optional[Callable[..., dict[str, Any]]] = None
+    tags: (
+        str | Tag | Iterable[str | Tag] | Callable[..., str | Tag | Iterable[str | Tag]]
+    ) = ()
+    optimistic: bool = False
+
+
 @dataclass
 class BaseQueryConfig:
     """Defines the base configuration for all API requests.
@@ -61,13 +160,23 @@ class BaseQueryConfig:
 
 @dataclass
 class EndpointDefinition(Generic[EndpointDefinitionGen]):
-    """Defines an endpoint for the API."""
+    """Defines an endpoint for the API.
+
+    `streamed` endpoints, such as paginated and streaming queries, return an
+    iterator over their response from their decorated function; they cannot
+    be called, cached or prefetched through the api.
+    """
 
     request_fn: (
         Callable[..., EndpointDefinitionGen]
         | Callable[..., ProvidesTags[EndpointDefinitionGen, ...]]
     )
     is_query_endpoint: bool = True
+    response_type: Any = None
+    entity: Optional[Entity] = None
+    updates: list[CacheUpdate] = field(default_factory=list)
+    response_tags: Optional[Callable[[Any], Iterable[str | Tag]]] = None
+    streamed: bool = False
 
     @property
     def is_query(self) -> bool:
@@ -0,0 +1,404 @@
+"""Drive the endpoints of an `Api` to measure the throughput it sustains.
+
+Usage:
+    python -m pomdapi.loadtest MODULE:API [--endpoint NAME ...]
+        [--args NAME=GENERATOR ...] [--concurrency N] [--rate PER_SECOND]
+        [--duration SECONDS] [--requests N] [--async]
+        [--stand-in | --base-url URL | --mock MODULE:HANDLER] [--json]
+
+`MODULE:API` names the api object, e.g. `examples.jsonrpc_eth:ethereum_api`.
+Endpoints default to every query endpoint; repeat `--endpoint` to pick
+some, and repeat a name to weight it. Arguments come from `--args`, either
+a JSON object of fixed keyword arguments (`getUser={"id": "1"}`) or a
+`module:function` called with the request number and returning the
+keyword arguments.
+
+Without `--rate`, `--concurrency` workers issue requests back to back
+(closed loop). With `--rate`, requests arrive on a fixed schedule
+regardless of completions (open loop), at most `--concurrency` run at
+once, and latency is measured from the scheduled arrival, so queueing
+behind a saturated api shows up in the percentiles.
+
+`--stand-in` points the api at a local `StandInServer`, `--base-url` at any
+other upstream, and `--mock` routes every httpx client through
+`httpx.MockTransport(HANDLER)`.
+"""
+import argparse
+import asyncio
+import functools
+import importlib
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import httpx
+
+from pomdapi.api.jsonrpc import JSONRPCApi
+from pomdapi.core.api import Api
+from pomdapi.core.metrics import CacheMetrics, Histogram, Metrics
+from pomdapi.testing import StandInServer
+
+
+ArgumentGenerator = Callable[[int], dict[str, Any]]
+
+
+def load_object(spec: str) -> Any:
+    """Import `module:attribute`."""
+    module_name, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Expected MODULE:ATTRIBUTE, got {spec!r}.")
+    obj: Any = importlib.import_module(module_name)
+    for part in attribute.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def argument_generator(spec: str) -> ArgumentGenerator:
+    """Parse an `--args` value: a JSON object or a `module:function`."""
+    if spec.lstrip().startswith("{"):
+        kwargs = json.loads(spec)
+        return lambda i: kwargs
+    return load_object(spec)
+
+
+def error_label(error: BaseException) -> str:
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"HTTP {error.response.status_code}"
+    return type(error).__name__
+
+
+@dataclass(eq=False)
+class EndpointResult:
+    """Outcomes of the requests sent to one endpoint.
+
+    Attributes:
+        latency: Request latency in microseconds.
+        errors: Failed requests by error label.
+    """
+
+    latency: Histogram = field(default_factory=Histogram)
+    ok: int = 0
+    errors: Counter = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, elapsed_ns: int, error: Optional[BaseException]) -> None:
+        with self._lock:
+            self.latency.record(elapsed_ns // 1000)
+            if error is None:
+                self.ok += 1
+            else:
+                self.errors[error_label(error)] += 1
+
+
+@dataclass(eq=False)
+class LoadTest:
+    """A load test of some endpoints of an api.
+
+    Attributes:
+        api: The api under test.
+        endpoints: Endpoint names, one per request slot; requests cycle
+            through them.
+        arguments: Keyword argument generators per endpoint name.
+        concurrency: Maximum requests in flight.
+        rate: Arrivals per second for an open-loop test; None for closed loop.
+        duration: Seconds to run for.
+        requests: Stop after this many requests, if set.
+        is_async: Drive the async endpoint variants on an event loop.
+    """
+
+    api: Api
+    endpoints: list[str]
+    arguments: dict[str, ArgumentGenerator] = field(default_factory=dict)
+    concurrency: int = 8
+    rate: Optional[float] = None
+    duration: float = 10.0
+    requests: Optional[int] = None
+    is_async: bool = False
+    results: dict[str, EndpointResult] = field(init=False)
+    elapsed: float = field(default=0.0, init=False)
+    cache: Optional[CacheMetrics] = field(default=None, init=False)
+    _counter: Any = field(init=False, repr=False)
+    _counter_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self) -> None:
+        if not self.endpoints:
+            raise ValueError("No endpoints to load test.")
+        self.results = {name: EndpointResult() for name in self.endpoints}
+        self._counter = iter(range(self.requests) if self.requests else _forever())
+
+    def _next(self) -> Optional[int]:
+        with self._counter_lock:
+            return next(self._counter, None)
+
+    def _request(self, i: int) -> tuple[str, dict[str, Any]]:
+        name = self.endpoints[i % len(self.endpoints)]
+        generate = self.arguments.get(name)
+        return name, generate(i) if generate else {}
+
+    def run(self) -> dict[str, Any]:
+        if self.api.cache is not None:
+            self.cache = Metrics().instrument_cache(self.api.cache, "loadtest")
+        started = time.perf_counter()
+        if self.is_async:
+            asyncio.run(self._arun(started + self.duration))
+        else:
+            self._run(started + self.duration)
+        self.elapsed = time.perf_counter() - started
+        return self.report()
+
+    def _call(self, i: int, scheduled_ns: int) -> None:
+        name, kwargs = self._request(i)
+        error = None
+        try:
+            self.api.call(False, name, **kwargs)
+        except Exception as exc:
+            error = exc
+        self.results[name].record(time.perf_counter_ns() - scheduled_ns, error)
+
+    async def _acall(self, i: int, scheduled_ns: int) -> None:
+        name, kwargs = self._request(i)
+        error = None
+        try:
+            await self.api.call(True, name, **kwargs)
+        except Exception as exc:
+            error = exc
+        self.results[name].record(time.perf_counter_ns() - scheduled_ns, error)
+
+    def _run(self, deadline: float) -> None:
+        if self.rate is None:
+
+            def worker() -> None:
+                while time.perf_counter() < deadline and (i := self._next()) is not None:
+                    self._call(i, time.perf_counter_ns())
+
+            threads = [threading.Thread(target=worker) for _ in range(self.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return
+
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            for i, scheduled_ns in self._schedule(deadline):
+                pool.submit(self._call, i, scheduled_ns)
+                _sleep_until(scheduled_ns + int(1e9 / self.rate))
+
+    async def _arun(self, deadline: float) -> None:
+        if self.rate is None:
+
+            async def worker() -> None:
+                while time.perf_counter() < deadline and (i := self._next()) is not None:
+                    await self._acall(i, time.perf_counter_ns())
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            return
+
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def limited(i: int, scheduled_ns: int) -> None:
+            async with slots:
+                await self._acall(i, scheduled_ns)
+
+        tasks = []
+        for i, scheduled_ns in self._schedule(deadline):
+            tasks.append(asyncio.create_task(limited(i, scheduled_ns)))
+            delay = (scheduled_ns + int(1e9 / self.rate) - time.perf_counter_ns()) / 1e9
+            await asyncio.sleep(max(delay, 0))
+        await asyncio.gather(*tasks)
+
+    def _schedule(self, deadline: float):
+        """Yield `(request number, scheduled arrival)` at `rate` per second."""
+        assert self.rate
+        start = time.perf_counter_ns()
+        interval = 1e9 / self.rate
+        n = 0
+        while time.perf_counter() < deadline and (i := self._next()) is not None:
+            yield i, start + int(n * interval)
+            n += 1
+
+    def report(self) -> dict[str, Any]:
+        total = sum(r.latency.count for r in self.results.values())
+        errors: Counter = Counter()
+        endpoints = {}
+        for name, result in self.results.items():
+            errors.update(result.errors)
+            endpoints[name] = {
+                "requests": result.latency.count,
+                "ok": result.ok,
+                "errors": sum(result.errors.values()),
+                "rps": round(result.latency.count / self.elapsed, 1) if self.elapsed else 0.0,
+                "latency_ms": {
+                    **{
+                        f"p{round(q * 100)}": result.latency.quantile(q) / 1000
+                        for q in (0.5, 0.9, 0.99)
+                    },
+                    "max": result.latency.max / 1000,
+                },
+            }
+        report: dict[str, Any] = {
+            "duration_s": round(self.elapsed, 3),
+            "requests": total,
+            "throughput_rps": round(total / self.elapsed, 1) if self.elapsed else 0.0,
+            "endpoints": endpoints,
+            "errors": dict(errors),
+        }
+        if self.cache is not None:
+            report["cache"] = {
+                "hits": self.cache.hits,
+                "misses": self.cache.misses,
+                "hit_ratio": round(self.cache.hit_ratio, 4),
+            }
+        return report
+
+
+def _forever():
+    i = 0
+    while True:
+        yield i
+        i += 1
+
+
+def _sleep_until(deadline_ns: int) -> None:
+    delay = (deadline_ns - time.perf_counter_ns()) / 1e9
+    if delay > 0:
+        time.sleep(delay)
+
+
+def point_at(api: Api, base_url: str) -> None:
+    """Replace the upstream URL of an api's base query config."""
+    config = api.base_query_config
+    attribute = "url" if hasattr(config, "url") else "base_url"
+    if not hasattr(config, attribute):
+        raise ValueError("The api's base query config has no base URL to replace.")
+    setattr(config, attribute, base_url)
+
+
+def install_mock_transport(
+    handler: Callable[[httpx.Request], httpx.Response],
+) -> Callable[[], None]:
+    """Route every httpx client created from now on through `handler`.
+
+    Returns:
+        A function restoring the original clients.
+    """
+    client, async_client = httpx.Client, httpx.AsyncClient
+    transport = httpx.MockTransport(handler)
+    httpx.Client = functools.partial(client, transport=transport)  # type: ignore[misc]
+    httpx.AsyncClient = functools.partial(async_client, transport=transport)  # type: ignore[misc]
+
+    def restore() -> None:
+        httpx.Client, httpx.AsyncClient = client, async_client  # type: ignore[misc]
+
+    return restore
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [
+        f"{report['requests']} requests in {report['duration_s']}s: "
+        f"{report['throughput_rps']} req/s",
+        "",
+        f"{'endpoint':<28}{'requests':>10}{'errors':>8}{'req/s':>10}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+    ]
+    for name, row in report["endpoints"].items():
+        latency = row["latency_ms"]
+        lines.append(
+            f"{name:<28}{row['requests']:>10}{row['errors']:>8}{row['rps']:>10.1f}"
+            f"{latency['p50']:>10.2f}{latency['p90']:>10.2f}{latency['p99']:>10.2f}"
+            f"{latency['max']:>10.2f}"
+        )
+    if "cache" in report:
+        cache = report["cache"]
+        lines += [
+            "",
+            f"cache: {cache['hits']} hits, {cache['misses']} misses, "
+            f"hit ratio {cache['hit_ratio']:.1%}",
+        ]
+    if report["errors"]:
+        lines += ["", "errors:"]
+        lines += [f"  {label}: {count}" for label, count in sorted(report["errors"].items())]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m pomdapi.loadtest",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("api", help="the api object, as MODULE:ATTRIBUTE")
+    parser.add_argument("--endpoint", action="append", default=[], help="endpoint to drive; repeat to add or weight")
+    parser.add_argument("--args", action="append", default=[], metavar="NAME=GENERATOR", help="keyword arguments of an endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum requests in flight")
+    parser.add_argument("--rate", type=float, help="open-loop arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run for")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--async", dest="is_async", action="store_true", help="drive the async endpoint variants")
+    upstream = parser.add_mutually_exclusive_group()
+    upstream.add_argument("--stand-in", action="store_true", help="run against a local StandInServer")
+    upstream.add_argument("--base-url", help="run against another upstream")
+    upstream.add_argument("--mock", metavar="MODULE:HANDLER", help="route httpx through a MockTransport handler")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    restore = install_mock_transport(load_object(args.mock)) if args.mock else None
+    try:
+        report = _run(parser, args)
+    finally:
+        if restore is not None:
+            restore()
+
+    if args.json:
+        sys.stdout.write(json.dumps(report) + "\n")
+    else:
+        print(format_report(report))
+
+
+def _run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> dict[str, Any]:
+    api = load_object(args.api)
+    if not isinstance(api, Api):
+        parser.error(f"{args.api} is not an Api.")
+    endpoints = args.endpoint or [
+        name for name, d in api.endpoints.items() if d.is_query and not d.streamed
+    ]
+    unknown = sorted(set(endpoints) - set(api.endpoints))
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(unknown)}")
+    streamed = sorted(name for name in set(endpoints) if api.endpoints[name].streamed)
+    if streamed:
+        parser.error(f"streamed endpoints cannot be load tested: {', '.join(streamed)}")
+    arguments = {}
+    for spec in args.args:
+        name, _, generator = spec.partition("=")
+        arguments[name] = argument_generator(generator)
+
+    server = None
+    if args.stand_in:
+        server = StandInServer().start()
+        point_at(api, f"{server.url}/rpc" if isinstance(api, JSONRPCApi) else server.url)
+    elif args.base_url:
+        point_at(api, args.base_url)
+
+    try:
+        return LoadTest(
+            api=api,
+            endpoints=endpoints,
+            arguments=arguments,
+            concurrency=args.concurrency,
+            rate=args.rate,
+            duration=args.duration,
+            requests=args.requests,
+            is_async=args.is_async,
+        ).run()
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
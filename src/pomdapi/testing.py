@@ -0,0 +1,160 @@
+import json
+import random
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+
+def make_item(item_id: int, item_size: int = 64) -> dict[str, Any]:
+    """Return the item the stand-in serves under `item_id`."""
+    return {
+        "id": item_id,
+        "name": f"item-{item_id}",
+        "score": item_id * 0.5,
+        "tags": ["alpha", "beta"] if item_id % 2 else ["gamma"],
+        "description": "x" * item_size,
+    }
+
+
+@dataclass(eq=False)
+class StandInServer:
+    """A local upstream serving fake REST and JSON-RPC responses.
+
+    Runs a threaded HTTP/1.1 server with keep-alive on a background thread,
+    so benchmarks and load tests exercise real connections without
+    depending on a remote service.
+
+    Routes:
+        - `GET /items?count=N`: a JSON list of N items (default `items`).
+        - `GET /items/<id>`: one item.
+        - `POST /rpc`: JSON-RPC 2.0. Method `items` with params `[N]`
+          returns N items; any other method echoes its params.
+
+    Attributes:
+        latency: Seconds each response is delayed by.
+        items: Number of items listed by default.
+        item_size: Bytes of filler text per item, to scale payloads.
+        error_rate: Fraction of requests answered with HTTP 503.
+        seed: Seed of the error draws, for reproducible runs.
+        requests: Number of requests served so far.
+
+    Example:
+        ```python
+        with StandInServer(latency=0.005, items=100) as server:
+            api = HttpApi.from_defaults(BaseQueryConfig(base_url=server.url))
+        ```
+    """
+
+    latency: float = 0.0
+    items: int = 10
+    item_size: int = 64
+    error_rate: float = 0.0
+    seed: int = 0
+    host: str = "127.0.0.1"
+    port: int = 0
+    requests: int = field(default=0, init=False)
+    _server: Optional[ThreadingHTTPServer] = field(default=None, init=False, repr=False)
+    _bodies: dict[tuple[str, int], bytes] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _rng: random.Random = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def url(self) -> str:
+        assert self._server is not None, "The stand-in server is not running."
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        server = ThreadingHTTPServer((self.host, self.port), _handler(self))
+        server.daemon_threads = True
+        self._server = server
+        threading.Thread(
+            target=server.serve_forever, args=(0.05,), name="pomdapi-stand-in", daemon=True
+        ).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _fails(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    def _list(self, count: int) -> bytes:
+        """Encoded item lists are cached, so serving them costs no CPU."""
+        body = self._bodies.get(("list", count))
+        if body is None:
+            items = [make_item(i, self.item_size) for i in range(1, count + 1)]
+            body = self._bodies[("list", count)] = json.dumps(items).encode()
+        return body
+
+
+def _handler(standin: StandInServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; without this, Nagle's
+        # algorithm and delayed ACKs add ~40ms to every response.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send(self, status: int, body: bytes) -> None:
+            if standin.latency:
+                time.sleep(standin.latency)
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if standin._fails():
+                return self._send(503, b'{"error": "stand-in failure"}')
+            url = urllib.parse.urlsplit(self.path)
+            parts = url.path.strip("/").split("/")
+            if parts == ["items"]:
+                query = urllib.parse.parse_qs(url.query)
+                count = int(query.get("count", [standin.items])[0])
+                return self._send(200, standin._list(count))
+            if len(parts) == 2 and parts[0] == "items" and parts[1].isdigit():
+                item = make_item(int(parts[1]), standin.item_size)
+                return self._send(200, json.dumps(item).encode())
+            self._send(404, b'{"error": "not found"}')
+
+        def do_POST(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if standin._fails():
+                return self._send(503, b'{"error": "stand-in failure"}')
+            if self.path != "/rpc":
+                return self._send(404, b'{"error": "not found"}')
+            request = json.loads(body)
+            params = request.get("params")
+            if request.get("method") == "items":
+                count = params[0] if params else standin.items
+                result = b"[]" if count == 0 else standin._list(count)
+            else:
+                result = json.dumps(params).encode()
+            envelope = b'{"jsonrpc": "2.0", "id": %s, "result": %s}' % (
+                json.dumps(request.get("id")).encode(),
+                result,
+            )
+            self._send(200, envelope)
+
+    return Handler
@@ -1,4 +1,7 @@
+import functools
+import httpx
 import pytest
+from pomdapi.core.api import Api
 from pomdapi.cache.in_memory import InMemoryCache
 from pomdapi.cache.memcached import MemcachedCache
 
@@ -9,3 +12,40 @@ def in_memory_cache():
 @pytest.fixture
 def memcached_cache():
     return MemcachedCache(host="localhost", port=11211)
+
+@pytest.fixture
+def mock_transport(monkeypatch):
+    """Route every httpx client through a handler: `mock_transport(handler)`."""
+    def install(handler):
+        transport = httpx.MockTransport(handler)
+        monkeypatch.setattr(httpx, "Client", functools.partial(httpx.Client, transport=transport))
+        monkeypatch.setattr(httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport))
+    return install
+
+@pytest.fixture
+def calls():
+    """Requests received by the apis built with `fake_api`, in order."""
+    return []
+
+@pytest.fixture
+def fake_api(calls):
+    """Build an `Api` answering each request with `respond(request)`: `fake_api(respond)`.
+
+    Sync and async calls alike record their request in `calls` and use an
+    `InMemoryCache` unless another `cache` is given.
+    """
+    def make(respond, cache=None):
+        def base_query_fn(config, request):
+            calls.append(request)
+            return respond(request)
+
+        async def abase_query_fn(config, request):
+            return base_query_fn(config, request)
+
+        return Api(
+            base_query_config=None,
+            base_query_fn_handler=base_query_fn,
+            base_query_fn_handler_async=abase_query_fn,
+            cache=InMemoryCache() if cache is None else cache,
+        )
+    return make
@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import json
+import httpx
+import pytest
+from pydantic import BaseModel
+from pomdapi.api.graphql import BaseQueryConfig, GraphQLApi, GraphQLError, Operation, typename_tags
+from pomdapi.cache.in_memory import InMemoryCache
+from pomdapi.core.types import Tag
+
+USER_QUERY = "query User($id: ID!) { user(id: $id) { __typename id name } }"
+
+
+class User(BaseModel):
+    id: str
+    name: str
+
+
+class UserData(BaseModel):
+    user: User
+
+
+class StandInServer:
+    def __init__(self, persisted_queries: bool = True):
+        self.persisted_queries = persisted_queries
+        self.documents: dict[str, str] = {}
+        self.requests: list[object] = []
+        self.headers: list[httpx.Headers] = []
+
+    def execute(self, body: dict) -> dict:
+        extension = body.get("extensions", {}).get("persistedQuery")
+        if extension and not self.persisted_queries:
+            return {"errors": [{"message": "PersistedQueryNotSupported"}]}
+        query = body.get("query")
+        if extension:
+            if query is not None:
+                assert hashlib.sha256(query.encode()).hexdigest() == extension["sha256Hash"]
+                self.documents[extension["sha256Hash"]] = query
+            query = self.documents.get(extension["sha256Hash"])
+            if query is None:
+                return {"errors": [{"message": "PersistedQueryNotFound"}]}
+        user_id = body["variables"]["id"]
+        if user_id == "missing":
+            return {"data": None, "errors": [{"message": "User not found"}]}
+        return {"data": {"user": {"__typename": "User", "id": user_id, "name": f"user-{user_id}"}}}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        self.headers.append(request.headers)
+        if isinstance(body, list):
+            return httpx.Response(200, json=[self.execute(op) for op in body])
+        return httpx.Response(200, json=self.execute(body))
+
+
+def make_api(url: str, **config):
+    api = GraphQLApi.from_defaults(base_query_config=BaseQueryConfig(url=url, **config), cache=InMemoryCache())
+
+    @api.query("getUser", response_type=UserData)
+    def get_user(id: str):
+        return Operation(query=USER_QUERY, variables={"id": id}, operation_name="User")
+
+    return api, get_user
+
+
+def test_persisted_query_sends_document_only_on_miss(mock_transport):
+    server = StandInServer()
+    mock_transport(server)
+    api, get_user = make_api("https://apq.test/graphql")
+
+    assert get_user(is_async=False, id="1").user.name == "user-1"
+    assert get_user(is_async=False, id="2").user.name == "user-2"
+    assert ["query" in body for body in server.requests] == [False, True, False]
+
+
+def test_falls_back_when_persisted_queries_are_unsupported(mock_transport):
+    server = StandInServer(persisted_queries=False)
+    mock_transport(server)
+    api, get_user = make_api("https://no-apq.test/graphql")
+
+    get_user(is_async=False, id="1")
+    get_user(is_async=False, id="2")
+    assert ["query" in body for body in server.requests] == [False, True, True]
+
+
+def test_responses_are_cached_and_tagged_by_typename_and_id(mock_transport):
+    server = StandInServer()
+    mock_transport(server)
+    api, get_user = make_api("https://tags.test/graphql")
+
+    get_user(is_async=False, id="1")
+    get_user(is_async=False, id="1")
+    assert len(server.requests) == 2
+
+    api.cache.invalidate_tags("getUser", [Tag("User", "1")])
+    get_user(is_async=False, id="1")
+    assert len(server.requests) == 3
+
+    with pytest.raises(GraphQLError):
+        get_user(is_async=False, id="missing")
+
+
+def test_shared_object_tag_evicts_the_operation_cached_last(mock_transport):
+    server = StandInServer()
+    mock_transport(server)
+    api, get_user = make_api("https://shared-tags.test/graphql")
+
+    @api.query("getAuthor", response_type=UserData)
+    def get_author(id: str):
+        return Operation(query=USER_QUERY, variables={"id": id}, operation_name="User")
+
+    get_user(is_async=False, id="1")
+    get_author(is_async=False, id="1")
+    requests = len(server.requests)
+
+    api.cache.invalidate_tags("updateUser", [Tag("User", "1")])
+    get_user(is_async=False, id="1")
+    assert len(server.requests) == requests
+    get_author(is_async=False, id="1")
+    assert len(server.requests) == requests + 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_operations_are_batched(mock_transport):
+    server = StandInServer()
+    mock_transport(server)
+    api, get_user = make_api("https://batch.test/graphql", batch=True)
+
+    users = await asyncio.gather(*(get_user(id=str(i)) for i in range(5)))
+    assert [data.user.id for data in users] == [str(i) for i in range(5)]
+    # One batch of hashes, then one batch resending the missed documents.
+    assert [len(body) for body in server.requests] == [5, 5]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_not_shared_between_configs(mock_transport):
+    server = StandInServer()
+    mock_transport(server)
+    url = "https://shared-batch.test/graphql"
+    _, get_alice = make_api(url, batch=True, prepare_headers=lambda h: {**h, "Authorization": "alice"})
+    _, get_bob = make_api(url, batch=True, prepare_headers=lambda h: {**h, "Authorization": "bob"})
+
+    await asyncio.gather(get_alice(id="1"), get_bob(id="2"))
+
+    sent = {
+        (headers["Authorization"], body["variables"]["id"])
+        for headers, body in zip(server.headers, server.requests)
+    }
+    assert sent == {("alice", "1"), ("bob", "2")}
+
+
+def test_typename_tags_walks_nested_data():
+    data = {"repo": {"__typename": "Repo", "id": 1, "issues": [{"__typename": "Issue", "id": "7"}, {"title": "x"}]}}
+    assert typename_tags(data) == [Tag("Repo", "1"), Tag("Issue", "7")]
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+import pytest_asyncio
+from pomdapi.api.jsonrpc import BaseQueryConfig, JSONRPCApi, JSONRPCResponseError, WebSocketTransport
+from pomdapi.cache.in_memory import InMemoryCache
+
+pytest.importorskip("websockets")
+from websockets.asyncio.server import serve
+
+
+class StandInNode:
+    """A tiny JSON-RPC WebSocket server answering slow requests last."""
+
+    def __init__(self):
+        self.connections = []
+        self.subscriptions = 0
+
+    async def handler(self, connection):
+        self.connections.append(connection)
+        async for message in connection:
+            request = json.loads(message)
+            asyncio.get_running_loop().create_task(self.answer(connection, request))
+
+    async def answer(self, connection, request):
+        method, params = request["method"], request["params"]
+        if method == "echo":
+            await asyncio.sleep(params[1])
+            reply = {"result": params[0]}
+        elif method == "eth_subscribe":
+            self.subscriptions += 1
+            subscription_id = f"0xsub{self.subscriptions}"
+            reply = {"result": subscription_id}
+            asyncio.get_running_loop().create_task(self.notify(connection, subscription_id))
+        elif method == "eth_unsubscribe":
+            reply = {"result": True}
+        else:
+            reply = {"error": {"code": -32601, "message": "Method not found"}}
+        await connection.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], **reply}))
+
+    async def notify(self, connection, subscription_id):
+        for number in range(3):
+            await asyncio.sleep(0.01)
+            await connection.send(json.dumps({
+                "jsonrpc": "2.0",
+                "method": "eth_subscription",
+                "params": {"subscription": subscription_id, "result": {"number": number}},
+            }))
+
+
+@pytest_asyncio.fixture
+async def node():
+    stand_in = StandInNode()
+    async with serve(stand_in.handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        stand_in.url = f"ws://127.0.0.1:{port}"
+        yield stand_in
+        await WebSocketTransport.for_url(stand_in.url).close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_connection(node):
+    api = JSONRPCApi.from_websocket(BaseQueryConfig(base_url=node.url))
+
+    @api.query("echo", response_type=str)
+    def echo(value: str, delay: float):
+        return [value, delay]
+
+    results = await asyncio.gather(*(echo(value=str(i), delay=(10 - i) / 100) for i in range(10)))
+    assert results == [str(i) for i in range(10)]
+    assert len(node.connections) == 1
+
+    with pytest.raises(JSONRPCResponseError):
+        await WebSocketTransport.for_url(node.url).request("missing", [])
+
+
+@pytest.mark.asyncio
+async def test_transport_reconnects_after_connection_loss(node):
+    transport = WebSocketTransport.for_url(node.url)
+    assert await transport.request("echo", ["a", 0]) == "a"
+    await node.connections[0].close()
+    await asyncio.sleep(0.05)
+    assert await transport.request("echo", ["b", 0]) == "b"
+    assert len(node.connections) == 2
+
+
+@pytest.mark.asyncio
+async def test_server_subscription_feeds_cache(node):
+    api = JSONRPCApi.from_websocket(BaseQueryConfig(base_url=node.url), cache=InMemoryCache())
+
+    @api.query("eth_getBlockByNumber", response_type=dict)
+    def get_block(number: int):
+        return [number, False]
+
+    heads = []
+    async for head in api.server_subscribe(
+        ["newHeads"], seed=lambda head: (get_block, {"number": head["number"]})
+    ):
+        heads.append(head)
+        if len(heads) == 3:
+            break
+
+    assert heads == [{"number": n} for n in range(3)]
+    assert api.cache.get_by_request("eth_getBlockByNumber", [2, False]) == {"number": 2}
+
+
+def test_sync_calls_are_rejected():
+    api = JSONRPCApi.from_websocket(BaseQueryConfig(base_url="ws://127.0.0.1:1"))
+
+    @api.query("eth_gasPrice", response_type=str)
+    def get_gas_price():
+        return []
+
+    with pytest.raises(RuntimeError):
+        get_gas_price(is_async=False)
+
+
+@pytest.mark.asyncio
+async def test_request_gives_up_when_the_server_is_unreachable():
+    transport = WebSocketTransport("ws://127.0.0.1:1", reconnect_delay=0.01, max_connect_attempts=3)
+
+    with pytest.raises(ConnectionError, match="after 3 attempts"):
+        await asyncio.wait_for(transport.request("echo", ["a", 0]), timeout=5)
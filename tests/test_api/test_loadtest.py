@@ -0,0 +1,99 @@
+import json
+import httpx
+from pydantic import BaseModel
+from pomdapi.api.http import HttpApi, BaseQueryConfig, RequestDefinition
+from pomdapi.cache.in_memory import InMemoryCache
+from pomdapi.loadtest import LoadTest, main
+from pomdapi.testing import StandInServer
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+api = HttpApi.from_defaults(
+    base_query_config=BaseQueryConfig(base_url="http://upstream.invalid"),
+    cache=InMemoryCache(),
+)
+
+
+@api.query("getItem", response_type=Item)
+def get_item(item_id: int):
+    return RequestDefinition(method="GET", path=f"/items/{item_id}")
+
+
+def item_ids(i: int) -> dict:
+    return {"item_id": i % 4}
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    item_id = int(request.url.path.rsplit("/", 1)[1])
+    if item_id == 3:
+        return httpx.Response(500)
+    return httpx.Response(200, json={"id": item_id, "name": f"item-{item_id}"})
+
+
+def test_closed_loop_reports_cache_hits_and_errors():
+    with StandInServer(error_rate=0.0) as server:
+        http = HttpApi.from_defaults(
+            base_query_config=BaseQueryConfig(base_url=server.url), cache=InMemoryCache()
+        )
+
+        @http.query("getItem", response_type=Item)
+        def get_item(item_id: int):
+            return RequestDefinition(method="GET", path=f"/items/{item_id}")
+
+        report = LoadTest(
+            api=http,
+            endpoints=["getItem"],
+            arguments={"getItem": lambda i: {"item_id": i % 5}},
+            concurrency=1,
+            requests=40,
+        ).run()
+
+    assert report["requests"] == 40
+    assert report["endpoints"]["getItem"]["ok"] == 40
+    assert report["cache"]["misses"] == 5
+    assert report["cache"]["hits"] == 35
+    assert report["errors"] == {}
+
+
+def test_open_loop_async_with_error_breakdown():
+    with StandInServer(error_rate=1.0) as server:
+        http = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=server.url))
+
+        @http.query("getItem", response_type=Item)
+        def get_item(item_id: int):
+            return RequestDefinition(method="GET", path=f"/items/{item_id}")
+
+        report = LoadTest(
+            api=http,
+            endpoints=["getItem"],
+            arguments={"getItem": lambda i: {"item_id": i}},
+            rate=500,
+            requests=20,
+            is_async=True,
+        ).run()
+
+    assert report["requests"] == 20
+    assert report["errors"] == {"HTTP 503": 20}
+    assert report["endpoints"]["getItem"]["latency_ms"]["p50"] > 0
+
+
+def test_cli_with_mock_transport(capsys):
+    main(
+        [
+            f"{__name__}:api",
+            "--mock", f"{__name__}:handler",
+            "--args", f"getItem={__name__}:item_ids",
+            "--requests", "20",
+            "--concurrency", "2",
+            "--json",
+        ]
+    )
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["requests"] == 20
+    assert report["endpoints"]["getItem"]["errors"] == 5
+    assert report["errors"] == {"HTTP 500": 5}
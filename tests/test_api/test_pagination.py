@@ -0,0 +1,122 @@
+import httpx
+import pytest
+from pydantic import BaseModel
+from pomdapi.api.http import (
+    BaseQueryConfig,
+    CursorPagination,
+    HttpApi,
+    RequestDefinition,
+)
+from pomdapi.api.upstreams import UpstreamPool
+
+
+class Issue(BaseModel):
+    number: int
+
+
+PAGES = 3
+PER_PAGE = 2
+
+
+def link_handler(request: httpx.Request) -> httpx.Response:
+    page = int(request.url.params.get("page", "1"))
+    headers = {}
+    if page < PAGES:
+        headers["Link"] = f'<https://api.test.com/issues?page={page + 1}>; rel="next"'
+    items = [{"number": (page - 1) * PER_PAGE + i} for i in range(PER_PAGE)]
+    return httpx.Response(200, json=items, headers=headers)
+
+
+def cursor_handler(request: httpx.Request) -> httpx.Response:
+    cursor = int(request.url.params.get("cursor", "0"))
+    assert request.url.params["state"] == "open"
+    return httpx.Response(200, json={
+        "data": {"items": [{"number": cursor}]},
+        "next": str(cursor + 1) if cursor + 1 < PAGES else None,
+    })
+
+
+@pytest.fixture
+def api():
+    return HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url="https://api.test.com"))
+
+
+def test_link_pagination_sync(api, mock_transport):
+    mock_transport(link_handler)
+
+    @api.paginated_query("getAllIssues", item_type=Issue, read_ahead=1)
+    def get_all_issues():
+        return RequestDefinition(method="GET", path="/issues")
+
+    assert [issue.number for issue in get_all_issues()] == list(range(PAGES * PER_PAGE))
+    assert "getAllIssues" in api.endpoints
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_async(api, mock_transport):
+    mock_transport(cursor_handler)
+
+    @api.paginated_query(
+        "getAllIssues",
+        item_type=Issue,
+        pagination=CursorPagination(items_path="data.items", cursor_path="next"),
+    )
+    def get_all_issues(state: str):
+        return RequestDefinition(method="GET", path=f"/issues?state={state}")
+
+    assert [issue.number async for issue in get_all_issues(state="open")] == list(range(PAGES))
+
+
+def test_pagination_stops_early_and_raises_errors(api, mock_transport):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("page") == "3":
+            return httpx.Response(500)
+        return link_handler(request)
+
+    mock_transport(handler)
+
+    @api.paginated_query("getAllIssues", item_type=Issue)
+    def get_all_issues():
+        return RequestDefinition(method="GET", path="/issues")
+
+    issues = iter(get_all_issues())
+    assert next(issues).number == 0
+    issues.close()
+    with pytest.raises(httpx.HTTPStatusError):
+        list(get_all_issues())
+
+
+def test_paginated_endpoints_are_not_called_through_the_api(api):
+    @api.paginated_query("getAllIssues", item_type=Issue)
+    def get_all_issues():
+        return RequestDefinition(method="GET", path="/issues")
+
+    with pytest.raises(ValueError, match="streams its response"):
+        api.call(False, get_all_issues)
+    with pytest.raises(ValueError, match="streams its response"):
+        api.prefetch(get_all_issues, [{}])
+    with pytest.raises(ValueError, match="streams its response"):
+        api.map_sync("getAllIssues", [{}])
+
+
+@pytest.mark.asyncio
+async def test_pages_are_fetched_through_the_upstream_pool(mock_transport):
+    hosts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        if request.url.host == "node-a":
+            return httpx.Response(503)
+        return cursor_handler(request)
+
+    mock_transport(handler)
+    pool = UpstreamPool(["http://node-a", "http://node-b"], max_failures=1, eject_for=60)
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=pool))
+
+    @api.paginated_query("getAllIssues", item_type=Issue, pagination=CursorPagination(items_path="data.items", cursor_path="next"))
+    def get_all_issues(state: str):
+        return RequestDefinition(method="GET", path=f"/issues?state={state}")
+
+    assert [issue.number async for issue in get_all_issues(state="open")] == list(range(PAGES))
+    assert hosts == ["node-a"] + ["node-b"] * PAGES
+    assert [upstream.url for upstream in pool.healthy()] == ["http://node-b"]
@@ -0,0 +1,55 @@
+import httpx
+import pytest
+from pydantic import BaseModel
+from pomdapi.api.http import HttpApi, BaseQueryConfig, RequestDefinition
+from pomdapi.api.jsonrpc import JSONRPCApi, BaseQueryConfig as JSONRPCConfig
+from pomdapi.testing import StandInServer
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+    description: str
+
+
+@pytest.fixture(scope="module")
+def server():
+    with StandInServer(items=3, item_size=8) as server:
+        yield server
+
+
+def test_serves_items_over_http(server: StandInServer):
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=server.url))
+
+    @api.query("listItems", response_type=list[Item])
+    def list_items(count: int):
+        return RequestDefinition(method="GET", path=f"/items?count={count}")
+
+    @api.query("getItem", response_type=Item)
+    def get_item(item_id: int):
+        return RequestDefinition(method="GET", path=f"/items/{item_id}")
+
+    assert [item.id for item in list_items(is_async=False, count=5)] == [1, 2, 3, 4, 5]
+    assert get_item(is_async=False, item_id=7) == Item(id=7, name="item-7", description="x" * 8)
+
+
+def test_serves_jsonrpc(server: StandInServer):
+    api = JSONRPCApi.from_defaults(base_query_config=JSONRPCConfig(base_url=f"{server.url}/rpc"))
+
+    @api.query("items", response_type=list[Item])
+    def items(count: int):
+        return [count]
+
+    @api.query("echo", response_type=list[int])
+    def echo(first: int, second: int):
+        return [first, second]
+
+    assert [item.id for item in items(is_async=False, count=2)] == [1, 2]
+    assert echo(is_async=False, first=4, second=2) == [4, 2]
+
+
+def test_error_rate():
+    with StandInServer(error_rate=1.0) as server:
+        response = httpx.get(f"{server.url}/items")
+        assert response.status_code == 503
+        assert server.requests == 1
@@ -0,0 +1,116 @@
+import json
+import httpx
+import pytest
+from pydantic import BaseModel
+from pomdapi.api.http import BaseQueryConfig, HttpApi, RequestDefinition, _JSONArrayDecoder
+from pomdapi.api.upstreams import UpstreamPool
+
+
+class Event(BaseModel):
+    id: int
+    name: str
+
+
+EVENTS = [{"id": i, "name": f"event-{i}"} for i in range(50)]
+
+
+class Chunks(httpx.SyncByteStream, httpx.AsyncByteStream):
+    def __init__(self, body: bytes, size: int):
+        self.chunks = [body[i:i + size] for i in range(0, len(body), size)]
+
+    def __iter__(self):
+        yield from self.chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+@pytest.mark.parametrize("size", [1, 7, 4096])
+def test_json_array_decoder_handles_any_chunking(size: int):
+    text = json.dumps([1, 23, -4.5e3, "a,]b", {"x": [1, {"y": None}]}, True, None])
+    decoder = _JSONArrayDecoder()
+    items = []
+    for i in range(0, len(text), size):
+        items.extend(decoder.feed(text[i:i + size]))
+    items.extend(decoder.feed("", final=True))
+    assert items == json.loads(text)
+
+
+def test_json_array_decoder_decodes_each_element_once():
+    element = {"values": list(range(2000)), "text": "a]}\\\"" * 100}
+    text = json.dumps([element, element])
+    decoder = _JSONArrayDecoder()
+    decoded = []
+    decode = decoder._decoder.decode
+    decoder._decoder.decode = lambda s: decoded.append(len(s)) or decode(s)
+
+    items = []
+    for i in range(0, len(text), 3):
+        items.extend(decoder.feed(text[i:i + 3]))
+    assert items == [element, element]
+    assert len(decoded) == 2
+
+
+def test_json_array_decoder_rejects_truncated_body():
+    decoder = _JSONArrayDecoder()
+    assert decoder.feed('[{"id": 1}, {"id"') == [{"id": 1}]
+    with pytest.raises(ValueError):
+        decoder.feed("", final=True)
+
+
+@pytest.fixture
+def api():
+    return HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url="https://api.test.com"))
+
+
+@pytest.mark.parametrize("format,body", [
+    ("ndjson", "\n".join(json.dumps(event) for event in EVENTS).encode() + b"\n"),
+    ("json-array", json.dumps(EVENTS).encode()),
+])
+@pytest.mark.asyncio
+async def test_streaming_query_async(api, mock_transport, format: str, body: bytes):
+    mock_transport(lambda request: httpx.Response(200, stream=Chunks(body, 13)))
+
+    @api.streaming_query("exportEvents", item_type=Event, format=format)
+    def export_events():
+        return RequestDefinition(method="GET", path="/events")
+
+    assert [event.id async for event in export_events()] == [e["id"] for e in EVENTS]
+
+
+@pytest.mark.parametrize("format,body", [
+    ("ndjson", "\n".join(json.dumps(event) for event in EVENTS).encode()),
+    ("json-array", json.dumps(EVENTS).encode()),
+])
+def test_streaming_query_sync(api, mock_transport, format: str, body: bytes):
+    mock_transport(lambda request: httpx.Response(200, stream=Chunks(body, 13)))
+
+    @api.streaming_query("exportEvents", item_type=Event, format=format)
+    def export_events():
+        return RequestDefinition(method="GET", path="/events")
+
+    assert [event.name for event in export_events()] == [e["name"] for e in EVENTS]
+
+
+def test_streams_fail_over_across_upstream_pool(mock_transport):
+    body = json.dumps(EVENTS).encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "node-a":
+            return httpx.Response(503)
+        return httpx.Response(200, stream=Chunks(body, 13))
+
+    mock_transport(handler)
+    pool = UpstreamPool(["http://node-a", "http://node-b"])
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=pool))
+
+    @api.streaming_query("exportEvents", item_type=Event, format="json-array")
+    def export_events():
+        return RequestDefinition(method="GET", path="/events")
+
+    assert len(list(export_events())) == len(EVENTS)
+    assert pool.upstreams[0].failures == 1
+    assert all(upstream.in_flight == 0 for upstream in pool.upstreams)
+    with pytest.raises(ValueError, match="streams its response"):
+        api.call(False, export_events)
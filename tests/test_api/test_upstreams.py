@@ -0,0 +1,144 @@
+import asyncio
+import httpx
+import pytest
+from pomdapi.api.http import BaseQueryConfig, HttpApi, RequestDefinition
+from pomdapi.api.upstreams import (
+    LeastInFlight,
+    LeastLatency,
+    PowerOfTwoChoices,
+    RoundRobin,
+    Upstream,
+    UpstreamPool,
+)
+
+URLS = ["http://node-a", "http://node-b", "http://node-c"]
+
+
+def test_round_robin_cycles_through_nodes():
+    pool = UpstreamPool(URLS, strategy=RoundRobin())
+    assert [pool.call(lambda url: url) for _ in range(6)] == URLS * 2
+
+
+@pytest.mark.parametrize("strategy,expected", [
+    (LeastInFlight(), "http://node-b"),
+    (LeastLatency(), "http://node-c"),
+])
+def test_load_aware_strategies(strategy, expected: str):
+    upstreams = [
+        Upstream("http://node-a", in_flight=9, latency=0.02),
+        Upstream("http://node-b", in_flight=0, latency=0.5),
+        Upstream("http://node-c", in_flight=1, latency=0.05),
+    ]
+    assert strategy.choose(upstreams).url == expected
+
+
+def test_power_of_two_choices_prefers_faster_node():
+    fast, slow = Upstream("fast", latency=0.01), Upstream("slow", latency=1.0)
+    assert {PowerOfTwoChoices().choose([fast, slow]).url for _ in range(20)} == {"fast"}
+
+
+def fail_on(bad_url: str, error: Exception):
+    def fn(url: str) -> str:
+        if url == bad_url:
+            raise error
+        return url
+    return fn
+
+
+def test_failing_node_fails_over_and_is_ejected():
+    pool = UpstreamPool(URLS[:2], max_failures=2, eject_for=60)
+    fn = fail_on("http://node-a", httpx.ConnectError("refused"))
+
+    assert [pool.call(fn) for _ in range(4)] == ["http://node-b"] * 4
+    assert [upstream.url for upstream in pool.healthy()] == ["http://node-b"]
+
+
+def test_client_errors_do_not_count_against_nodes():
+    pool = UpstreamPool(URLS[:2], max_failures=1)
+    response = httpx.Response(404, request=httpx.Request("GET", "http://node-a"))
+    fn = fail_on("http://node-a", httpx.HTTPStatusError("not found", request=response.request, response=response))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        pool.call(fn)
+    assert len(pool.healthy()) == 2
+
+
+def test_health_check_readmits_nodes():
+    healthy = {"http://node-a": False, "http://node-b": True}
+    pool = UpstreamPool(URLS[:2], eject_for=60, health_check=lambda url: healthy[url])
+
+    pool.check_health()
+    assert [upstream.url for upstream in pool.healthy()] == ["http://node-b"]
+    healthy["http://node-a"] = True
+    pool.check_health()
+    assert len(pool.healthy()) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_requests_only_release_the_node():
+    pool = UpstreamPool(URLS[:1], max_failures=3)
+    node = pool.upstreams[0]
+    node.failures, node.latency = 2, 0.5
+
+    async def hang(url: str) -> str:
+        await asyncio.sleep(60)
+        return url
+
+    call = asyncio.ensure_future(pool.acall(hang))
+    await asyncio.sleep(0)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert (node.in_flight, node.failures, node.latency) == (0, 2, 0.5)
+
+
+@pytest.mark.asyncio
+async def test_http_api_spreads_requests_over_pool(mock_transport):
+    hosts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        if request.url.host == "node-a":
+            return httpx.Response(503)
+        return httpx.Response(200, json={"host": request.url.host})
+
+    mock_transport(handler)
+    pool = UpstreamPool(URLS, max_failures=1, eject_for=60)
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=pool))
+
+    @api.query("getStatus", response_type=dict)
+    def get_status():
+        return RequestDefinition(method="GET", path="/status")
+
+    assert (await get_status())["host"] in ("node-b", "node-c")
+    assert get_status(is_async=False)["host"] in ("node-b", "node-c")
+    assert hosts.count("node-a") == 1
+
+
+def test_non_idempotent_requests_only_fail_over_when_unsent():
+    pool = UpstreamPool(URLS[:2], strategy=RoundRobin())
+    fn = fail_on("http://node-a", httpx.ReadTimeout("no answer"))
+
+    with pytest.raises(httpx.ReadTimeout):
+        pool.call(fn, idempotent=False)
+    assert pool.call(fail_on("http://node-a", httpx.ConnectError("refused")), idempotent=False) == "http://node-b"
+
+
+def test_http_api_does_not_resend_posts(mock_transport):
+    hosts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        return httpx.Response(503)
+
+    mock_transport(handler)
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url=UpstreamPool(URLS)))
+
+    @api.mutation("createOrder")
+    def create_order():
+        return RequestDefinition(method="POST", path="/orders", body={})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        create_order(is_async=False)
+    assert len(hosts) == 1
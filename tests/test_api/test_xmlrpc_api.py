@@ -0,0 +1,115 @@
+import asyncio
+import gc
+import threading
+import xmlrpc.client
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from xmlrpc.server import SimpleXMLRPCRequestHandler, SimpleXMLRPCServer
+from pomdapi.api import xmlrpc as xmlrpc_api
+from pomdapi.api.xmlrpc import BaseQueryConfig, XMLRPCApi, dumps, loads
+
+
+@pytest.fixture
+def server():
+    posts: list[str] = []
+
+    class Handler(SimpleXMLRPCRequestHandler):
+        def do_POST(self):
+            posts.append(self.path)
+            super().do_POST()
+
+        def log_message(self, *args):
+            pass
+
+    server = SimpleXMLRPCServer(("127.0.0.1", 0), requestHandler=Handler, allow_none=True, logRequests=False)
+    server.register_function(pow)
+    server.register_function(lambda value: value, "echo")
+    server.register_multicall_functions()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/RPC2"
+    server.posts = posts
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_api(url: str, **config) -> tuple[XMLRPCApi, object]:
+    api = XMLRPCApi.from_defaults(base_query_config=BaseQueryConfig(base_url=url, **config))
+
+    @api.query("pow", response_type=int)
+    def power(base: int, exponent: int):
+        return [base, exponent]
+
+    return api, power
+
+
+@pytest.mark.parametrize("params", [
+    [1, "two", 3.5, None, [True, {"nested": b"bytes"}]],
+    [],
+])
+def test_marshalling_round_trip(params):
+    restored, method = xmlrpc.client.loads(dumps("echo", params), use_builtin_types=True)
+    assert method == "echo" and list(restored) == params
+    assert loads(xmlrpc.client.dumps(("ok",), methodresponse=True).encode()) == "ok"
+
+
+def test_sync_call(server):
+    api, power = make_api(server.url)
+    assert power(is_async=False, base=2, exponent=10) == 1024
+
+
+def test_fault_is_raised(server):
+    api, power = make_api(server.url)
+    with pytest.raises(xmlrpc.client.Fault):
+        power(is_async=False, base="2", exponent=[])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_calls_are_coalesced(server):
+    api, power = make_api(server.url, multicall=True)
+    results = await asyncio.gather(*(power(base=2, exponent=n) for n in range(10)))
+    assert results == [2 ** n for n in range(10)]
+    assert len(server.posts) == 1
+
+
+def test_concurrent_sync_calls_are_coalesced(server):
+    api, power = make_api(server.url, multicall=True, multicall_window=0.05)
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda n: power(is_async=False, base=3, exponent=n), range(5)))
+    assert results == [3 ** n for n in range(5)]
+    assert len(server.posts) < 5
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_interrupted_batch_leader_hands_over(server, monkeypatch):
+    api, power = make_api(server.url, multicall=True)
+    send_batch = xmlrpc_api._send_batch
+
+    def interrupt(config, batch):
+        monkeypatch.setattr(xmlrpc_api, "_send_batch", send_batch)
+        raise Interrupted()
+
+    monkeypatch.setattr(xmlrpc_api, "_send_batch", interrupt)
+    with pytest.raises(Interrupted):
+        power(is_async=False, base=2, exponent=3)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(power, is_async=False, base=2, exponent=4).result(timeout=5) == 16
+
+
+@pytest.mark.asyncio
+async def test_async_batcher_holds_its_flush_task(server):
+    api, power = make_api(server.url, multicall=True, multicall_window=0.05)
+    calls = [asyncio.ensure_future(power(base=2, exponent=n)) for n in range(3)]
+    await asyncio.sleep(0.01)
+
+    batcher = xmlrpc_api._async_batchers[asyncio.get_running_loop()][server.url]
+    assert len(batcher.flushes) == 1
+    gc.collect()
+
+    assert await asyncio.gather(*calls) == [1, 2, 4]
+    await asyncio.sleep(0)
+    assert not batcher.flushes
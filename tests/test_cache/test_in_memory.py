@@ -1,5 +1,11 @@
 import pytest
-from pomdapi.cache.in_memory import InMemoryBackend
+from concurrent.futures import ThreadPoolExecutor
+from pomdapi.cache.in_memory import (
+    ConcurrentInMemoryCache,
+    InMemoryBackend,
+    StripedInMemoryBackend,
+)
+from pomdapi.core.types import Tag
 from typing import Optional, Any
 
 @pytest.mark.parametrize("key,value,ttl", [
@@ -37,3 +43,27 @@ async def test_in_memory_backend_async_operations(key: str, value: dict[str, Any
     await backend.adelete(key)
     result = await backend.aget(key)
     assert result is None
+
+
+def test_striped_backend_concurrent_writers():
+    backend = StripedInMemoryBackend(stripes=8)
+
+    def write(worker: int):
+        for i in range(500):
+            backend.set(f"key-{worker}-{i}", i)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(8)))
+
+    assert all(backend.get(f"key-{w}-499") == 499 for w in range(8))
+
+
+def test_concurrent_cache_invalidate_tags():
+    cache = ConcurrentInMemoryCache(stripes=4)
+    tag = Tag(type="Issue", id="LIST")
+    cache.set("getRepoIssues", "open", tags=[tag], response=[{"id": 1}])
+    assert cache.get_by_request("getRepoIssues", "open") == [{"id": 1}]
+
+    cache.invalidate_tags("createIssue", [tag])
+    assert cache.get_by_request("getRepoIssues", "open") is None
+    assert cache.get_by_tags("getRepoIssues", [tag]) is None
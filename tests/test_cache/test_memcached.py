@@ -0,0 +1,54 @@
+import sys
+import types
+import pytest
+from pomdapi.cache.memcached import MemcachedCache
+from pomdapi.cache.serializers import JsonSerializer
+
+
+class FakeClient:
+    def __init__(self, *args, **kwargs):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, time=0):
+        self.store[key] = value
+
+    def delete(self, key):
+        self.store.pop(key, None)
+
+
+class FakeAsyncClient(FakeClient):
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, exptime=0):
+        self.store[key] = value
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def fake_memcache(monkeypatch):
+    monkeypatch.setitem(sys.modules, "memcache", types.SimpleNamespace(Client=FakeClient))
+    monkeypatch.setitem(sys.modules, "aiomcache", types.SimpleNamespace(Client=FakeAsyncClient))
+
+
+def test_memcached_cache_roundtrip():
+    cache = MemcachedCache()
+    cache.set(endpoint_name="getUser", request={"id": 1}, response={"name": "a"}, tags=["User"])
+
+    assert cache.get_by_request("getUser", {"id": 1}) == {"name": "a"}
+
+
+@pytest.mark.asyncio
+async def test_memcached_cache_uses_given_serializer():
+    cache = MemcachedCache(serializer=JsonSerializer())
+    await cache.aset(endpoint_name="getUser", request={"id": 1}, response={"name": "a"}, tags=[])
+
+    assert await cache.aget_by_request("getUser", {"id": 1}) == {"name": "a"}
+    assert b'{"name"' in cache._backend._async_client.store[
+        cache.key_from_req("getUser", {"id": 1}).encode()
+    ]
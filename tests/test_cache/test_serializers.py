@@ -0,0 +1,56 @@
+import json
+import pytest
+from pomdapi.cache.serializers import (
+    FramedSerializer,
+    JsonSerializer,
+    PickleSerializer,
+)
+from typing import Any
+
+
+@pytest.mark.parametrize("serializer,value", [
+    (JsonSerializer(), {"data": "test", "items": [1, 2, 3]}),
+    (JsonSerializer(), "getRepoIssues/RequestDefinition(...)"),
+    (PickleSerializer(), {"raw": b"\x00\xff"}),
+])
+@pytest.mark.parametrize("threshold", [0, 1 << 20])
+def test_framed_serializer_roundtrip(serializer: Any, value: Any, threshold: int):
+    framed = FramedSerializer(serializer=serializer, compression="zlib", threshold=threshold)
+    assert framed.loads(framed.dumps(value)) == value
+
+
+def test_framed_serializer_compresses_above_threshold():
+    framed = FramedSerializer(compression="zlib", threshold=64)
+    small, large = {"a": 1}, {"body": "x" * 10_000}
+    assert framed.dumps(small)[0] & 0b11 == 0
+    assert len(framed.dumps(large)) < len(json.dumps(large))
+
+
+def test_framed_serializer_reads_other_compressions():
+    writer = FramedSerializer(compression="zlib", threshold=0)
+    reader = FramedSerializer(compression=None)
+    assert reader.loads(writer.dumps({"data": "x" * 100})) == {"data": "x" * 100}
+
+
+def test_framed_serializer_refuses_pickle_unless_allowed():
+    payload = FramedSerializer(serializer=PickleSerializer(), threshold=0).dumps({"data": b"bytes"})
+
+    with pytest.raises(ValueError):
+        FramedSerializer().loads(payload)
+    assert FramedSerializer(allow_pickle=True).loads(payload) == {"data": b"bytes"}
+
+
+@pytest.mark.parametrize("raw,expected", [
+    (b'{"data": "legacy"}', {"data": "legacy"}),
+    (b"not json", "not json"),
+    (b'\n{"data": "legacy"}', {"data": "legacy"}),
+    (b'\t\r\n [1, 2]', [1, 2]),
+])
+def test_framed_serializer_reads_legacy_values(raw: bytes, expected: Any):
+    assert FramedSerializer().loads(raw) == expected
+
+
+def test_framed_serializer_decodes_whitespace_headers_as_frames():
+    payload = FramedSerializer(serializer=PickleSerializer(), threshold=0).dumps({"data": "x" * 100})
+    assert payload[0] == 0x0D
+    assert FramedSerializer(serializer=PickleSerializer()).loads(payload) == {"data": "x" * 100}
@@ -0,0 +1,76 @@
+import pytest
+from collections import Counter
+from pomdapi.api.http import RequestDefinition
+from pomdapi.cache.in_memory import InMemoryBackend
+from pomdapi.cache.sharded import HashRing, ShardedBackend, ShardedCache, routing_key
+
+
+@pytest.mark.parametrize("key,expected", [
+    ("plain", "plain"),
+    ("user/{42}/profile", "42"),
+    ("empty/{}/tag", "empty/{}/tag"),
+])
+def test_routing_key(key: str, expected: str):
+    assert routing_key(key) == expected
+
+
+def test_request_keys_spread_over_nodes():
+    ring = HashRing([f"node-{i}" for i in range(4)])
+    keys = [
+        ShardedCache.key_from_req(
+            f"getUser{i % 10}",
+            RequestDefinition("GET", f"/users/{i}", headers={"Accept": "json"}),
+        )
+        for i in range(1000)
+    ]
+
+    placements = Counter(ring.get_node(key) for key in keys)
+
+    assert len(placements) == 4
+    assert all(count > 150 for count in placements.values())
+
+
+def test_hash_tags_colocate_only_when_enabled():
+    keys = [f"user/{{42}}/item-{i}" for i in range(50)]
+
+    tagged = HashRing([f"node-{i}" for i in range(4)], hash_tags=True)
+    assert len({tagged.get_node(key) for key in keys}) == 1
+
+    plain = HashRing([f"node-{i}" for i in range(4)])
+    assert len({plain.get_node(key) for key in keys}) > 1
+
+
+def test_hash_ring_remaps_about_one_nth_of_keys():
+    ring = HashRing([f"node-{i}" for i in range(4)])
+    keys = [f"key-{i}" for i in range(10_000)]
+    before = {key: ring.get_node(key) for key in keys}
+
+    ring.add_node("node-4")
+    moved = [key for key in keys if ring.get_node(key) != before[key]]
+
+    assert all(ring.get_node(key) == "node-4" for key in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+
+
+@pytest.mark.parametrize("replicas", [1, 2, 3])
+def test_sharded_backend_replication(replicas: int):
+    nodes = {f"node-{i}": InMemoryBackend() for i in range(3)}
+    backend = ShardedBackend(nodes, replicas=replicas)
+    backend.set("key", {"data": "test"})
+
+    holders = [name for name, node in nodes.items() if node.get("key") is not None]
+    assert len(holders) == replicas
+    assert backend.get("key") == {"data": "test"}
+
+    backend.delete("key")
+    assert backend.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_sharded_backend_async_operations():
+    backend = ShardedBackend({f"node-{i}": InMemoryBackend() for i in range(3)})
+    await backend.aset("async_key", "async_value", 60)
+    assert await backend.aget("async_key") == "async_value"
+
+    await backend.adelete("async_key")
+    assert await backend.aget("async_key") is None
@@ -0,0 +1,87 @@
+import multiprocessing
+import threading
+import uuid
+import pytest
+from pomdapi.cache.shared_memory import SharedMemoryBackend, SharedMemoryCache
+from typing import Optional, Any
+
+
+def _write_from_child(path: str) -> None:
+    SharedMemoryBackend(path=str(path), slots=64, slot_size=256).set("child", {"pid": "child"})
+
+
+def _hold_last_stripe(path: str, locked, release) -> None:
+    backend = SharedMemoryBackend(path=str(path), slots=64, slot_size=256, stripes=64)
+    with backend._stripe(63):
+        locked.set()
+        release.wait(30)
+
+
+@pytest.mark.parametrize("key,value,ttl", [
+    ("test_key", {"data": "test"}, None),
+    ("another_key", "string_value", 60),
+    ("empty_dict", {}, 30),
+])
+def test_shared_memory_backend_set_get(tmp_path, key: str, value: dict[str, Any] | str, ttl: Optional[int]):
+    backend = SharedMemoryBackend(path=str(tmp_path / "shm"), slots=64, slot_size=256)
+    backend.set(key, value, ttl)
+    assert backend.get(key) == value
+
+    backend.delete(key)
+    assert backend.get(key) is None
+
+
+def test_shared_memory_backend_is_shared_across_processes(tmp_path):
+    path = tmp_path / "shm"
+    backend = SharedMemoryBackend(path=str(path), slots=64, slot_size=256)
+    process = multiprocessing.get_context("spawn").Process(target=_write_from_child, args=(path,))
+    process.start()
+    process.join(timeout=30)
+    assert backend.get("child") == {"pid": "child"}
+
+
+def test_shared_memory_backend_evicts_least_recently_read(tmp_path):
+    backend = SharedMemoryBackend(path=str(tmp_path / "shm"), slots=4, slot_size=256, ways=4)
+    for i in range(4):
+        backend.set(f"key-{i}", i)
+    backend.get("key-0")
+    backend.set("key-4", 4)
+
+    assert backend.get("key-0") == 0
+    assert backend.get("key-1") is None
+    assert backend.get("key-4") == 4
+
+
+def test_shared_memory_backend_skips_values_larger_than_a_slot(tmp_path):
+    backend = SharedMemoryBackend(path=str(tmp_path / "shm"), slots=64, slot_size=128)
+    backend.set("big", "small")
+    backend.set("big", "x" * 1024)
+    assert backend.get("big") is None
+
+
+def test_attaching_does_not_wait_for_stripe_locks(tmp_path):
+    path = tmp_path / "shm"
+    context = multiprocessing.get_context("spawn")
+    locked, release = context.Event(), context.Event()
+    process = context.Process(target=_hold_last_stripe, args=(path, locked, release))
+    process.start()
+    try:
+        assert locked.wait(30)
+        attached = []
+        thread = threading.Thread(
+            target=lambda: attached.append(SharedMemoryBackend(path=str(path))), daemon=True
+        )
+        thread.start()
+        thread.join(timeout=5)
+        assert attached
+    finally:
+        release.set()
+        process.join(timeout=30)
+
+
+def test_shared_memory_cache_passes_geometry_to_backend():
+    cache = SharedMemoryCache(name=f"test-{uuid.uuid4().hex}", slots=64, slot_size=256, ways=4, stripes=8)
+    try:
+        assert (cache._backend.ways, cache._backend.stripes) == (4, 8)
+    finally:
+        cache._backend.unlink()
@@ -0,0 +1,50 @@
+import time
+import pytest
+from pomdapi.cache.sqlite import SQLiteBackend, SQLiteCache
+from pomdapi.core.types import Tag
+from typing import Optional, Any
+
+
+@pytest.mark.parametrize("key,value,ttl", [
+    ("test_key", {"data": "test"}, None),
+    ("another_key", "string_value", 60),
+    ("empty_dict", {}, 30),
+])
+def test_sqlite_backend_set_get(tmp_path, key: str, value: dict[str, Any] | str, ttl: Optional[int]):
+    backend = SQLiteBackend(tmp_path / "cache.sqlite3")
+    backend.set(key, value, ttl)
+    assert backend.get(key) == value
+
+
+def test_sqlite_backend_survives_restart(tmp_path):
+    SQLiteBackend(tmp_path / "cache.sqlite3").set("warm", {"data": "kept"})
+    assert SQLiteBackend(tmp_path / "cache.sqlite3").get("warm") == {"data": "kept"}
+
+
+def test_sqlite_backend_expires_entries(tmp_path, monkeypatch):
+    backend = SQLiteBackend(tmp_path / "cache.sqlite3")
+    backend.set("short", "value", ttl=10)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert backend.get("short") is None
+    assert backend.purge_expired() == 0
+
+
+def test_sqlite_cache_invalidates_tags(tmp_path):
+    cache = SQLiteCache(tmp_path / "cache.sqlite3")
+    tag = Tag(type="Issue", id="1")
+    cache.set("getIssue", "issue-1", tags=[tag], response={"id": 1})
+    assert cache.get_by_request("getIssue", "issue-1") == {"id": 1}
+
+    cache.invalidate_tags("updateIssue", [tag])
+    assert cache.get_by_request("getIssue", "issue-1") is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_async_operations(tmp_path):
+    backend = SQLiteBackend(tmp_path / "cache.sqlite3")
+    await backend.aset("async_key", {"data": "async_test"}, 60)
+    assert await backend.aget("async_key") == {"data": "async_test"}
+
+    await backend.adelete("async_key")
+    assert await backend.aget("async_key") is None
@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+from pydantic import BaseModel, ValidationError
+from pomdapi.core.api import Api, Ready
+from pomdapi.core.middleware import Middleware
+from pomdapi.cache.in_memory import InMemoryCache
+
+
+class Balance(BaseModel):
+    address: str
+    amount: int
+
+
+def make_api(**kwargs):
+    calls = []
+
+    def base_query_fn(config, request):
+        calls.append(request)
+        if request == "invalid":
+            return {"address": request}
+        return {"address": request, "amount": 1}
+
+    async def abase_query_fn(config, request):
+        return base_query_fn(config, request)
+
+    api = Api(
+        base_query_config=None,
+        base_query_fn_handler=base_query_fn,
+        base_query_fn_handler_async=abase_query_fn,
+        **kwargs,
+    )
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return address
+
+    @api.mutation("touch")
+    def touch(address: str):
+        return address
+
+    return api, get_balance, touch, calls
+
+
+@pytest.mark.asyncio
+async def test_async_cache_hit_completes_without_scheduling():
+    api, get_balance, _, calls = make_api(cache=InMemoryCache())
+    assert await get_balance(address="0x1") == Balance(address="0x1", amount=1)
+
+    tasks = len(asyncio.all_tasks())
+    hit = get_balance(address="0x1")
+
+    assert isinstance(hit, Ready)
+    assert hit.done()
+    assert len(asyncio.all_tasks()) == tasks
+    assert await hit == Balance(address="0x1", amount=1)
+    assert calls == ["0x1"]
+
+
+@pytest.mark.asyncio
+async def test_async_miss_is_a_plain_coroutine():
+    api, get_balance, touch, calls = make_api(cache=InMemoryCache())
+
+    miss = get_balance(address="0x2")
+    assert asyncio.iscoroutine(miss)
+    assert calls == []
+    assert await miss == Balance(address="0x2", amount=1)
+    assert await touch(is_async=True, address="0x2") is None
+    assert calls == ["0x2", "0x2"]
+
+
+@pytest.mark.asyncio
+async def test_async_hit_errors_are_raised_when_awaited():
+    api, get_balance, _, _ = make_api(cache=InMemoryCache())
+    api.seed(get_balance, {"address": "invalid"}, {"address": "invalid"})
+
+    hit = get_balance(address="invalid")
+
+    with pytest.raises(ValidationError):
+        await hit
+
+
+@pytest.mark.asyncio
+async def test_acall_middleware_sees_cache_hits():
+    seen = []
+
+    class Outer(Middleware):
+        async def acall(self, ctx, call_next):
+            seen.append(ctx.endpoint_name)
+            return await call_next(ctx)
+
+    api, get_balance, _, calls = make_api(cache=InMemoryCache(), middleware=[Outer()])
+    await get_balance(address="0x3")
+    await get_balance(address="0x3")
+
+    assert seen == ["getBalance", "getBalance"]
+    assert calls == ["0x3"]
+
+
+@pytest.mark.asyncio
+async def test_sync_call_inside_running_loop():
+    api, get_balance, touch, calls = make_api(cache=InMemoryCache())
+
+    assert get_balance(is_async=False, address="0x4") == Balance(address="0x4", amount=1)
+    assert get_balance(is_async=False, address="0x4") == Balance(address="0x4", amount=1)
+    assert touch(is_async=False, address="0x4") is None
+    assert calls == ["0x4", "0x4"]
+
+
+def test_async_call_without_running_loop():
+    api, get_balance, _, _ = make_api(cache=InMemoryCache())
+
+    assert asyncio.run(get_balance(address="0x5")) == Balance(address="0x5", amount=1)
+    assert get_balance(address="0x5").result() == Balance(address="0x5", amount=1)
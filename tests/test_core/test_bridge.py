@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from pydantic import BaseModel
+from pomdapi.core.api import Api
+from pomdapi.core.bridge import BackgroundLoop
+from pomdapi.cache.in_memory import InMemoryCache
+
+
+class Balance(BaseModel):
+    address: str
+    amount: int
+
+
+def make_api(**kwargs):
+    threads = []
+
+    def base_query_fn(config, request):
+        raise AssertionError("sync handler used")
+
+    async def abase_query_fn(config, request):
+        threads.append(threading.current_thread().name)
+        await asyncio.sleep(0)
+        return {"address": request, "amount": 1}
+
+    api = Api(
+        base_query_config=None,
+        base_query_fn_handler=base_query_fn,
+        base_query_fn_handler_async=abase_query_fn,
+        background_loop=BackgroundLoop(name="bridge-test"),
+        **kwargs,
+    )
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return address
+
+    @api.mutation("touch")
+    def touch(address: str):
+        return address
+
+    return api, get_balance, touch, threads
+
+
+def test_sync_calls_run_on_the_background_loop():
+    api, get_balance, touch, threads = make_api(cache=InMemoryCache())
+    try:
+        with ThreadPoolExecutor(8) as pool:
+            results = list(
+                pool.map(lambda i: get_balance(is_async=False, address=f"0x{i}"), range(20))
+            )
+        assert results == [Balance(address=f"0x{i}", amount=1) for i in range(20)]
+        assert touch(is_async=False, address="0x1") is None
+        assert set(threads) == {"bridge-test"}
+        assert len(threads) == 21
+
+        assert get_balance(is_async=False, address="0x1") == Balance(address="0x1", amount=1)
+        assert len(threads) == 21
+    finally:
+        api.close()
+
+
+def test_closed_loop_rejects_calls():
+    api, get_balance, _, _ = make_api()
+    assert get_balance(is_async=False, address="0x1") == Balance(address="0x1", amount=1)
+    api.close()
+    api.close()
+
+    assert not api.background_loop.running
+    with pytest.raises(RuntimeError):
+        get_balance(is_async=False, address="0x1")
+
+
+def test_pending_calls_are_bounded():
+    release = threading.Event()
+
+    async def wait() -> str:
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        return "done"
+
+    with BackgroundLoop(max_pending=1) as loop:
+        first = loop.submit(wait())
+        with pytest.raises(TimeoutError):
+            loop.submit(wait(), timeout=0.05)
+        release.set()
+        assert first.result(1) == "done"
+        assert loop.run(wait(), timeout=1) == "done"
+
+
+def test_run_timeout_cancels_the_call():
+    cancelled = threading.Event()
+
+    async def hang() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with BackgroundLoop() as loop:
+        with pytest.raises(TimeoutError):
+            loop.run(hang(), timeout=0.05)
+        assert cancelled.wait(1)
+
+
+def test_shutdown_cancels_unfinished_calls():
+    loop = BackgroundLoop().start()
+    pending = loop.submit(asyncio.sleep(10))
+    loop.shutdown()
+
+    assert pending.cancelled()
+    assert not loop.running
@@ -0,0 +1,181 @@
+import pytest
+from dataclasses import dataclass, field
+from pydantic import BaseModel
+from pomdapi.core.types import CacheUpdate, Entity, Tag
+
+
+class Issue(BaseModel):
+    number: int
+    title: str
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    body: dict = field(default_factory=dict)
+
+
+ISSUE = Entity("Issue", id_field="number")
+
+RENAME_IN_LIST = CacheUpdate(
+    tags=lambda repo, number, title: Tag(type="Issue", id="LIST"),
+    update=lambda issues, _, repo, number, title: [
+        {**issue, "title": title} if issue["number"] == number else issue
+        for issue in issues
+    ],
+    optimistic=True,
+)
+
+
+def respond(request: Request):
+    if request.method == "POST":
+        return {"number": 3, **request.body}
+    if request.method == "PATCH":
+        return {"number": int(request.path.rsplit("/", 1)[1]), **request.body}
+    return [{"number": 1, "title": "first"}, {"number": 2, "title": "second"}]
+
+
+def test_mutation_response_patches_cached_list(fake_api, calls):
+    api = fake_api(respond)
+
+    @api.query("getIssues", response_type=list[Issue], entity=ISSUE)
+    def get_issues(repo: str):
+        return Request("GET", f"/{repo}/issues"), Tag(type="Issue", id="LIST")
+
+    @api.mutation(
+        "createIssue",
+        response_type=Issue,
+        updates=[
+            CacheUpdate(
+                endpoint_name="getIssues",
+                query_args=lambda repo, title: {"repo": repo},
+                update=lambda issues, created, repo, title: [*issues, created],
+            )
+        ],
+    )
+    def create_issue(repo: str, title: str):
+        return Request("POST", f"/{repo}/issues", {"title": title})
+
+    get_issues(is_async=False, repo="octo")
+    create_issue(is_async=False, repo="octo", title="third")
+
+    assert [issue.title for issue in get_issues(is_async=False, repo="octo")] == ["first", "second", "third"]
+    assert [(request.method, request.path) for request in calls] == [("GET", "/octo/issues"), ("POST", "/octo/issues")]
+
+
+def test_optimistic_patch_updates_shared_entities(fake_api, calls):
+    api = fake_api(respond)
+
+    @api.query("getIssues", response_type=list[Issue], entity=ISSUE)
+    def get_issues(repo: str):
+        return Request("GET", f"/{repo}/issues"), Tag(type="Issue", id="LIST")
+
+    @api.query("getIssue", response_type=Issue, entity=ISSUE)
+    def get_issue(repo: str, number: int):
+        return Request("GET", f"/{repo}/issues/{number}"), Tag(type="Issue", id=str(number))
+
+    @api.mutation("renameIssue", response_type=Issue, updates=[RENAME_IN_LIST])
+    def rename_issue(repo: str, number: int, title: str):
+        return Request("PATCH", f"/{repo}/issues/{number}", {"title": title})
+
+    get_issues(is_async=False, repo="octo")
+    rename_issue(is_async=False, repo="octo", number=2, title="renamed")
+
+    assert get_issue(is_async=False, repo="octo", number=2).title == "renamed"
+    assert len(calls) == 2
+
+
+def test_optimistic_patch_is_rolled_back_on_failure(fake_api):
+    failing = []
+
+    def fail_when_asked(request: Request):
+        if failing:
+            raise RuntimeError("upstream failed")
+        return respond(request)
+
+    api = fake_api(fail_when_asked)
+
+    @api.query("getIssues", response_type=list[Issue], entity=ISSUE)
+    def get_issues(repo: str):
+        return Request("GET", f"/{repo}/issues"), Tag(type="Issue", id="LIST")
+
+    @api.mutation("renameIssue", response_type=Issue, updates=[RENAME_IN_LIST])
+    def rename_issue(repo: str, number: int, title: str):
+        return Request("PATCH", f"/{repo}/issues/{number}", {"title": title})
+
+    get_issues(is_async=False, repo="octo")
+    failing.append(True)
+    with pytest.raises(RuntimeError):
+        rename_issue(is_async=False, repo="octo", number=2, title="renamed")
+
+    assert [issue.title for issue in get_issues(is_async=False, repo="octo")] == ["first", "second"]
+
+
+def test_overlapping_optimistic_updates_are_rolled_back_on_failure(fake_api):
+    failing = []
+
+    def fail_when_asked(request: Request):
+        if failing:
+            raise RuntimeError("upstream failed")
+        return respond(request)
+
+    api = fake_api(fail_when_asked)
+
+    @api.query("getIssues", response_type=list[Issue])
+    def get_issues(repo: str):
+        return Request("GET", f"/{repo}/issues"), Tag(type="Issue", id="LIST")
+
+    append_draft = lambda issues, _, repo, title: [*issues, {"number": 99, "title": title}]
+
+    @api.mutation(
+        "createIssue",
+        response_type=Issue,
+        updates=[
+            CacheUpdate(
+                endpoint_name="getIssues",
+                query_args=lambda repo, title: {"repo": repo},
+                update=append_draft,
+                optimistic=True,
+            ),
+            CacheUpdate(tags=Tag(type="Issue", id="LIST"), update=append_draft, optimistic=True),
+        ],
+    )
+    def create_issue(repo: str, title: str):
+        return Request("POST", f"/{repo}/issues", {"title": title})
+
+    get_issues(is_async=False, repo="octo")
+    failing.append(True)
+    with pytest.raises(RuntimeError):
+        create_issue(is_async=False, repo="octo", title="draft")
+
+    assert [issue.number for issue in get_issues(is_async=False, repo="octo")] == [1, 2]
+
+
+
+def test_update_targeting_an_entry_twice_applies_once(fake_api):
+    api = fake_api(respond)
+
+    @api.query("getIssues", response_type=list[Issue])
+    def get_issues(repo: str):
+        return Request("GET", f"/{repo}/issues"), Tag(type="Issue", id="LIST")
+
+    @api.mutation(
+        "createIssue",
+        response_type=Issue,
+        updates=[
+            CacheUpdate(
+                endpoint_name="getIssues",
+                query_args=lambda repo, title: {"repo": repo},
+                tags=Tag(type="Issue", id="LIST"),
+                update=lambda issues, created, repo, title: [*issues, created],
+            )
+        ],
+    )
+    def create_issue(repo: str, title: str):
+        return Request("POST", f"/{repo}/issues", {"title": title})
+
+    get_issues(is_async=False, repo="octo")
+    create_issue(is_async=False, repo="octo", title="third")
+
+    assert [issue.number for issue in get_issues(is_async=False, repo="octo")] == [1, 2, 3]
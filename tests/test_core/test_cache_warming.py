@@ -0,0 +1,118 @@
+import json
+import pytest
+from pomdapi.cache.in_memory import ConcurrentInMemoryCache, InMemoryCache
+from pomdapi.cache.sqlite import SQLiteCache
+from pomdapi.core.types import Entity, Tag
+
+
+def respond(path: str):
+    if path == "/users/missing":
+        raise LookupError("no user missing")
+    return {"id": path.rsplit("/", 1)[-1]}
+
+
+def test_prefetch_populates_cache(fake_api, calls):
+    api = fake_api(respond)
+
+    @api.query("getUser", response_type=dict, entity=Entity("User"))
+    def get_user(id: str):
+        return f"/users/{id}", [Tag("User", id)]
+
+    assert api.prefetch(get_user, ({"id": str(i)} for i in range(20)), concurrency=4) == 20
+    assert sorted(calls) == sorted(f"/users/{i}" for i in range(20))
+
+    assert get_user(is_async=False, id="7") == {"id": "7"}
+    assert len(calls) == 20
+
+
+@pytest.mark.asyncio
+async def test_aprefetch_populates_cache(fake_api, calls):
+    api = fake_api(respond)
+
+    @api.query("getUser", response_type=dict, entity=Entity("User"))
+    def get_user(id: str):
+        return f"/users/{id}", [Tag("User", id)]
+
+    assert await api.aprefetch("getUser", [{"id": "1"}, {"id": "2"}, {"id": "1"}], concurrency=2) == 3
+    assert get_user(is_async=False, id="2") == {"id": "2"}
+    assert calls.count("/users/2") == 1
+
+
+def test_prefetch_raises_the_first_error(fake_api):
+    api = fake_api(respond)
+
+    @api.query("getUser", response_type=dict)
+    def get_user(id: str):
+        return f"/users/{id}"
+
+    with pytest.raises(LookupError, match="no user missing"):
+        api.prefetch(get_user, [{"id": "1"}, {"id": "missing"}, {"id": "2"}], concurrency=2)
+
+
+@pytest.mark.asyncio
+async def test_aprefetch_raises_the_first_error(fake_api):
+    api = fake_api(respond)
+
+    @api.query("getUser", response_type=dict)
+    def get_user(id: str):
+        return f"/users/{id}"
+
+    with pytest.raises(LookupError, match="no user missing"):
+        await api.aprefetch(get_user, [{"id": "1"}, {"id": "missing"}, {"id": "2"}], concurrency=2)
+
+
+def test_seed_injects_response_with_provided_tags(fake_api, calls):
+    api = fake_api(respond)
+
+    @api.query("getUser", response_type=dict, entity=Entity("User"))
+    def get_user(id: str):
+        return f"/users/{id}", [Tag("User", id)]
+
+    api.seed(get_user, {"id": "42"}, {"id": "42", "name": "seeded"})
+
+    assert get_user(is_async=False, id="42") == {"id": "42", "name": "seeded"}
+    assert calls == []
+    api.cache.invalidate_tags("getUser", [Tag("User", "42")])
+    assert get_user(is_async=False, id="42") == {"id": "42"}
+
+
+CACHES = [
+    InMemoryCache,
+    ConcurrentInMemoryCache,
+    lambda: SQLiteCache(path=":memory:"),
+]
+
+
+@pytest.mark.parametrize("make_cache", CACHES)
+def test_snapshot_round_trip(tmp_path, make_cache):
+    source = make_cache()
+    source.set("getUser", "/users/1", ["User-1"], {"id": "1"})
+    source.set("getUser", "/users/2", [], {"id": "2"}, ttl=60)
+    source._backend.set("expired", "gone", ttl=-1)
+    path = tmp_path / "snapshot.jsonl"
+    assert source.export_snapshot(path) == 3
+
+    target = make_cache()
+    assert target.import_snapshot(path) == 3
+    assert target.get_by_request("getUser", "/users/2") == {"id": "2"}
+    assert target.get_by_tags("getUser", ["User-1"]) == target.key_from_req("getUser", "/users/1")
+    assert target.get_by_request("expired", "") is None
+
+
+@pytest.mark.parametrize("make_cache", CACHES)
+@pytest.mark.asyncio
+async def test_async_round_trip(make_cache):
+    cache = make_cache()
+    await cache.aset("getUser", "/users/1", ["User-1"], {"id": "1"})
+
+    assert await cache.aget_by_request("getUser", "/users/1") == {"id": "1"}
+    assert await cache.aget_by_tags("getUser", ["User-1"]) == cache.key_from_req("getUser", "/users/1")
+    await cache.ainvalidate_tags("getUser", ["User-1"])
+    assert await cache.aget_by_request("getUser", "/users/1") is None
+
+
+def test_import_rejects_other_files(tmp_path):
+    path = tmp_path / "other.jsonl"
+    path.write_text(json.dumps({"key": "a", "value": 1, "ttl": None}) + "\n")
+    with pytest.raises(ValueError):
+        InMemoryCache().import_snapshot(path)
@@ -0,0 +1,44 @@
+import pytest
+from pomdapi.api.jsonrpc import JSONRPCResponseError, decode_result, encode_request
+from pomdapi.core.codec import MsgspecCodec, OrjsonCodec, StdlibCodec, get_codec, set_codec
+
+
+def available_codecs():
+    codecs = []
+    for factory in (StdlibCodec, OrjsonCodec, MsgspecCodec):
+        try:
+            codecs.append(factory())
+        except ImportError:
+            pass
+    return codecs
+
+
+@pytest.fixture(params=available_codecs(), ids=lambda codec: codec.name)
+def codec(request):
+    previous = get_codec()
+    set_codec(request.param)
+    yield request.param
+    set_codec(previous)
+
+
+@pytest.mark.parametrize("value", [
+    {"number": "0x1b4", "transactions": [{"hash": "0xabc", "value": 10 ** 18}], "uncles": []},
+    ["ünïcode", 1.5, None, True],
+    10 ** 20 + 1,
+    {"balance": -(10 ** 30) - 7, "hash": "1234567890123456789012345"},
+])
+def test_codec_round_trip(codec, value):
+    encoded = codec.dumps(value)
+    assert isinstance(encoded, bytes)
+    assert codec.loads(encoded) == value
+    assert codec.loads(encoded.decode()) == value
+
+
+def test_jsonrpc_envelope(codec):
+    request = codec.loads(encode_request("eth_getBlockByNumber", ["0x1b4", True], 7))
+    assert request == {"jsonrpc": "2.0", "id": 7, "method": "eth_getBlockByNumber", "params": ["0x1b4", True]}
+
+    assert decode_result(b'{"jsonrpc": "2.0", "id": 7, "result": "0x1"}') == "0x1"
+    with pytest.raises(JSONRPCResponseError) as error:
+        decode_result(b'{"jsonrpc": "2.0", "id": 7, "error": {"code": -32601, "message": "Method not found"}}')
+    assert error.value.error.code == -32601
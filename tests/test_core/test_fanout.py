@@ -0,0 +1,140 @@
+import threading
+import time
+import httpx
+import pytest
+from pydantic import BaseModel
+from pomdapi.api.http import HttpApi, BaseQueryConfig, RequestDefinition
+from pomdapi.core.api import Api
+
+
+class Balance(BaseModel):
+    address: str
+    amount: int
+
+
+def make_api(delays=None, fail=()):
+    threads = set()
+
+    def base_query_fn(config, request):
+        threads.add(threading.current_thread().name)
+        time.sleep((delays or {}).get(request, 0))
+        if request in fail:
+            raise RuntimeError(f"{request} failed")
+        return {"address": request, "amount": int(request)}
+
+    api = Api(base_query_config=None, base_query_fn_handler=base_query_fn)
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return address
+
+    return api, get_balance, threads
+
+
+def counted(n, consumed):
+    for i in range(n):
+        consumed.append(i)
+        yield {"address": str(i)}
+
+
+def test_results_are_ordered_and_run_on_the_pool():
+    api, get_balance, threads = make_api(delays={"0": 0.05})
+    try:
+        results = list(api.map_sync(get_balance, counted(10, []), workers=4))
+    finally:
+        api.close()
+
+    assert [r.amount for r in results] == list(range(10))
+    assert len(threads) > 1
+    assert all(name.startswith("pomdapi-map") for name in threads)
+
+
+def test_unordered_results_arrive_as_completed():
+    api, get_balance, _ = make_api(delays={"0": 0.2})
+    try:
+        results = list(api.map_sync("getBalance", counted(4, []), workers=4, ordered=False))
+    finally:
+        api.close()
+
+    assert [r.amount for r in results][-1] == 0
+    assert sorted(r.amount for r in results) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_slow_calls_time_out(ordered: bool):
+    api, get_balance, _ = make_api(delays={"1": 0.5})
+    try:
+        results = list(
+            api.map_sync(
+                get_balance, counted(3, []), workers=3, ordered=ordered,
+                timeout=0.1, return_exceptions=True,
+            )
+        )
+    finally:
+        api.close()
+
+    errors = [r for r in results if isinstance(r, TimeoutError)]
+    assert len(errors) == 1
+    assert sorted(r.amount for r in results if isinstance(r, Balance)) == [0, 2]
+
+
+def test_first_error_raises_and_stops_submitting():
+    consumed = []
+    api, get_balance, _ = make_api(fail={"2"})
+    try:
+        with pytest.raises(RuntimeError, match="2 failed"):
+            list(api.map_sync(get_balance, counted(100, consumed), workers=2))
+    finally:
+        api.close()
+
+    assert len(consumed) < 10
+
+
+def test_leaving_early_cancels_remaining_calls():
+    consumed = []
+    api, get_balance, _ = make_api()
+    try:
+        with api.map_sync(get_balance, counted(100, consumed), workers=2) as balances:
+            for balance in balances:
+                break
+    finally:
+        api.close()
+
+    assert balance.amount == 0
+    assert len(consumed) <= 3
+
+
+def test_http_calls_share_one_pooled_client(mock_transport, monkeypatch):
+    mock_transport(lambda request: httpx.Response(200, json={"address": request.url.path[1:], "amount": 1}))
+    created = []
+    client = httpx.Client
+
+    def counting_client(*args, **kwargs):
+        created.append(1)
+        return client(*args, **kwargs)
+
+    monkeypatch.setattr(httpx, "Client", counting_client)
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url="http://fanout.test"))
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return RequestDefinition(method="GET", path=f"/{address}")
+
+    try:
+        results = list(api.map_sync(get_balance, ({"address": f"0x{i}"} for i in range(10))))
+    finally:
+        api.close()
+
+    assert [r.address for r in results] == [f"0x{i}" for i in range(10)]
+    assert len(created) == 1
+
+
+def test_growing_the_pool_keeps_running_maps_alive():
+    api, get_balance, _ = make_api()
+    try:
+        first = iter(api.map_sync(get_balance, counted(10, []), workers=2))
+        assert next(first).amount == 0
+        assert [r.amount for r in api.map_sync(get_balance, counted(4, []), workers=4)] == [0, 1, 2, 3]
+        assert [r.amount for r in first] == list(range(1, 10))
+    finally:
+        api.close()
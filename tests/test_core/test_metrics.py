@@ -0,0 +1,163 @@
+import asyncio
+import httpx
+import pytest
+from pydantic import BaseModel
+from pomdapi.api.http import HttpApi, BaseQueryConfig, RequestDefinition
+from pomdapi.core.api import Api
+from pomdapi.core.metrics import Histogram, Metrics
+from pomdapi.cache import in_memory
+from pomdapi.cache.in_memory import ConcurrentInMemoryCache, InMemoryCache
+
+
+class Balance(BaseModel):
+    address: str
+    amount: int
+
+
+@pytest.mark.parametrize("value", [0, 7, 63, 64, 1_000, 123_456, 10**9])
+def test_histogram_quantiles_have_bounded_relative_error(value: int):
+    histogram = Histogram()
+    for _ in range(10):
+        histogram.record(value)
+
+    estimate = histogram.quantile(0.5)
+
+    assert value <= estimate <= value * 1.04 + 1
+    assert histogram.quantile(1.0) == value
+
+
+def test_histogram_ranks_values():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.record(value)
+
+    assert 490 <= histogram.quantile(0.5) <= 520
+    assert 980 <= histogram.quantile(0.99) <= 1000
+    assert histogram.count == 1000
+    assert histogram.total == sum(range(1, 1001))
+
+
+@pytest.fixture
+def balances_api():
+    def base_query_fn(config, request):
+        if request == "fail":
+            raise RuntimeError("upstream failed")
+        return {"address": request, "amount": 1}
+
+    api = Api(
+        base_query_config=None,
+        base_query_fn_handler=base_query_fn,
+        cache=InMemoryCache(keep_unused_for=60),
+    )
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return address, [f"Balance-{address}"]
+
+    @api.mutation("transfer", response_type=Balance)
+    def transfer(address: str):
+        return address, [f"Balance-{address}"]
+
+    return api, get_balance, transfer
+
+
+def test_uninstrumented_api_composes_nothing(balances_api):
+    api, _, _ = balances_api
+
+    assert api._pipeline("getBalance").transport == api._transport
+    assert api.cache.metrics is None
+
+
+def test_counts_calls_errors_and_cache_events(monkeypatch, balances_api):
+    now = [1_000.0]
+    monkeypatch.setattr(in_memory.time, "time", lambda: now[0])
+    api, get_balance, transfer = balances_api
+    metrics = Metrics()
+    metrics.instrument(api)
+
+    get_balance(is_async=False, address="0x1")
+    get_balance(is_async=False, address="0x1")
+    transfer(is_async=False, address="0x1")
+    get_balance(is_async=False, address="0x1")
+    now[0] += 3600
+    get_balance(is_async=False, address="0x1")
+    with pytest.raises(RuntimeError):
+        get_balance(is_async=False, address="fail")
+
+    snapshot = metrics.snapshot()
+    assert snapshot["endpoints"]["getBalance"]["count"] == 4
+    assert snapshot["endpoints"]["getBalance"]["errors"] == 1
+    assert snapshot["endpoints"]["getBalance"]["in_flight"] == 0
+    assert snapshot["endpoints"]["transfer"]["count"] == 1
+    assert snapshot["caches"]["InMemoryBackend"] == {
+        "hits": 1,
+        "misses": 4,
+        "stale": 1,
+        "evictions": 1,
+        "hit_ratio": 0.2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_concurrent_cache_counts_evictions():
+    cache = ConcurrentInMemoryCache()
+    stats = Metrics().instrument_cache(cache)
+    cache.set("getBalance", "0x1", ["Balance-0x1"], {"address": "0x1", "amount": 1})
+    cache.set("getBalance", "0x2", ["Balance-0x2"], {"address": "0x2", "amount": 1})
+
+    cache.invalidate_tags("transfer", ["Balance-0x1"])
+    await cache.ainvalidate_tags("transfer", ["Balance-0x2"])
+    cache.invalidate_tags("transfer", ["Balance-0x3"])
+
+    assert stats.evictions == 2
+
+
+def test_in_flight_gauge_during_async_calls():
+    seen: list[int] = []
+    metrics = Metrics()
+
+    async def abase_query_fn(config, request):
+        seen.append(metrics.endpoints["getBalance"].in_flight)
+        await asyncio.sleep(0)
+        return {"address": request, "amount": 1}
+
+    api = Api(
+        base_query_config=None,
+        base_query_fn_handler=lambda config, request: None,
+        base_query_fn_handler_async=abase_query_fn,
+    )
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return address
+
+    metrics.instrument(api)
+
+    async def main():
+        await asyncio.gather(*(get_balance(is_async=True, address=str(i)) for i in range(3)))
+
+    asyncio.run(main())
+
+    assert seen == [1, 2, 3]
+    assert metrics.endpoints["getBalance"].in_flight == 0
+
+
+def test_payload_sizes_and_prometheus_export(mock_transport):
+    body = b'{"address": "0x1", "amount": 5}'
+    mock_transport(lambda request: httpx.Response(200, content=body))
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url="https://api.test.com"))
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return RequestDefinition(method="GET", path=f"/balances/{address}")
+
+    metrics = Metrics(namespace="svc")
+    metrics.instrument(api)
+    get_balance(is_async=False, address="0x1")
+
+    assert metrics.endpoints["getBalance"].payload.total == len(body)
+    text = metrics.prometheus()
+    assert "# TYPE svc_request_duration_seconds summary" in text
+    assert 'svc_request_duration_seconds_count{endpoint="getBalance"} 1' in text
+    assert f'svc_response_size_bytes_sum{{endpoint="getBalance"}} {len(body)}' in text
+    assert 'svc_requests_in_flight{endpoint="getBalance"} 0' in text
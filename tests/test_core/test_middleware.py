@@ -0,0 +1,152 @@
+import asyncio
+import pytest
+from pydantic import BaseModel
+from pomdapi.core.api import Api
+from pomdapi.core.middleware import CallContext, Middleware, compose
+from pomdapi.cache.in_memory import InMemoryCache
+
+
+class Balance(BaseModel):
+    address: str
+    amount: int
+
+
+class Recorder(Middleware):
+    def __init__(self, name: str, log: list[str]):
+        self.name = name
+        self.log = log
+
+    def transport(self, ctx, call_next):
+        self.log.append(f"{self.name}:transport:{ctx.endpoint_name}")
+        return call_next(ctx)
+
+    async def atransport(self, ctx, call_next):
+        self.log.append(f"{self.name}:atransport:{ctx.endpoint_name}")
+        return await call_next(ctx)
+
+    def cache_lookup(self, ctx, call_next):
+        cached = call_next(ctx)
+        self.log.append(f"{self.name}:{'hit' if cached is not None else 'miss'}")
+        return cached
+
+    def validate(self, ctx, response, call_next):
+        self.log.append(f"{self.name}:validate")
+        return call_next(ctx, response)
+
+
+def make_api(**kwargs):
+    def base_query_fn(config, request):
+        if request == "fail":
+            raise RuntimeError("upstream failed")
+        return {"address": request, "amount": 1}
+
+    async def abase_query_fn(config, request):
+        return base_query_fn(config, request)
+
+    api = Api(
+        base_query_config=None,
+        base_query_fn_handler=base_query_fn,
+        base_query_fn_handler_async=abase_query_fn,
+        **kwargs,
+    )
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return address
+
+    @api.mutation("transfer", response_type=Balance)
+    def transfer(address: str):
+        return address
+
+    return api, get_balance, transfer
+
+
+def test_empty_chain_is_the_terminal_itself():
+    api, _, _ = make_api()
+
+    pipeline = api._pipeline("getBalance")
+
+    assert pipeline.transport == api._transport
+    assert pipeline.cache_lookup == api._cache_lookup
+
+
+def test_only_overridden_hooks_are_composed():
+    class TransportOnly(Middleware):
+        def transport(self, ctx, call_next):
+            return call_next(ctx)
+
+    terminal = lambda ctx: None
+
+    assert compose([TransportOnly()], "cache_lookup", terminal) is terminal
+    assert compose([TransportOnly()], "transport", terminal) is not terminal
+
+
+def test_middleware_wraps_stages_in_order():
+    log: list[str] = []
+    api, get_balance, _ = make_api(cache=InMemoryCache())
+    api.use(Recorder("outer", log), Recorder("inner", log))
+
+    get_balance(is_async=False, address="0x1")
+    get_balance(is_async=False, address="0x1")
+
+    assert log == [
+        "inner:miss",
+        "outer:miss",
+        "outer:transport:getBalance",
+        "inner:transport:getBalance",
+        "outer:validate",
+        "inner:validate",
+        "inner:hit",
+        "outer:hit",
+        "outer:validate",
+        "inner:validate",
+    ]
+
+
+def test_middleware_can_rewrite_responses():
+    class Double(Middleware):
+        def validate(self, ctx, response, call_next):
+            return call_next(ctx, {**response, "amount": response["amount"] * 2})
+
+    _, get_balance, transfer = make_api(middleware=[Double()])
+
+    assert get_balance(is_async=False, address="0x1") == Balance(address="0x1", amount=2)
+    assert transfer(is_async=False, address="0x1") == Balance(address="0x1", amount=2)
+
+
+def test_async_chain_and_context():
+    log: list[str] = []
+    seen: list[CallContext] = []
+
+    class Capture(Middleware):
+        async def atransport(self, ctx, call_next):
+            seen.append(ctx)
+            return await call_next(ctx)
+
+    api, _, transfer = make_api()
+    api.use(Capture(), Recorder("recorder", log))
+
+    async def main():
+        return await transfer(is_async=True, address="0x2")
+
+    assert asyncio.run(main()) == Balance(address="0x2", amount=1)
+    assert log == ["recorder:atransport:transfer", "recorder:validate"]
+    assert seen[0].request == "0x2"
+    assert seen[0].kwargs == {"address": "0x2"}
+    assert seen[0].is_async
+
+
+def test_transport_errors_propagate_through_the_chain():
+    class Swallow(Middleware):
+        def transport(self, ctx, call_next):
+            try:
+                return call_next(ctx)
+            except RuntimeError:
+                return {"address": "fallback", "amount": 0}
+
+    _, get_balance, _ = make_api(middleware=[Swallow()])
+    _, unguarded, _ = make_api()
+
+    assert get_balance(is_async=False, address="fail").address == "fallback"
+    with pytest.raises(RuntimeError):
+        unguarded(is_async=False, address="fail")
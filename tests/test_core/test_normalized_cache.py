@@ -0,0 +1,100 @@
+from pydantic import BaseModel
+from pomdapi.core.types import Entity, Tag
+
+
+class Issue(BaseModel):
+    number: int
+    title: str
+
+
+ISSUES = [{"number": 1, "title": "first"}, {"number": 2, "title": "second"}]
+ISSUE = Entity("Issue", id_field="number")
+
+
+def respond(path: str):
+    if path == "/issues":
+        return ISSUES
+    return next(issue for issue in ISSUES if f"/issues/{issue['number']}" == path)
+
+
+def test_item_query_is_answered_from_list_entities(fake_api, calls):
+    api = fake_api(respond)
+
+    @api.query("getIssues", response_type=list[Issue], entity=ISSUE)
+    def get_issues():
+        return "/issues", Tag(type="Issue", id="LIST")
+
+    @api.query("getIssue", response_type=Issue, entity=ISSUE)
+    def get_issue(number: int):
+        return f"/issues/{number}", Tag(type="Issue", id=str(number))
+
+    assert get_issues(is_async=False) == [Issue(**issue) for issue in ISSUES]
+    assert get_issue(is_async=False, number=2) == Issue(number=2, title="second")
+    assert calls == ["/issues"]
+
+
+def test_entities_are_stored_once(fake_api):
+    api = fake_api(respond)
+
+    @api.query("getIssues", response_type=list[Issue], entity=ISSUE)
+    def get_issues():
+        return "/issues", Tag(type="Issue", id="LIST")
+
+    get_issues(is_async=False)
+    stored = api.cache._backend._store
+    assert stored["entity/Issue/1"].value == ISSUES[0]
+    assert "__entity_refs__" in stored["getIssues//issues"].value
+
+
+def test_invalidating_an_entity_refetches_lists_holding_it(fake_api, calls, capsys):
+    api = fake_api(respond)
+
+    @api.query("getIssues", response_type=list[Issue], entity=ISSUE)
+    def get_issues():
+        return "/issues", Tag(type="Issue", id="LIST")
+
+    @api.query("getIssue", response_type=Issue, entity=ISSUE)
+    def get_issue(number: int):
+        return f"/issues/{number}", Tag(type="Issue", id=str(number))
+
+    @api.mutation("updateIssue")
+    def update_issue(number: int):
+        return f"/issues/{number}", Tag(type="Issue", id=str(number))
+
+    get_issues(is_async=False)
+    update_issue(is_async=False, number=1)
+    update_issue(is_async=False, number=2)
+    get_issues(is_async=False)
+    get_issue(is_async=False, number=1)
+    assert calls == ["/issues", "/issues/1", "/issues/2", "/issues"]
+    assert capsys.readouterr().out == ""
+
+
+def test_scoped_entities_do_not_collide_across_parents(fake_api, calls):
+    repos = {
+        "a/x": [{"number": 1, "title": "a/x first"}],
+        "b/y": [{"number": 1, "title": "b/y first"}],
+    }
+
+    def respond(path: str):
+        repo, _, number = path.partition("#")
+        return repos[repo] if not number else repos[repo][0]
+
+    api = fake_api(respond)
+    issue = Entity("Issue", id_field="number", scope=lambda owner, repo, **_: f"{owner}/{repo}")
+
+    @api.query("getIssues", response_type=list[Issue], entity=issue)
+    def get_issues(owner: str, repo: str):
+        return f"{owner}/{repo}"
+
+    @api.query("getIssue", response_type=Issue, entity=issue)
+    def get_issue(owner: str, repo: str, number: int):
+        return f"{owner}/{repo}#{number}", Tag(type="Issue", id=f"{owner}/{repo}/{number}")
+
+    get_issues(is_async=False, owner="b", repo="y")
+    get_issues(is_async=False, owner="a", repo="x")
+
+    assert get_issue(is_async=False, owner="a", repo="x", number=1).title == "a/x first"
+    assert get_issue(is_async=False, owner="b", repo="y", number=1).title == "b/y first"
+    assert calls == ["b/y", "a/x"]
+    assert "entity/Issue/a/x/1" in api.cache._backend._store
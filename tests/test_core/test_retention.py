@@ -0,0 +1,75 @@
+import pytest
+from pomdapi.cache import in_memory
+from pomdapi.cache.in_memory import InMemoryCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(in_memory.time, "time", clock)
+    return clock
+
+
+def test_unreferenced_entry_dropped_after_grace_period(clock, fake_api, calls):
+    api = fake_api(lambda request: str(len(calls)), cache=InMemoryCache(keep_unused_for=10))
+
+    @api.query("eth_getBalance", response_type=int)
+    def get_balance(address: str):
+        return f"eth_getBalance/{address}", [f"Balance-{address}"]
+
+    assert get_balance(is_async=False, address="0x1") == 1
+    clock.now += 5
+    assert get_balance(is_async=False, address="0x1") == 1
+    clock.now += 10
+    assert get_balance(is_async=False, address="0x1") == 2
+
+
+def test_retained_entry_is_pinned_until_released(clock, fake_api, calls):
+    api = fake_api(lambda request: str(len(calls)), cache=InMemoryCache(keep_unused_for=10))
+
+    @api.query("eth_getBalance", response_type=int)
+    def get_balance(address: str):
+        return f"eth_getBalance/{address}", [f"Balance-{address}"]
+
+    with api.retain(get_balance, "0x1") as ref:
+        assert get_balance(is_async=False, address="0x1") == 1
+        clock.now += 3600
+        assert get_balance(is_async=False, address="0x1") == 1
+        assert api.cache._backend.get("tag/Balance-0x1") is not None
+
+        other = api.retain(get_balance, "0x1").acquire()
+        ref.release()
+        clock.now += 3600
+        assert get_balance(is_async=False, address="0x1") == 1
+        other.release()
+
+    clock.now += 5
+    assert get_balance(is_async=False, address="0x1") == 1
+    clock.now += 10
+    assert get_balance(is_async=False, address="0x1") == 2
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_subscription_retains_its_entry(clock, fake_api, calls):
+    api = fake_api(lambda request: str(len(calls)), cache=InMemoryCache(keep_unused_for=10))
+
+    @api.query("eth_getBalance", response_type=int)
+    def get_balance(address: str):
+        return f"eth_getBalance/{address}", [f"Balance-{address}"]
+
+    async with api.subscribe(get_balance, "0x1", interval=3600) as balances:
+        assert await balances.__anext__() == 1
+        clock.now += 3600
+        assert api.cache.get_by_request("eth_getBalance", "eth_getBalance/0x1") == "1"
+
+    clock.now += 11
+    assert api.cache.get_by_request("eth_getBalance", "eth_getBalance/0x1") is None
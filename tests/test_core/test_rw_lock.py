@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+import pytest
+from pomdapi.core.rw_lock import AsyncRWLock, RWLock
+
+
+@pytest.mark.asyncio
+async def test_fair_async_rw_lock_lets_waiting_writer_in_before_new_readers():
+    lock = AsyncRWLock(fair=True)
+    order: list[str] = []
+
+    async def reader(name: str, hold: float):
+        async with lock.read():
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def writer():
+        async with lock.write():
+            order.append("writer")
+
+    first = asyncio.create_task(reader("r1", 0.05))
+    await asyncio.sleep(0.01)
+    waiting_writer = asyncio.create_task(writer())
+    await asyncio.sleep(0.01)
+    late_reader = asyncio.create_task(reader("r2", 0))
+    await asyncio.gather(first, waiting_writer, late_reader)
+
+    assert order == ["r1", "writer", "r2"]
+
+
+def test_rw_lock_allows_concurrent_readers():
+    lock = RWLock()
+    inside = 0
+    peak = 0
+    guard = threading.Lock()
+
+    def reader():
+        nonlocal inside, peak
+        with lock.read():
+            with guard:
+                inside += 1
+                peak = max(peak, inside)
+            time.sleep(0.02)
+            with guard:
+                inside -= 1
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak > 1
+
+
+def test_fair_rw_lock_writer_is_exclusive():
+    lock = RWLock(fair=True)
+    counter = 0
+
+    def writer():
+        nonlocal counter
+        for _ in range(1000):
+            with lock.write():
+                counter += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter == 4000
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_poller(fake_api, calls):
+    api = fake_api(lambda request: str(len(calls)))
+
+    @api.query("eth_blockNumber", response_type=int)
+    def get_block_number():
+        return "eth_blockNumber"
+
+    async with api.subscribe(get_block_number, interval=0.01) as first, \
+            api.subscribe("eth_blockNumber", interval=0.01) as second:
+        assert api.subscriptions.active == 1
+        assert await first.__anext__() == 1
+        assert await second.__anext__() == 1
+        await asyncio.sleep(0.05)
+
+    assert api.subscriptions.active == 0
+    polled = len(calls)
+    await asyncio.sleep(0.03)
+    assert len(calls) == polled
+    assert api.cache.get_by_request("eth_blockNumber", "eth_blockNumber") == str(polled)
+
+
+def test_callback_subscription_from_sync_code(fake_api, calls):
+    api = fake_api(lambda request: str(len(calls)))
+
+    @api.query("eth_blockNumber", response_type=int)
+    def get_block_number():
+        return "eth_blockNumber"
+
+    received: list[int] = []
+    done = threading.Event()
+
+    def on_value(value: int):
+        received.append(value)
+        if len(received) == 3:
+            done.set()
+
+    subscription = api.subscribe(get_block_number, interval=0.01, callback=on_value)
+    assert done.wait(timeout=5)
+    subscription.unsubscribe()
+
+    assert received[:3] == [1, 2, 3]
+    assert api.subscriptions.active == 0
+
+
+@pytest.mark.asyncio
+async def test_each_event_loop_gets_its_own_poller(fake_api, calls):
+    api = fake_api(lambda request: str(len(calls)))
+
+    @api.query("eth_blockNumber", response_type=int)
+    def get_block_number():
+        return "eth_blockNumber"
+
+    subscribed, release = threading.Event(), threading.Event()
+    received: list[int] = []
+
+    async def subscribe_on_other_loop():
+        async with api.subscribe(get_block_number, interval=0.01) as numbers:
+            received.append(await numbers.__anext__())
+            subscribed.set()
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+
+    thread = threading.Thread(target=asyncio.run, args=(subscribe_on_other_loop(),))
+    thread.start()
+    try:
+        assert await asyncio.to_thread(subscribed.wait, 5)
+        async with api.subscribe(get_block_number, interval=0.01) as numbers:
+            assert api.subscriptions.active == 2
+            assert await asyncio.wait_for(numbers.__anext__(), 5) >= 1
+    finally:
+        release.set()
+        await asyncio.to_thread(thread.join, 5)
+
+    assert len(received) == 1
+    assert api.subscriptions.active == 0
+
+
+@pytest.mark.asyncio
+async def test_callback_errors_are_logged_not_published(fake_api, calls, caplog):
+    api = fake_api(lambda request: str(len(calls)))
+
+    @api.query("eth_blockNumber", response_type=int)
+    def get_block_number():
+        return "eth_blockNumber"
+
+
+    def fail(value: int):
+        raise ValueError("bad callback")
+
+    with api.subscribe(get_block_number, interval=0.01, callback=fail):
+        async with api.subscribe(get_block_number, interval=0.01) as numbers:
+            assert await numbers.__anext__() >= 1
+            assert await numbers.__anext__() >= 1
+
+    assert "bad callback" in caplog.text
@@ -0,0 +1,138 @@
+import asyncio
+import httpx
+import pytest
+from pydantic import BaseModel
+from pomdapi.api.http import HttpApi, BaseQueryConfig, RequestDefinition
+from pomdapi.core.api import Api
+from pomdapi.core.tracing import InMemorySink, Trace, Tracer, _httpx_phases, phase
+from pomdapi.cache.in_memory import InMemoryCache
+
+
+class Balance(BaseModel):
+    address: str
+    amount: int
+
+
+def make_api():
+    def base_query_fn(config, request):
+        if request == "fail":
+            raise RuntimeError("upstream failed")
+        return {"address": request, "amount": 1}
+
+    async def abase_query_fn(config, request):
+        return base_query_fn(config, request)
+
+    api = Api(
+        base_query_config=None,
+        base_query_fn_handler=base_query_fn,
+        base_query_fn_handler_async=abase_query_fn,
+        cache=InMemoryCache(),
+    )
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return address
+
+    return api, get_balance
+
+
+def names(spans):
+    return [span.name for span in spans]
+
+
+def test_records_nested_phases_of_a_query():
+    sink = InMemorySink()
+    api, get_balance = make_api()
+    Tracer(sink).instrument(api)
+
+    get_balance(is_async=False, address="0x1")
+
+    root, *children = sink.spans
+    assert root.name == "pomdapi.query"
+    assert root.attributes == {"endpoint": "getBalance", "is_async": False, "cache_hit": False}
+    assert names(children) == ["request_fn", "cache_lookup", "transport", "cache_store", "validate"]
+    assert all(span.parent_id == root.span_id for span in children)
+    assert all(span.trace_id == root.trace_id for span in children)
+    assert all(root.start_ns <= span.start_ns <= span.end_ns <= root.end_ns for span in children)
+
+
+def test_cache_hits_skip_transport():
+    sink = InMemorySink()
+    api, get_balance = make_api()
+    Tracer(sink).instrument(api)
+    get_balance(is_async=False, address="0x1")
+    sink.clear()
+
+    get_balance(is_async=False, address="0x1")
+
+    assert names(sink.spans) == ["pomdapi.query", "request_fn", "cache_lookup", "validate"]
+    assert sink.spans[0].attributes["cache_hit"] is True
+
+
+def test_async_calls_and_errors():
+    sink = InMemorySink()
+    api, get_balance = make_api()
+    Tracer(sink).instrument(api)
+
+    async def main():
+        await get_balance(is_async=True, address="0x1")
+        with pytest.raises(RuntimeError):
+            await get_balance(is_async=True, address="fail")
+
+    asyncio.run(main())
+
+    roots = sink.by_name("pomdapi.query")
+    assert [root.attributes["is_async"] for root in roots] == [True, True]
+    assert [root.error for root in roots] == [None, "RuntimeError"]
+    assert sink.by_name("transport")[1].error == "RuntimeError"
+
+
+@pytest.mark.parametrize("sample_rate, expected", [(0.0, 0), (1.0, 20)])
+def test_sampling(sample_rate: float, expected: int):
+    sink = InMemorySink()
+    api, get_balance = make_api()
+    Tracer(sink, sample_rate=sample_rate).instrument(api)
+
+    for i in range(20):
+        get_balance(is_async=False, address=str(i))
+
+    assert len(sink.by_name("pomdapi.query")) == expected
+
+
+def test_phase_is_a_no_op_outside_traced_calls():
+    with phase("decode") as span:
+        assert span is None
+
+
+def test_http_decode_phase(mock_transport):
+    mock_transport(lambda request: httpx.Response(200, json={"address": "0x1", "amount": 1}))
+    sink = InMemorySink()
+    api = HttpApi.from_defaults(base_query_config=BaseQueryConfig(base_url="https://api.test.com"))
+
+    @api.query("getBalance", response_type=Balance)
+    def get_balance(address: str):
+        return RequestDefinition(method="GET", path=f"/balances/{address}")
+
+    Tracer(sink).instrument(api)
+    get_balance(is_async=False, address="0x1")
+
+    (transport,) = sink.by_name("transport")
+    (decode,) = sink.by_name("decode")
+    assert decode.parent_id == transport.span_id
+
+
+def test_httpx_trace_events_become_spans():
+    trace = Trace()
+    root = trace.begin("pomdapi.query")
+    hook, _ = _httpx_phases(trace)
+
+    hook("connection.connect_tcp.started", {})
+    hook("connection.connect_tcp.complete", {})
+    hook("http11.receive_response_headers.started", {})
+    hook("http11.receive_response_headers.failed", {"exception": TimeoutError()})
+
+    connect, headers = trace.spans[1:]
+    assert connect.name == "httpx.connection.connect_tcp"
+    assert connect.parent_id == root.span_id and connect.end_ns is not None
+    assert headers.name == "httpx.http11.receive_response_headers"
+    assert headers.error == "TimeoutError"